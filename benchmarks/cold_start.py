@@ -0,0 +1,111 @@
+# benchmarks/cold_start.py
+"""
+Cold start of the API: how long `import main` takes, how long until
+/readyz turns 200, and the latency of the first /advice/new request.
+
+Every run is a fresh interpreter (run from the directory holding
+new_crop_model.pkl, as the server is):
+
+  import        `import main` alone
+  ready         import + startup with WARM_UP=blocking (time to /readyz 200)
+  ready-snap    the same, mapping a current warm snapshot (warm_snapshot.py)
+  first-cold    first /advice/new with WARM_UP=off (model loads in the request)
+  first-warm    first /advice/new after a blocking warm-up
+
+All variants but ready-snap run with WARM_SNAPSHOT=0; ready-snap uses a
+snapshot written to a temp directory by a first, untimed run.
+
+FIREBASE_CREDENTIALS is removed from the probes' environment so the numbers
+don't depend on credentials being present (and so a missing one is covered).
+
+    python -m benchmarks.cold_start --runs 5 --max-import-ms 1500
+
+With --max-import-ms / --max-first-ms the script exits non-zero when the
+median goes over the limit, so it can gate CI.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = r"""
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+variant = {variant!r}
+os.environ["WARM_UP"] = "off" if variant == "first-cold" else "blocking"
+os.environ["WARM_SNAPSHOT"] = "1" if variant == "ready-snap" else "0"
+os.environ["WARM_SNAPSHOT_PATH"] = {snapshot!r}
+
+start = time.perf_counter()
+import main
+result = {{"import_ms": (time.perf_counter() - start) * 1000}}
+
+if variant != "import":
+    from fastapi.testclient import TestClient
+
+    with TestClient(main.app) as client:
+        assert client.get("/readyz").status_code == 200
+        result["ready_ms"] = (time.perf_counter() - start) * 1000
+        if variant.startswith("first"):
+            payload = {{"district": "mysuru", "taluk": "mysuru", "soilType": "Red Soil",
+                        "farmSizeAcre": 2.0, "avgRainfall": 900.0, "avgTemp": 25.0}}
+            t0 = time.perf_counter()
+            assert client.post("/advice/new", json=payload).status_code == 200
+            result["first_ms"] = (time.perf_counter() - t0) * 1000
+print(json.dumps(result))
+"""
+
+
+def run_probe(variant: str, snapshot: str) -> dict:
+    env = dict(os.environ)
+    env.pop("FIREBASE_CREDENTIALS", None)
+    code = _PROBE.format(root=ROOT, variant=variant, snapshot=snapshot)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+    if out.returncode != 0:
+        raise RuntimeError(f"{variant} probe failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API cold start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--max-first-ms", type=float, default=None,
+                        help="limit for the first request after warm-up")
+    args = parser.parse_args()
+
+    medians = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = os.path.join(tmp, "warm_state.snapshot")
+        run_probe("ready-snap", snapshot)  # writes the snapshot the timed runs map
+
+        print(f"{'variant':<11} {'import ms':>10} {'ready ms':>10} {'first req ms':>13}   (median of {args.runs})")
+        for variant in ("import", "ready", "ready-snap", "first-cold", "first-warm"):
+            results = [run_probe(variant, snapshot) for _ in range(args.runs)]
+            row = {
+                key: statistics.median(r[key] for r in results)
+                for key in ("import_ms", "ready_ms", "first_ms") if key in results[0]
+            }
+            medians[variant] = row
+            cells = [f"{row[k]:>{w}.1f}" if k in row else " " * (w - 1) + "-"
+                     for k, w in (("import_ms", 10), ("ready_ms", 10), ("first_ms", 13))]
+            print(f"{variant:<11} {' '.join(cells)}")
+
+    failed = []
+    if args.max_import_ms is not None and medians["import"]["import_ms"] > args.max_import_ms:
+        failed.append(f"import {medians['import']['import_ms']:.1f} ms > {args.max_import_ms} ms")
+    if args.max_first_ms is not None and medians["first-warm"]["first_ms"] > args.max_first_ms:
+        failed.append(f"first request {medians['first-warm']['first_ms']:.1f} ms > {args.max_first_ms} ms")
+    if failed:
+        print("REGRESSION: " + "; ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# benchmarks/crop_registry.py
+"""
+Parity check and microbenchmark for new-crop ranking on the crop registry.
+
+The previous implementation (parallel dicts keyed by crop name, `in list`
+membership checks) is kept here as the reference, over the same data with
+every alias spelled out as its own key, as the old tables did for rice /
+paddy. Both rank the same random recommendation lists (model labels,
+registry crops, aliases, unknown names) for every district and soil; the
+script exits non-zero on any mismatch, then times both per call.
+
+    python -m benchmarks.crop_registry --cases 20000
+"""
+
+import argparse
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+from crop_registry import CROP_ALIASES, DISTRICT_CROPS, KARNATAKA_CROPS, SOIL_CROPS
+from main import rank_new_crop_recs
+
+MODEL_LABELS = ["apple", "banana", "chickpea", "cotton", "grapes", "kidneybeans", "maize", "rice", "watermelon"]
+
+
+def legacy_tables():
+    names = {name: [name] + [a for a, n in CROP_ALIASES.items() if n == name] for name in KARNATAKA_CROPS}
+
+    def column(fact):
+        return {alias: facts[fact] for name, facts in KARNATAKA_CROPS.items() if fact in facts
+                for alias in names[name]}
+
+    def members(table):
+        return {key: [alias for crop in crops for alias in names.get(crop, [crop])] for key, crops in table.items()}
+
+    return SimpleNamespace(
+        price=column("price"), cost=column("cost"), yield_=column("yield"),
+        temp=column("temp"), rainfall=column("rainfall"),
+        districts=members(DISTRICT_CROPS), soils=members(SOIL_CROPS),
+    )
+
+
+def legacy_rank(t, base_recs, req):
+    district = (req.district or "").lower()
+    soil = (req.soilType or "").lower()
+    ranked = []
+    for r in base_recs:
+        crop = r["cropName"].lower().strip()
+        score = r["score"]
+        if district in t.districts and crop in t.districts[district]:
+            score += 0.35
+        if soil in t.soils and crop in t.soils[soil]:
+            score += 0.30
+        if crop in t.temp:
+            lo, hi = t.temp[crop]
+            if lo <= req.avgTemp <= hi:
+                score += 0.20
+        if crop in t.rainfall:
+            lo, hi = t.rainfall[crop]
+            if lo <= req.avgRainfall <= hi:
+                score += 0.25
+        r["score"] = round(score, 3)
+
+        price = t.price.get(crop)
+        r["avgMarketPricePerQuintal"] = price if price else None
+        if price and crop in t.yield_ and crop in t.cost:
+            r["expectedYieldPerAcreQuintal"] = t.yield_[crop]
+            r["estimatedNetProfitPerAcre"] = int(price * t.yield_[crop] - t.cost[crop])
+        else:
+            r["expectedYieldPerAcreQuintal"] = None
+            r["estimatedNetProfitPerAcre"] = None
+        r["priceSource"] = "Based on 2025 Karnataka Mandi Avg"
+        ranked.append(r)
+    return sorted(ranked, key=lambda x: x["score"], reverse=True)[:4]
+
+
+def make_cases(n, rng):
+    names = MODEL_LABELS + list(KARNATAKA_CROPS) + list(CROP_ALIASES) + ["mulberry", "unknown crop"]
+    districts = list(DISTRICT_CROPS) + ["bidar", ""]
+    soils = [s.title() for s in SOIL_CROPS] + ["Loamy"]
+    cases = []
+    for _ in range(n):
+        recs = [{"cropName": rng.choice(names), "score": round(rng.random(), 4)} for _ in range(6)]
+        req = SimpleNamespace(
+            district=rng.choice(districts).title(), soilType=rng.choice(soils),
+            avgTemp=rng.choice([rng.uniform(10, 42), float(rng.randint(14, 40))]),
+            avgRainfall=rng.choice([rng.uniform(300, 3800), float(rng.randrange(500, 3600, 100))]),
+        )
+        cases.append((recs, req))
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crop registry ranking parity / benchmark")
+    parser.add_argument("--cases", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    tables = legacy_tables()
+    cases = make_cases(args.cases, random.Random(args.seed))
+
+    mismatches = 0
+    for recs, req in cases:
+        expected = legacy_rank(tables, [dict(r) for r in recs], req)
+        actual = rank_new_crop_recs([dict(r) for r in recs], req)
+        if expected != actual:
+            mismatches += 1
+            if mismatches <= 5:
+                print("MISMATCH", req, recs, expected, actual, sep="\n  ")
+    print(f"parity: {len(cases) - mismatches}/{len(cases)} cases identical")
+
+    copies = [([dict(r) for r in recs], req) for recs, req in cases]
+    t0 = time.perf_counter()
+    for recs, req in copies:
+        legacy_rank(tables, recs, req)
+    legacy_us = (time.perf_counter() - t0) / len(cases) * 1e6
+
+    copies = [([dict(r) for r in recs], req) for recs, req in cases]
+    t0 = time.perf_counter()
+    for recs, req in copies:
+        rank_new_crop_recs(recs, req)
+    registry_us = (time.perf_counter() - t0) / len(cases) * 1e6
+
+    print(f"dicts:    {legacy_us:8.2f} us / call (6 recommendations)")
+    print(f"registry: {registry_us:8.2f} us / call")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
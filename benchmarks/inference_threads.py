@@ -0,0 +1,97 @@
+# benchmarks/inference_threads.py
+"""
+p99 latency of single-row new-crop predictions under concurrent load,
+with the pickled n_jobs=-1 forest vs. an InferenceRuntime-pinned one.
+
+Each of --workers processes plays a uvicorn worker with --concurrency
+request threads; every request is one sklearn predict_proba call on a
+single row (the compiled forest is bypassed to isolate the estimator's
+own threading).
+
+    python -m benchmarks.inference_threads --workers 4 --concurrency 8
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import threading
+import time
+import warnings
+
+import numpy as np
+
+
+def _worker(mode: str, model_path: str, concurrency: int, requests: int, out):
+    warnings.simplefilter("ignore", UserWarning)
+    import joblib
+    from inference_runtime import InferenceRuntime
+
+    model = joblib.load(model_path)
+    if mode == "runtime":
+        InferenceRuntime(n_jobs=1, blas_threads=1).configure(model)
+
+    rng = np.random.default_rng(os.getpid())
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        local = []
+        for _ in range(requests):
+            x = np.array([[85, 40, 40, rng.uniform(10, 40), 70, 6.6, rng.uniform(50, 3000)]])
+            start = time.perf_counter()
+            model.predict_proba(x)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    out.put(latencies)
+
+
+def _run(mode: str, args) -> dict:
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(mode, args.model, args.concurrency, args.requests, out))
+        for _ in range(args.workers)
+    ]
+    start = time.perf_counter()
+    for p in procs:
+        p.start()
+    latencies = []
+    for _ in procs:
+        latencies.extend(out.get())
+    for p in procs:
+        p.join()
+    wall = time.perf_counter() - start
+
+    lat_ms = np.array(latencies) * 1e3
+    return {
+        "p50": np.percentile(lat_ms, 50),
+        "p99": np.percentile(lat_ms, 99),
+        "rps": len(lat_ms) / wall,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inference thread-pool benchmark")
+    parser.add_argument("--model", default="new_crop_model.pkl")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=50, help="per client thread")
+    args = parser.parse_args(argv)
+
+    print(f"cpus={os.cpu_count()} workers={args.workers} concurrency={args.concurrency} "
+          f"requests/thread={args.requests}")
+    print(f"{'mode':>10} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>9}")
+    for mode in ("pickled", "runtime"):
+        r = _run(mode, args)
+        print(f"{mode:>10} {r['p50']:>9.2f} {r['p99']:>9.2f} {r['rps']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
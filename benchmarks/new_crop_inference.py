@@ -0,0 +1,90 @@
+# benchmarks/new_crop_inference.py
+"""
+Parity check + latency benchmark: CompiledForest vs the sklearn Pipeline.
+
+Run from the project root:
+    python -m benchmarks.new_crop_inference --model new_crop_model.pkl
+
+Parity is checked on the rows of data/crop_recommendation plus random
+rows built from the soil profiles; the script exits non-zero if any class
+probability differs by more than --atol.
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+
+from forest_compiler import CompiledForest
+from ml_advisor import SOIL_PROFILES, DEFAULT_PROFILE
+
+DATA_PATH = os.path.join("data", "crop_recommendation")
+
+
+def _parity_rows(n_random: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    profiles = list(SOIL_PROFILES.values()) + [DEFAULT_PROFILE]
+    rows = []
+    for _ in range(n_random):
+        p = profiles[rng.integers(len(profiles))]
+        rows.append([p["N"], p["P"], p["K"], rng.uniform(5, 48),
+                     p["humidity"], p["ph"], rng.uniform(0, 4000)])
+    X = np.array(rows)
+
+    if os.path.exists(DATA_PATH):
+        data = np.genfromtxt(DATA_PATH, delimiter=",", skip_header=1, usecols=range(7))
+        X = np.vstack([X, data])
+    return X
+
+
+def _time_per_call(fn, X, repeat: int) -> float:
+    fn(X)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(X)
+    return (time.perf_counter() - start) / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", default="new_crop_model.pkl")
+    parser.add_argument("--atol", type=float, default=1e-6)
+    parser.add_argument("--random-rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    pipe = joblib.load(args.model)
+    t0 = time.perf_counter()
+    forest = CompiledForest.from_pipeline(pipe)
+    print(f"compile: {time.perf_counter() - t0:.3f}s  trees={forest.n_trees} "
+          f"nodes={len(forest.threshold)} max_depth={forest.max_depth}")
+
+    # ---------- parity ----------
+    X = _parity_rows(args.random_rows)
+    expected = pipe.predict_proba(X)
+    got = forest.predict_proba(X)
+    max_err = float(np.abs(expected - got).max())
+    argmax_agree = float((expected.argmax(1) == got.argmax(1)).mean())
+    print(f"parity: rows={len(X)} max|diff|={max_err:.2e} argmax agreement={argmax_agree:.4%}")
+    if max_err > args.atol:
+        print(f"FAIL: max difference {max_err:.2e} exceeds atol {args.atol:.0e}")
+        sys.exit(1)
+
+    # ---------- latency ----------
+    print(f"{'rows':>6} {'sklearn ms':>11} {'compiled ms':>12} {'speedup':>8}")
+    for n in (1, 16, 256, 4096):
+        Xb = X[:n]
+        repeat = max(3, args.repeat // max(1, n // 64))
+        t_sk = _time_per_call(pipe.predict_proba, Xb, repeat)
+        t_cf = _time_per_call(forest.predict_proba, Xb, repeat)
+        print(f"{n:>6} {t_sk * 1e3:>11.3f} {t_cf * 1e3:>12.3f} {t_sk / t_cf:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
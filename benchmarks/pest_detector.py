@@ -0,0 +1,212 @@
+# benchmarks/pest_detector.py
+"""
+Parity checks and microbenchmarks for the compiled PestDetector rules
+and the vectorised detect_batch.
+
+The original interpreter (re-reading each rule dict per call) is kept
+here as the reference. Both are run on the same cases for pest_db and
+pest_db_extended: every rule threshold, plus and minus one step, random
+readings, every stage (and an unknown one), every month. The script exits
+non-zero on any mismatch. detect_batch is checked against detect() on the
+same cases, then timed scoring every crop over --batch-obs observations
+(e.g. 30 districts x 365 days).
+
+    python -m benchmarks.pest_detector --cases 50000 --batch-obs 10950
+"""
+
+import argparse
+import datetime
+import random
+import sys
+import time
+
+import numpy as np
+
+from pest_db import PEST_DB as PEST_DB_BASE
+from pest_db_extended import PEST_DB as PEST_DB_EXTENDED
+from pest_detector import PestDetector
+
+
+def legacy_detect(pest_db, crop_name, weather, stage, month_name):
+    crop = crop_name.lower()
+    if crop not in pest_db:
+        return []
+
+    alerts = []
+    for pest, rules in pest_db[crop].items():
+        match = True
+        if "temp_gt" in rules and not (weather["temp"] > rules["temp_gt"]):
+            match = False
+        if "humidity_gt" in rules and not (weather["humidity"] > rules["humidity_gt"]):
+            match = False
+        if "humidity_lt" in rules and not (weather["humidity"] < rules["humidity_lt"]):
+            match = False
+        if "rainfall_gt" in rules and not (weather["rainfall"] > rules["rainfall_gt"]):
+            match = False
+        if "rainfall_lt" in rules and not (weather["rainfall"] < rules["rainfall_lt"]):
+            match = False
+        if "temp_range" in rules:
+            lo, hi = rules["temp_range"]
+            if not (lo <= weather["temp"] <= hi):
+                match = False
+        if "stage" in rules and stage not in rules["stage"]:
+            match = False
+        if "season" in rules and month_name not in rules["season"]:
+            match = False
+        if match:
+            alerts.append({
+                "pest": pest,
+                "symptoms": rules["symptoms"],
+                "preventive": rules["preventive"],
+                "corrective": rules["corrective"]
+            })
+    return alerts
+
+
+def _boundaries(pest_db, keys):
+    values = set()
+    for pests in pest_db.values():
+        for rule in pests.values():
+            for key in keys:
+                if key in rule:
+                    bounds = rule[key] if isinstance(rule[key], list) else [rule[key]]
+                    for b in bounds:
+                        values.update((b - 1, b - 0.5, b, b + 0.5, b + 1))
+    return sorted(values) or [0]
+
+
+def make_cases(pest_db, n, seed=0):
+    rng = random.Random(seed)
+    temps = _boundaries(pest_db, ("temp_gt", "temp_range"))
+    hums = _boundaries(pest_db, ("humidity_gt", "humidity_lt"))
+    rains = _boundaries(pest_db, ("rainfall_gt", "rainfall_lt"))
+    stages = sorted({s for p in pest_db.values() for r in p.values() for s in r.get("stage", [])})
+    stages += ["unknown_stage", None]
+    crops = list(pest_db)
+    odd_crops = ["Unknown Crop"] + [c.upper() for c in pest_db]
+
+    cases = []
+    for _ in range(n):
+        crop = rng.choice(crops) if rng.random() < 0.8 else rng.choice(odd_crops)
+        crop_stages = [s for r in pest_db.get(crop, {}).values() for s in r.get("stage", [])]
+        stage = rng.choice(crop_stages) if crop_stages and rng.random() < 0.8 else rng.choice(stages)
+        weather = {
+            "temp": rng.choice(temps) if rng.random() < 0.7 else rng.uniform(-5, 50),
+            "humidity": rng.choice(hums) if rng.random() < 0.7 else rng.uniform(0, 100),
+            "rainfall": rng.choice(rains) if rng.random() < 0.7 else rng.uniform(0, 4000),
+        }
+        day = datetime.date(2025, rng.randint(1, 12), rng.randint(1, 28))
+        cases.append((crop, weather, stage, day))
+    return cases
+
+
+def check(name, pest_db, cases) -> int:
+    detector = PestDetector(pest_db)
+    mismatches = 0
+    matched = 0
+    for crop, weather, stage, day in cases:
+        expected = legacy_detect(pest_db, crop, weather, stage, day.strftime("%B"))
+        got = detector.detect(crop, weather, stage, on=day)
+        matched += bool(expected)
+        if got != expected:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"  MISMATCH {crop} {weather} {stage} {day}: {got} != {expected}")
+    print(f"{name:<10} {len(cases)} cases, {matched} with alerts, {mismatches} mismatches")
+    return mismatches
+
+
+def bench(name, pest_db, cases, repeat=3):
+    detector = PestDetector(pest_db)
+
+    def run_legacy():
+        # includes the per-call strftime the old detect() did on datetime.now()
+        for crop, weather, stage, day in cases:
+            legacy_detect(pest_db, crop, weather, stage, day.strftime("%B"))
+
+    def run_compiled():
+        for crop, weather, stage, day in cases:
+            detector.detect(crop, weather, stage, on=day)
+
+    timings = {}
+    for label, fn in (("legacy", run_legacy), ("compiled", run_compiled)):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        timings[label] = best / len(cases) * 1e6
+
+    print(f"{name:<10} legacy {timings['legacy']:6.2f} us/call   "
+          f"compiled {timings['compiled']:6.2f} us/call   "
+          f"speedup {timings['legacy'] / timings['compiled']:.1f}x")
+
+
+def check_batch(name, pest_db, cases) -> int:
+    detector = PestDetector(pest_db)
+    mismatches = 0
+    by_crop = {}
+    for case in cases:
+        by_crop.setdefault(case[0], []).append(case)
+
+    for crop, crop_cases in by_crop.items():
+        weather = {
+            key: np.array([w[key] for _, w, _, _ in crop_cases])
+            for key in ("temp", "humidity", "rainfall")
+        }
+        stages = [s for _, _, s, _ in crop_cases]
+        months = np.array([d.month for _, _, _, d in crop_cases])
+        pests, matrix = detector.detect_batch(crop, weather, stages, months)
+        _, scores = detector.detect_batch(crop, weather, stages, months, score=True)
+        if not np.array_equal(matrix, scores == 1.0):
+            mismatches += 1
+        for row, (_, w, s, d) in zip(matrix, crop_cases):
+            expected = [a["pest"] for a in detector.detect(crop, w, s, on=d)]
+            if [p for p, hit in zip(pests, row) if hit] != expected:
+                mismatches += 1
+    print(f"{name:<10} detect_batch vs detect: {mismatches} mismatches")
+    return mismatches
+
+
+def bench_batch(name, pest_db, n_obs, seed=0):
+    detector = PestDetector(pest_db)
+    rng = np.random.default_rng(seed)
+    stage_names = sorted(detector.rules.stage_bits)
+    weather = {
+        "temp": rng.uniform(10, 40, n_obs),
+        "humidity": rng.uniform(30, 100, n_obs),
+        "rainfall": rng.uniform(0, 3000, n_obs),
+    }
+    stages = detector.stage_codes(rng.choice(stage_names, n_obs))
+    months = rng.integers(1, 13, n_obs)
+
+    start = time.perf_counter()
+    hits = 0
+    for crop in pest_db:
+        _, matrix = detector.detect_batch(crop, weather, stages, months)
+        hits += int(matrix.sum())
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:<10} detect_batch: {len(pest_db)} crops x {n_obs} observations "
+          f"in {elapsed * 1000:.1f} ms ({hits} alerts)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PestDetector parity + microbenchmark")
+    parser.add_argument("--cases", type=int, default=50000)
+    parser.add_argument("--batch-obs", type=int, default=30 * 365)
+    args = parser.parse_args()
+
+    failures = 0
+    for name, db in (("base", PEST_DB_BASE), ("extended", PEST_DB_EXTENDED)):
+        cases = make_cases(db, args.cases)
+        failures += check(name, db, cases)
+        failures += check_batch(name, db, cases)
+        bench(name, db, cases)
+        bench_batch(name, db, args.batch_obs)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/pest_kb_loader.py
+"""
+Startup time and RSS of the file-backed pest knowledge base vs. importing
+the same data as Python literals (how pest_db_extended.py and
+district_pest_history.py used to ship).
+
+The literal module is regenerated from pest_knowledge.jsonl into a temp
+directory. Every variant runs in a fresh interpreter and reports the time
+and RSS growth of the load step alone:
+
+  literal-cold   import, no cached .pyc (first start after deploy)
+  literal-warm   import with the .pyc cached
+  kb-open        open the knowledge base (header/index only)
+  kb-one-crop    open + one crop's rules (a typical first request)
+  kb-all         open + every crop + district history
+
+    python -m benchmarks.pest_kb_loader --runs 5
+"""
+
+import argparse
+import json
+import os
+import pprint
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = r"""
+import json, sys, time
+sys.path.insert(0, {root!r})
+sys.path.insert(0, {tmp!r})
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+
+import pest_kb  # loader code itself is not what is being measured
+before_rss = rss_kb()
+start = time.perf_counter()
+variant = {variant!r}
+if variant.startswith("literal"):
+    import legacy_pest_data
+    n = len(legacy_pest_data.PEST_DB) + len(legacy_pest_data.PEST_HISTORY)
+else:
+    kb = pest_kb.PestKnowledgeBase({kb_path!r})
+    if variant == "kb-one-crop":
+        kb.rules_for("cotton")
+    elif variant == "kb-all":
+        for crop in kb.crops:
+            kb.rules_for(crop)
+        kb.history()
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "rss_kb": rss_kb() - before_rss}}))
+"""
+
+
+def write_literal_module(tmp: str, kb_path: str):
+    sys.path.insert(0, ROOT)
+    from pest_kb import PestKnowledgeBase
+
+    kb = PestKnowledgeBase(kb_path)
+    pest_db = {crop: kb.rules_for(crop) for crop in kb.crops}
+    with open(os.path.join(tmp, "legacy_pest_data.py"), "w", encoding="utf-8") as f:
+        f.write("PEST_DB = " + pprint.pformat(pest_db, sort_dicts=False) + "\n\n")
+        f.write("PEST_HISTORY = " + pprint.pformat(dict(kb.history()), sort_dicts=False) + "\n")
+
+
+def run_probe(variant: str, tmp: str, kb_path: str) -> dict:
+    if variant == "literal-cold":
+        cache = os.path.join(tmp, "__pycache__")
+        if os.path.isdir(cache):
+            for name in os.listdir(cache):
+                os.remove(os.path.join(cache, name))
+    code = _PROBE.format(root=ROOT, tmp=tmp, variant=variant, kb_path=kb_path)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pest knowledge base loader benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--kb", default=os.path.join(ROOT, "pest_knowledge.jsonl"))
+    args = parser.parse_args()
+
+    variants = ["literal-cold", "literal-warm", "kb-open", "kb-one-crop", "kb-all"]
+    with tempfile.TemporaryDirectory() as tmp:
+        write_literal_module(tmp, args.kb)
+        run_probe("literal-warm", tmp, args.kb)  # populate the .pyc for the warm runs
+
+        print(f"{'variant':<14} {'load ms':>9} {'RSS +KB':>9}   (median of {args.runs})")
+        for variant in variants:
+            results = [run_probe(variant, tmp, args.kb) for _ in range(args.runs)]
+            ms = statistics.median(r["ms"] for r in results)
+            rss = statistics.median(r["rss_kb"] for r in results)
+            print(f"{variant:<14} {ms:>9.2f} {rss:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
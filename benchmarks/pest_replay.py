@@ -0,0 +1,66 @@
+# benchmarks/pest_replay.py
+"""
+Throughput of pest_replay over synthetic multi-year weather.
+
+Writes one CSV per district (every PEST_HISTORY district, --years of daily
+readings with a seasonal temperature / monsoon rainfall shape) to a temp
+directory, then replays all crops with 1 and --workers processes.
+
+    python -m benchmarks.pest_replay --years 10 --workers 4
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+
+def write_weather(directory: str, districts, years: int, seed: int = 0):
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2010-01-01", periods=365 * years, freq="D")
+    doy = dates.dayofyear.to_numpy()
+    paths = []
+    for district in districts:
+        n = len(dates)
+        monsoon = np.exp(-((doy - 210) / 40.0) ** 2)
+        frame = pd.DataFrame({
+            "date": dates.strftime("%Y-%m-%d"),
+            "temp": 26 + 6 * np.sin((doy - 60) / 365 * 2 * np.pi) + rng.normal(0, 2, n),
+            "humidity": np.clip(55 + 35 * monsoon + rng.normal(0, 8, n), 5, 100),
+            "rainfall": np.clip(2500 * monsoon + rng.normal(0, 150, n), 0, None),
+        })
+        path = os.path.join(directory, f"{district}.csv")
+        frame.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pest_replay throughput")
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    from district_pest_history import PEST_HISTORY
+    from pest_replay import build_report, replay
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_weather(tmp, sorted(PEST_HISTORY), args.years)
+        print(f"{len(paths)} districts x {args.years} years of daily weather")
+
+        for workers in sorted({1, args.workers}):
+            start = time.perf_counter()
+            stats = replay(paths, workers=workers)
+            report = build_report(stats)
+            elapsed = time.perf_counter() - start
+            print(f"workers={workers:<3} {report['days']} district-days x "
+                  f"{len(report['rules'])} rules in {elapsed:.2f} s "
+                  f"(history recall {report['history']['recall']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# benchmarks/prefork.py
+"""
+Memory and throughput of serve.py as the number of workers grows, with the
+model preloaded before fork (shared copy-on-write) vs. loaded in every
+worker (SERVE_PRELOAD=0).
+
+For each configuration the server is started on a free port, left to finish
+its warm-up, driven with --concurrency parallel /advice/new requests for
+--seconds, and then measured from /proc:
+
+  RSS   resident pages per worker, shared ones included
+  PSS   proportional set size: shared pages divided among the processes
+        mapping them, so the total is the real memory cost of the server
+
+Run it from the directory holding new_crop_model.pkl:
+
+    python -m benchmarks.prefork --workers 1,2,4,8 --seconds 10
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAYLOAD = {"district": "mysuru", "taluk": "mysuru", "soilType": "Red Soil",
+           "farmSizeAcre": 2.0, "avgRainfall": 900.0, "avgTemp": 25.0}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def memory_kb(pid: int) -> dict:
+    out = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                out[key.lower()] = int(rest.split()[0])
+    return out
+
+
+def children_of(pid: int):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def wait_ready(url: str, workers: int, timeout_s: float = 120.0):
+    # Each worker answers /readyz for itself; require a run of 200s
+    deadline = time.monotonic() + timeout_s
+    streak = 0
+    while streak < workers * 4:
+        if time.monotonic() > deadline:
+            raise RuntimeError("server did not become ready")
+        try:
+            ok = httpx.get(url + "/readyz", timeout=2.0).status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        streak = streak + 1 if ok else 0
+        time.sleep(0.05 if ok else 0.25)
+
+
+async def drive(url: str, concurrency: int, seconds: float) -> int:
+    done = 0
+    stop_at = time.monotonic() + seconds
+
+    async def worker(client):
+        nonlocal done
+        while time.monotonic() < stop_at:
+            r = await client.post(url + "/advice/new", json=PAYLOAD)
+            r.raise_for_status()
+            done += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        await asyncio.gather(*[worker(client) for _ in range(concurrency)])
+    return done
+
+
+def run_config(workers: int, preload: bool, concurrency: int, seconds: float) -> dict:
+    port = free_port()
+    env = dict(os.environ, SERVE_PRELOAD="1" if preload else "0", WARM_UP="blocking",
+               PEST_KB_WATCH_S="0", LOG_LEVEL="warning")
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "serve.py"), "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        wait_ready(url, workers)
+        requests = asyncio.run(drive(url, concurrency, seconds))
+        pids = children_of(proc.pid)
+        mem = [memory_kb(pid) for pid in pids]
+        parent = memory_kb(proc.pid)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+
+    return {
+        "rps": requests / seconds,
+        "rss_per_worker_mb": sum(m["rss"] for m in mem) / len(mem) / 1024,
+        "pss_per_worker_mb": sum(m["pss"] for m in mem) / len(mem) / 1024,
+        "pss_total_mb": (sum(m["pss"] for m in mem) + parent["pss"]) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork server memory / throughput benchmark")
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'preload':>8} {'req/s':>9} {'RSS/worker MB':>14} "
+          f"{'PSS/worker MB':>14} {'PSS total MB':>13}")
+    for workers in [int(w) for w in args.workers.split(",")]:
+        for preload in (True, False):
+            r = run_config(workers, preload, args.concurrency, args.seconds)
+            print(f"{workers:>7} {'on' if preload else 'off':>8} {r['rps']:>9.1f} "
+                  f"{r['rss_per_worker_mb']:>14.1f} {r['pss_per_worker_mb']:>14.1f} "
+                  f"{r['pss_total_mb']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
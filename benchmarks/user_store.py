@@ -0,0 +1,118 @@
+# benchmarks/user_store.py
+"""
+Profile-read throughput with the blocking firebase_admin path vs. the
+async user store, under the same simulated round-trip latency.
+
+  threadpool  sync handler on Starlette's 40-thread pool calling
+              fetch_user_profile() (which fans out on its own 16-thread pool)
+  async       async handler awaiting fetch_user_profile_async() over an
+              InMemoryUserStore with the same latency
+
+No network is involved; --latency-ms stands in for the RTDB round trip.
+
+    python -m benchmarks.user_store --requests 2000 --latency-ms 40
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from user_profile import fetch_user_profile, fetch_user_profile_async
+from user_store import InMemoryUserStore
+
+STARLETTE_THREADPOOL = 40
+
+
+def _users(n: int) -> dict:
+    return {
+        f"u{i}": {
+            "farmDetails": {"cropName": "Maize", "district": "Mysuru"},
+            "secondaryCrops": {"cotton": {"activityLogs": {}}},
+        }
+        for i in range(n)
+    }
+
+
+class _BlockingRef:
+    def __init__(self, store: InMemoryUserStore, path: str, latency: float):
+        self.store, self.path, self.latency = store, path, latency
+
+    def get(self, shallow: bool = False):
+        time.sleep(self.latency)
+        return asyncio.run(self.store.get(self.path, shallow=shallow))
+
+
+class _BlockingDB:
+    """Mimics firebase_admin.db: reference(path).get() blocks for one round trip."""
+
+    def __init__(self, store: InMemoryUserStore, latency: float):
+        self.store, self.latency = store, latency
+
+    def reference(self, path: str):
+        return _BlockingRef(self.store, path, self.latency)
+
+
+def _report(name: str, latencies, elapsed: float):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:<12} {len(latencies) / elapsed:>10.0f} req/s   "
+          f"p50 {statistics.median(latencies) * 1000:>7.1f} ms   p99 {p99 * 1000:>7.1f} ms")
+
+
+def bench_threadpool(data: dict, args):
+    db = _BlockingDB(InMemoryUserStore(data), args.latency_ms / 1000.0)
+    pool = ThreadPoolExecutor(max_workers=STARLETTE_THREADPOOL)
+
+    def handler(user_id):
+        start = time.perf_counter()
+        fetch_user_profile(db, user_id)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = list(pool.map(handler, (f"u{i % args.users}" for i in range(args.requests))))
+    _report("threadpool", latencies, time.perf_counter() - start)
+    pool.shutdown()
+
+
+def bench_async(data: dict, args):
+    store = InMemoryUserStore(data, latency_ms=args.latency_ms)
+
+    async def handler(user_id):
+        start = time.perf_counter()
+        await fetch_user_profile_async(store, user_id)
+        return time.perf_counter() - start
+
+    async def run():
+        # Same number of requests in flight as the server would accept
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def bounded(user_id):
+            async with sem:
+                return await handler(user_id)
+
+        return await asyncio.gather(*(bounded(f"u{i % args.users}") for i in range(args.requests)))
+
+    start = time.perf_counter()
+    latencies = asyncio.run(run())
+    _report("async", latencies, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--concurrency", type=int, default=200,
+                        help="in-flight requests for the async handler")
+    args = parser.parse_args()
+
+    data = {"Users": _users(args.users)}
+    print(f"{args.requests} profile reads, {args.latency_ms:.0f} ms simulated round trip\n")
+    bench_threadpool(data, args)
+    bench_async(data, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# build_translation_catalog.py
+"""
+Build the pre-translated advice catalog at deploy time.
+
+Steps:
+1. Provide Cloud Translate credentials (GOOGLE_TRANSLATE_KEY env or google_translate_key.json)
+2. Run: python build_translation_catalog.py --langs kn
+3. It will create translation_catalog.json in project root; the server
+   loads it at startup and serves those strings with no network calls.
+
+Re-run whenever advice text changes or the server logs "[Catalog] Miss".
+"""
+
+import argparse
+
+from google_translate import translate_many, _translate_many_upstream
+from translation_client import TranslationClient
+from translation_catalog import build_catalog, DEFAULT_CATALOG_PATH, SUPPORTED_LANGUAGES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build translation_catalog.json")
+    parser.add_argument("--langs", default=",".join(SUPPORTED_LANGUAGES),
+                        help="comma-separated target languages")
+    parser.add_argument("--out", default=DEFAULT_CATALOG_PATH)
+    args = parser.parse_args()
+
+    langs = [l.strip() for l in args.langs.split(",") if l.strip()]
+    # Offline build: no request SLO, so give the upstream generous limits
+    client = TranslationClient(_translate_many_upstream, budget_ms=600000, slow_ms=600000)
+    data = build_catalog(
+        lambda texts, lang: translate_many(texts, lang, use_catalog=False, client=client),
+        langs=langs,
+        path=args.out,
+    )
+
+    for lang in langs:
+        done = sum(1 for v in data["translations"][lang] if v)
+        print(f"{lang}: {done}/{len(data['strings'])} strings translated")
+    print(f"Saved catalog version {data['version']} to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+# crop_lattice.py
+"""
+Precomputed recommendation lattice for NewCropAdvisor.
+
+The new-crop feature vector is [N, P, K, temperature, humidity, ph, rainfall],
+but N, P, K, ph and humidity all come from the soil profile table. So the
+only free inputs are (soil profile, temperature, rainfall). The lattice
+evaluates the model once over a temp x rainfall grid for every soil profile
+and answers lookups from that table (nearest grid point or bilinear
+interpolation) instead of running the forest per request. Lookups clamp
+to the grid edge, so NewCropAdvisor checks in_bounds() first and scores
+rows outside the grid (e.g. rainfall above 4000 mm) with the model.
+
+Build at startup through NewCropAdvisor(use_lattice=True), or ahead of time:
+
+    python crop_lattice.py --temp-step 0.5 --rain-step 10
+
+A saved lattice records the hash of the model file it was built from and
+its grid steps; NewCropAdvisor rebuilds it when either, the classes or the
+soil profiles no longer match (see stale_reason()).
+"""
+
+import argparse
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_TEMP_BOUNDS = (0.0, 50.0)
+DEFAULT_RAIN_BOUNDS = (0.0, 4000.0)
+DEFAULT_TEMP_STEP = 0.5
+DEFAULT_RAIN_STEP = 10.0
+DEFAULT_LATTICE_PATH = "new_crop_lattice.npz"
+
+# Key under which the fallback profile (unknown soil types) is stored
+DEFAULT_PROFILE_KEY = ""
+
+
+def _axis(bounds: Tuple[float, float], step: float) -> np.ndarray:
+    lo, hi = float(bounds[0]), float(bounds[1])
+    if step <= 0 or hi <= lo:
+        raise ValueError(f"Invalid lattice axis: bounds={bounds}, step={step}")
+    n = int(np.ceil((hi - lo) / step)) + 1
+    return lo + step * np.arange(max(n, 2), dtype=np.float64)
+
+
+class RecommendationLattice:
+    """
+    Class-probability table of shape (n_profiles, n_temp, n_rain, n_classes).
+
+    `max_deviation` is the largest absolute probability difference seen
+    between the lattice and the exact model on random in-bounds samples.
+    `model_version` is the file_version() of the model it was built from.
+    """
+
+    def __init__(
+        self,
+        classes: Sequence[Any],
+        profile_keys: Sequence[str],
+        temp_axis: np.ndarray,
+        rain_axis: np.ndarray,
+        table: np.ndarray,
+        interpolate: bool = True,
+        max_deviation: Optional[float] = None,
+        model_version: Optional[str] = None,
+    ):
+        self.classes_ = np.asarray(classes)
+        self.profile_keys = list(profile_keys)
+        self.profile_index = {k: i for i, k in enumerate(self.profile_keys)}
+        self.temp_axis = np.asarray(temp_axis, dtype=np.float64)
+        self.rain_axis = np.asarray(rain_axis, dtype=np.float64)
+        self.table = np.ascontiguousarray(table, dtype=np.float32)
+        self.interpolate = interpolate
+        self.max_deviation = max_deviation
+        self.model_version = model_version
+
+        self._t0 = float(self.temp_axis[0])
+        self._t_step = float(self.temp_axis[1] - self.temp_axis[0])
+        self._r0 = float(self.rain_axis[0])
+        self._r_step = float(self.rain_axis[1] - self.rain_axis[0])
+
+    # ---------------- build ----------------
+
+    @classmethod
+    def build(
+        cls,
+        predict_proba: Callable[[np.ndarray], np.ndarray],
+        classes: Sequence[Any],
+        profiles: Dict[str, Dict[str, float]],
+        default_profile: Dict[str, float],
+        temp_step: float = DEFAULT_TEMP_STEP,
+        rain_step: float = DEFAULT_RAIN_STEP,
+        temp_bounds: Tuple[float, float] = DEFAULT_TEMP_BOUNDS,
+        rain_bounds: Tuple[float, float] = DEFAULT_RAIN_BOUNDS,
+        interpolate: bool = True,
+        deviation_samples: int = 5000,
+        model_version: Optional[str] = None,
+    ) -> "RecommendationLattice":
+        temp_axis = _axis(temp_bounds, temp_step)
+        rain_axis = _axis(rain_bounds, rain_step)
+
+        all_profiles = dict(profiles)
+        all_profiles[DEFAULT_PROFILE_KEY] = default_profile
+        keys = list(all_profiles)
+
+        tt, rr = np.meshgrid(temp_axis, rain_axis, indexing="ij")
+        n_cells = tt.size
+
+        blocks = []
+        for key in keys:
+            X = _profile_rows(all_profiles[key], tt.ravel(), rr.ravel())
+            blocks.append(predict_proba(X))
+
+        n_classes = len(classes)
+        table = np.stack(blocks).reshape(len(keys), len(temp_axis), len(rain_axis), n_classes)
+
+        lattice = cls(
+            classes, keys, temp_axis, rain_axis, table,
+            interpolate=interpolate, model_version=model_version,
+        )
+        if deviation_samples > 0:
+            lattice.max_deviation = lattice.measure_deviation(
+                predict_proba, all_profiles, n_samples=deviation_samples
+            )
+
+        print(
+            f"[Lattice] Built {len(keys)}x{len(temp_axis)}x{len(rain_axis)} grid "
+            f"({n_cells * len(keys)} forest rows); max deviation from model: "
+            f"{lattice.max_deviation}"
+        )
+        return lattice
+
+    def measure_deviation(
+        self,
+        predict_proba: Callable[[np.ndarray], np.ndarray],
+        profiles: Dict[str, Dict[str, float]],
+        n_samples: int = 5000,
+        seed: int = 0,
+    ) -> float:
+        """Max |lattice - model| over random in-bounds (soil, temp, rain) samples."""
+        rng = np.random.default_rng(seed)
+        temps = rng.uniform(self.temp_axis[0], self.temp_axis[-1], n_samples)
+        rains = rng.uniform(self.rain_axis[0], self.rain_axis[-1], n_samples)
+        keys = [k for k in self.profile_keys if k in profiles]
+        picks = rng.integers(0, len(keys), n_samples)
+
+        worst = 0.0
+        for i, key in enumerate(keys):
+            mask = picks == i
+            if not mask.any():
+                continue
+            X = _profile_rows(profiles[key], temps[mask], rains[mask])
+            exact = predict_proba(X)
+            approx = self.lookup_many(
+                np.full(mask.sum(), self.profile_index[key]), temps[mask], rains[mask]
+            )
+            worst = max(worst, float(np.abs(exact - approx).max()))
+        return worst
+
+    # ---------------- lookup ----------------
+
+    def profile_idx(self, soil_type: str) -> int:
+        return self.profile_index.get(soil_type, self.profile_index[DEFAULT_PROFILE_KEY])
+
+    def in_bounds(self, temps: np.ndarray, rains: np.ndarray) -> np.ndarray:
+        """True where (temperature, rainfall) lies on the grid; lookups elsewhere are clamped."""
+        temps = np.asarray(temps, dtype=np.float64)
+        rains = np.asarray(rains, dtype=np.float64)
+        return (
+            (temps >= self.temp_axis[0]) & (temps <= self.temp_axis[-1])
+            & (rains >= self.rain_axis[0]) & (rains <= self.rain_axis[-1])
+        )
+
+    def lookup_many(self, profile_idx: np.ndarray, temps: np.ndarray, rains: np.ndarray) -> np.ndarray:
+        """Probability rows for arrays of (profile index, temperature, rainfall)."""
+        n_t = len(self.temp_axis)
+        n_r = len(self.rain_axis)
+        t = np.clip((np.asarray(temps, dtype=np.float64) - self._t0) / self._t_step, 0, n_t - 1)
+        r = np.clip((np.asarray(rains, dtype=np.float64) - self._r0) / self._r_step, 0, n_r - 1)
+        s = np.asarray(profile_idx, dtype=np.intp)
+
+        if not self.interpolate:
+            return self.table[s, np.floor(t + 0.5).astype(np.intp), np.floor(r + 0.5).astype(np.intp)]
+
+        i0 = np.minimum(t.astype(np.intp), n_t - 2)
+        j0 = np.minimum(r.astype(np.intp), n_r - 2)
+        ft = (t - i0)[:, None]
+        fr = (r - j0)[:, None]
+
+        tab = self.table
+        return (
+            tab[s, i0, j0] * (1 - ft) * (1 - fr)
+            + tab[s, i0 + 1, j0] * ft * (1 - fr)
+            + tab[s, i0, j0 + 1] * (1 - ft) * fr
+            + tab[s, i0 + 1, j0 + 1] * ft * fr
+        )
+
+    def lookup(self, soil_type: str, temp: float, rain: float) -> np.ndarray:
+        """Single-row lookup; plain index arithmetic to skip array setup cost."""
+        s = self.profile_idx(soil_type)
+        n_t = len(self.temp_axis)
+        n_r = len(self.rain_axis)
+        t = min(max((temp - self._t0) / self._t_step, 0.0), n_t - 1.0)
+        r = min(max((rain - self._r0) / self._r_step, 0.0), n_r - 1.0)
+
+        if not self.interpolate:
+            return self.table[s, int(t + 0.5), int(r + 0.5)]
+
+        i0 = min(int(t), n_t - 2)
+        j0 = min(int(r), n_r - 2)
+        ft = t - i0
+        fr = r - j0
+        cell = self.table[s, i0:i0 + 2, j0:j0 + 2]
+        return (
+            cell[0, 0] * ((1 - ft) * (1 - fr))
+            + cell[1, 0] * (ft * (1 - fr))
+            + cell[0, 1] * ((1 - ft) * fr)
+            + cell[1, 1] * (ft * fr)
+        )
+
+    # ---------------- persistence ----------------
+
+    def save(self, path: str = DEFAULT_LATTICE_PATH):
+        np.savez(
+            path,
+            classes=self.classes_.astype(str),
+            profile_keys=np.array(self.profile_keys, dtype=str),
+            temp_axis=self.temp_axis,
+            rain_axis=self.rain_axis,
+            temp_step=np.array(self._t_step),
+            rain_step=np.array(self._r_step),
+            model_version=np.array(self.model_version or ""),
+            table=self.table,
+            interpolate=np.array(self.interpolate),
+            max_deviation=np.array(np.nan if self.max_deviation is None else self.max_deviation),
+        )
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_LATTICE_PATH) -> "RecommendationLattice":
+        with np.load(path) as data:
+            max_dev = float(data["max_deviation"])
+            # Lattices saved before model_version was recorded load as unversioned
+            version = str(data["model_version"]) if "model_version" in data.files else ""
+            return cls(
+                classes=data["classes"],
+                profile_keys=[str(k) for k in data["profile_keys"]],
+                temp_axis=data["temp_axis"],
+                rain_axis=data["rain_axis"],
+                table=data["table"],
+                interpolate=bool(data["interpolate"]),
+                max_deviation=None if np.isnan(max_dev) else max_dev,
+                model_version=version or None,
+            )
+
+    def stale_reason(
+        self,
+        model_version: Optional[str],
+        classes: Sequence[Any],
+        profile_keys: Sequence[str],
+        temp_step: float,
+        rain_step: float,
+    ) -> Optional[str]:
+        """Why this lattice doesn't answer for the given model and grid; None if it does."""
+        if self.model_version is None or self.model_version != model_version:
+            return f"built from model {self.model_version}, model is {model_version}"
+        if not np.array_equal(self.classes_.astype(str), np.asarray(classes).astype(str)):
+            return "model classes differ"
+        if set(self.profile_keys) != set(profile_keys):
+            return "soil profiles differ"
+        if not (np.isclose(self._t_step, temp_step) and np.isclose(self._r_step, rain_step)):
+            return (f"grid steps {self._t_step}/{self._r_step}, "
+                    f"configured {float(temp_step)}/{float(rain_step)}")
+        return None
+
+
+def _profile_rows(profile: Dict[str, float], temps: np.ndarray, rains: np.ndarray) -> np.ndarray:
+    """Feature rows [N, P, K, temperature, humidity, ph, rainfall] for one soil profile."""
+    n = len(temps)
+    X = np.empty((n, 7), dtype=np.float64)
+    X[:, 0] = profile["N"]
+    X[:, 1] = profile["P"]
+    X[:, 2] = profile["K"]
+    X[:, 3] = temps
+    X[:, 4] = profile["humidity"]
+    X[:, 5] = profile["ph"]
+    X[:, 6] = rains
+    return X
+
+
+def main(argv: Optional[List[str]] = None):
+    from ml_advisor import NewCropAdvisor
+
+    parser = argparse.ArgumentParser(description="Build the new-crop recommendation lattice.")
+    parser.add_argument("--model", default="new_crop_model.pkl")
+    parser.add_argument("--out", default=DEFAULT_LATTICE_PATH)
+    parser.add_argument("--temp-step", type=float, default=DEFAULT_TEMP_STEP)
+    parser.add_argument("--rain-step", type=float, default=DEFAULT_RAIN_STEP)
+    parser.add_argument("--nearest", action="store_true", help="nearest grid point instead of bilinear")
+    args = parser.parse_args(argv)
+
+    advisor = NewCropAdvisor(model_path=args.model)
+    if not advisor.model_available:
+        raise SystemExit(f"Model not found at {args.model}")
+
+    lattice = advisor.build_lattice(
+        temp_step=args.temp_step, rain_step=args.rain_step, interpolate=not args.nearest
+    )
+    lattice.save(args.out)
+    print(f"Saved lattice to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
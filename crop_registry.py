@@ -0,0 +1,185 @@
+# crop_registry.py
+"""
+Crop registry: the Karnataka crop facts used by the advisory, in one table.
+
+Every crop gets an integer id once, at import. Names and aliases (paddy /
+rice, arecanut / areca nut, the new-crop model's labels) resolve to that id
+through one dict lookup. A crop's facts are one CropFacts row per id (None
+where unknown), and district / soil membership are int bitsets over the
+ids. Ranking a recommendation is then one name lookup, a row and two bit
+tests, instead of string lookups across parallel dicts and `in list` scans.
+The facts are plain values, not NumPy columns: a request ranks about six
+crops, and gathering that few values from arrays costs more than reading
+the tuples (see benchmarks/crop_registry.py).
+
+Unknown names map to an extra id past the last crop: no facts and in no
+district or soil, so callers don't have to special-case them.
+"""
+
+import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# price: Karnataka mandi average ₹/quintal (2024–25), cost: cultivation cost
+# ₹/acre, yield: quintals/acre, temp (°C) and rainfall (mm): suitable ranges
+KARNATAKA_CROPS: Dict[str, dict] = {
+    "areca nut": {"kn": "ಅಡಿಕೆ", "price": 58000, "cost": 60000, "yield": 10, "temp": (18, 32), "rainfall": (2000, 3500)},
+    "pepper": {"kn": "ಮೆಣಸು", "price": 64000, "cost": 50000, "yield": 3, "temp": (20, 30), "rainfall": (2000, 3000)},
+    "paddy": {"kn": "ಅಕ್ಕಿ", "price": 3300, "cost": 38000, "yield": 22, "temp": (18, 38), "rainfall": (900, 2500)},
+    "sugarcane": {"kn": "ಕಬ್ಬು", "price": 3600, "cost": 78000, "yield": 40, "temp": (20, 35), "rainfall": (1100, 2200)},
+    "maize": {"kn": "ಮೆಕ್ಕೆಜೋಳ", "price": 2300, "cost": 27000, "yield": 18, "temp": (20, 32), "rainfall": (500, 900)},
+    "banana": {"kn": "ಬಾಳೆ", "price": 1700, "cost": 95000, "yield": 35, "temp": (15, 35), "rainfall": (1100, 3000)},
+    "ginger": {"kn": "ಶುಂಠಿ", "price": 8800, "cost": 105000, "yield": 65},
+    "turmeric": {"kn": "ಅರಿಶಿನ", "price": 7600, "cost": 90000, "yield": 55, "temp": (20, 30), "rainfall": (900, 1800)},
+    "soybean": {"kn": "ಸೋಯಾಬೀನ್", "price": 4700, "cost": 25000, "yield": 7, "temp": (20, 32), "rainfall": (700, 1200)},
+    "cotton": {"kn": "ಹತ್ತಿ", "price": 6400, "cost": 52000, "yield": 5, "temp": (22, 32), "rainfall": (600, 1200)},
+    "groundnut": {"kn": "ಶೇಂಗಾ", "price": 6400, "cost": 30000, "yield": 9, "temp": (20, 36), "rainfall": (500, 1200)},
+    "ragi": {"kn": "ರಾಗಿ", "price": 3300, "cost": 22000, "yield": 10},
+    "coffee": {"kn": "ಕಾಫಿ", "price": 23500, "cost": 120000, "yield": 7, "temp": (15, 28), "rainfall": (1800, 3000)},
+    "sunflower": {"kn": "ಸೂರ್ಯಕಾಂತಿ", "price": 6200, "cost": 24000, "yield": 6},
+    "chilli": {"kn": "ಮೆಣಸಿನಕಾಯಿ", "price": 11200, "cost": 92000, "yield": 30},
+    "tomato": {"kn": "ಟೊಮ್ಯಾಟೊ", "price": 1300, "cost": 45000, "yield": 100},
+    "potato": {"kn": "ಆಲೂಗಡ್ಡೆ", "price": 1200, "cost": 50000, "yield": 75},
+    "onion": {"kn": "ಈರುಳ್ಳಿ", "price": 1500, "cost": 38000, "yield": 80},
+    "pomegranate": {"kn": "ದಾಳಿಂಬೆ", "price": 7500, "cost": 90000, "yield": 30},
+    "mango": {"kn": "ಮಾವು", "price": 3200, "cost": 65000, "yield": 55},
+    "grapes": {"kn": "ದ್ರಾಕ್ಷಿ", "price": 3800, "cost": 100000, "yield": 60},
+    "black gram": {"kn": "ಉದ್ದಿನಬೇಳೆ", "price": 7600, "cost": 24000, "yield": 5},
+    "green gram": {"kn": "ಹೇಶರು", "price": 7200, "cost": 22000, "yield": 5},
+    "pigeon pea": {"kn": "ತೊಗರಿ", "price": 6900, "cost": 26000, "yield": 6},
+    # Yield only (yield prediction)
+    "wheat": {"yield": 16},
+    "jowar": {"yield": 12},
+    "chickpea": {"yield": 7},
+}
+
+# alias -> crop; includes the new-crop model's labels for the same crops
+CROP_ALIASES: Dict[str, str] = {
+    "rice": "paddy",
+    "arecanut": "areca nut",
+    "pigeonpeas": "pigeon pea",
+    "blackgram": "black gram",
+    "mungbean": "green gram",
+}
+
+DISTRICT_CROPS: Dict[str, List[str]] = {
+    "uttara kannada": ["areca nut", "pepper", "paddy", "banana", "turmeric"],
+    "belagavi": ["sugarcane", "soybean", "maize", "paddy", "wheat"],
+    "shivamogga": ["areca nut", "pepper", "paddy", "banana", "ginger"],
+    "dharwad": ["soybean", "cotton", "maize", "groundnut", "paddy", "sunflower"],
+    "haveri": ["cotton", "chilli", "maize", "paddy", "jowar"],
+    "ballari": ["pomegranate", "groundnut", "sunflower", "paddy", "cotton"],
+    "chikkamagaluru": ["coffee", "pepper", "areca nut", "paddy", "banana"],
+    "mysuru": ["cotton", "ragi", "paddy", "groundnut", "sugarcane"],
+    "mandya": ["sugarcane", "paddy", "mulberry", "banana"],
+    "tumakuru": ["ragi", "groundnut", "pigeon pea", "paddy", "tomato"],
+}
+
+SOIL_CROPS: Dict[str, List[str]] = {
+    "red soil": ["areca nut", "pepper", "cotton", "groundnut", "ragi", "paddy"],
+    "black soil": ["cotton", "soybean", "turmeric", "paddy", "banana"],
+    "laterite": ["areca nut", "pepper", "coffee", "banana"],
+    "alluvial": ["paddy", "sugarcane", "banana", "vegetables"],
+    "sandy": ["groundnut", "onion", "melon", "cucumber"],
+}
+
+# CropFacts field -> (fact, index into its (min, max) range or None)
+FACT_FIELDS: Dict[str, Tuple[str, Optional[int]]] = {
+    "price": ("price", None),
+    "cost": ("cost", None),
+    "yield_per_acre": ("yield", None),
+    "temp_min": ("temp", 0),
+    "temp_max": ("temp", 1),
+    "rainfall_min": ("rainfall", 0),
+    "rainfall_max": ("rainfall", 1),
+}
+
+
+class CropFacts(NamedTuple):
+    """One registry row; None where the fact is unknown."""
+    id: int
+    name: Optional[str]
+    kannada: Optional[str]
+    price: Optional[float]
+    cost: Optional[float]
+    yield_per_acre: Optional[float]
+    temp_min: Optional[float]
+    temp_max: Optional[float]
+    rainfall_min: Optional[float]
+    rainfall_max: Optional[float]
+
+
+def _key(name: str) -> str:
+    return name.lower().strip()
+
+
+class CropRegistry:
+
+    def __init__(
+        self,
+        crops: Dict[str, dict],
+        aliases: Dict[str, str],
+        districts: Dict[str, List[str]],
+        soils: Dict[str, List[str]],
+    ):
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+        def intern(name) -> int:
+            key = _key(aliases.get(_key(name), name))
+            if key not in self._ids:
+                self._ids[sys.intern(key)] = len(self.names)
+                self.names.append(key)
+            return self._ids[key]
+
+        for name in crops:
+            intern(name)
+        # Crops only named in a district or soil list still get an id
+        district_ids = {d: [intern(c) for c in members] for d, members in districts.items()}
+        soil_ids = {s: [intern(c) for c in members] for s, members in soils.items()}
+        for alias, name in aliases.items():
+            self._ids[sys.intern(_key(alias))] = intern(name)
+
+        self.unknown = len(self.names)
+        size = self.unknown + 1
+
+        facts_by_id: List[dict] = [{} for _ in range(size)]
+        for name, facts in crops.items():
+            facts_by_id[self._ids[_key(name)]] = facts
+
+        def value(facts, fact, i):
+            if fact not in facts:
+                return None
+            return facts[fact] if i is None else facts[fact][i]
+
+        names = self.names + [None]
+        self._rows: List[CropFacts] = [
+            CropFacts(
+                crop_id, names[crop_id], facts.get("kn"),
+                *(value(facts, fact, i) for fact, i in FACT_FIELDS.values()),
+            )
+            for crop_id, facts in enumerate(facts_by_id)
+        ]
+
+        # Membership bitsets: bit i set <=> crop id i is listed
+        def bitset(ids) -> int:
+            bits = 0
+            for i in ids:
+                bits |= 1 << i
+            return bits
+
+        self._districts = {_key(d): bitset(ids) for d, ids in district_ids.items()}
+        self._soils = {_key(s): bitset(ids) for s, ids in soil_ids.items()}
+
+    def lookup(self, name: str) -> CropFacts:
+        """The crop's row; the `unknown` row (no facts, no memberships) if it isn't in the registry."""
+        return self._rows[self._ids.get(_key(name), self.unknown)]
+
+    def district_bits(self, district: str) -> int:
+        """Bitset of the crops grown in `district` (0 if unknown): test with `bits >> crop_id & 1`."""
+        return self._districts.get(_key(district), 0)
+
+    def soil_bits(self, soil: str) -> int:
+        return self._soils.get(_key(soil), 0)
+
+
+CROP_REGISTRY = CropRegistry(KARNATAKA_CROPS, CROP_ALIASES, DISTRICT_CROPS, SOIL_CROPS)
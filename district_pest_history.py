@@ -1,279 +1,11 @@
-PEST_HISTORY = {
+# district_pest_history.py
+"""
+Recorded outbreaks, district -> crop -> pest -> score (0-1).
 
-    # ================= NORTH KARNATAKA =================
-    "ballari": {
-        "cotton": {
-            "Pink Bollworm": 0.9,
-            "Whitefly & Viral Complex": 0.7
-        },
-        "groundnut": {
-            "Leaf Spot & Rust": 0.6
-        }
-    },
+The data lives in pest_knowledge.jsonl (see pest_kb.py). PEST_HISTORY is a
+read-only mapping over the current knowledge base that follows hot reloads.
+"""
 
-    "belagavi": {
-        "sugarcane": {
-            "Early Shoot Borer": 0.7,
-            "Red Rot": 0.6
-        },
-        "soybean": {
-            "Stem Fly": 0.6
-        }
-    },
+from pest_kb import get_knowledge_store
 
-    "dharwad": {
-        "cotton": {
-            "Pink Bollworm": 0.7
-        },
-        "maize": {
-            "Fall Armyworm": 0.8
-        }
-    },
-
-    "haveri": {
-        "chilli": {
-            "Thrips & Mite Complex": 0.8
-        },
-        "maize": {
-            "Stem Borer": 0.6
-        }
-    },
-
-    "koppal": {
-        "cotton": {
-            "Pink Bollworm": 0.8
-        },
-        "paddy": {
-            "Brown Planthopper": 0.7
-        }
-    },
-
-    "raichur": {
-        "paddy": {
-            "Brown Planthopper": 0.8,
-            "Blast Disease": 0.6
-        },
-        "cotton": {
-            "Whitefly & Viral Complex": 0.7
-        }
-    },
-
-    "yadgir": {
-        "paddy": {
-            "Blast Disease": 0.7
-        },
-        "cotton": {
-            "Pink Bollworm": 0.6
-        }
-    },
-
-    "kalaburagi": {
-        "pigeon pea": {
-            "Pod Borer": 0.7
-        },
-        "cotton": {
-            "Pink Bollworm": 0.6
-        }
-    },
-
-    "bidar": {
-        "soybean": {
-            "Stem Fly": 0.7
-        },
-        "paddy": {
-            "Blast Disease": 0.6
-        }
-    },
-
-    "vijayapura": {
-        "grapes": {
-            "Downy Mildew": 0.8,
-            "Powdery Mildew": 0.7
-        },
-        "pomegranate": {
-            "Bacterial Blight": 0.7
-        }
-    },
-
-    "bagalkote": {
-        "pomegranate": {
-            "Bacterial Blight": 0.8
-        },
-        "maize": {
-            "Fall Armyworm": 0.6
-        }
-    },
-
-    "gadag": {
-        "groundnut": {
-            "Leaf Spot & Rust": 0.7
-        },
-        "cotton": {
-            "Pink Bollworm": 0.6
-        }
-    },
-
-    # ================= CENTRAL KARNATAKA =================
-    "davangere": {
-        "maize": {
-            "Fall Armyworm": 0.8
-        },
-        "cotton": {
-            "Pink Bollworm": 0.6
-        }
-    },
-
-    "chitradurga": {
-        "ragi": {
-            "Blast Disease": 0.7
-        },
-        "groundnut": {
-            "Leaf Spot & Rust": 0.6
-        }
-    },
-
-    "tumakuru": {
-        "ragi": {
-            "Blast Disease": 0.7
-        },
-        "tomato": {
-            "Leaf Curl Virus": 0.8
-        }
-    },
-
-    "chikkaballapur": {
-        "tomato": {
-            "Leaf Curl Virus": 0.8
-        },
-        "groundnut": {
-            "Leaf Spot & Rust": 0.6
-        }
-    },
-
-    "bengaluru rural": {
-        "tomato": {
-            "Leaf Curl Virus": 0.8
-        },
-        "mulberry": {
-            "Leaf Spot": 0.6
-        }
-    },
-
-    "bengaluru urban": {
-        "vegetables": {
-            "Aphid Complex": 0.6
-        }
-    },
-
-    "ramanagara": {
-        "silk": {
-            "Uzi Fly": 0.7
-        },
-        "banana": {
-            "Sigatoka Leaf Spot": 0.6
-        }
-    },
-
-    "kolar": {
-        "tomato": {
-            "Leaf Curl Virus": 0.8
-        },
-        "beans": {
-            "Aphid Infestation": 0.6
-        }
-    },
-
-    # ================= MALNAD & COASTAL =================
-    "shivamogga": {
-        "areca nut": {
-            "Mite Infestation": 0.7,
-            "Yellow Leaf Disease": 0.6
-        },
-        "paddy": {
-            "Blast Disease": 0.6
-        }
-    },
-
-    "chikkamagaluru": {
-        "coffee": {
-            "Coffee Berry Borer": 0.8,
-            "Leaf Rust": 0.7
-        },
-        "areca nut": {
-            "Mite Infestation": 0.6
-        }
-    },
-
-    "uttara kannada": {
-        "areca nut": {
-            "Mite Infestation": 0.7
-        },
-        "pepper": {
-            "Quick Wilt": 0.6
-        }
-    },
-
-    "udupi": {
-        "paddy": {
-            "Blast Disease": 0.6
-        },
-        "coconut": {
-            "Rhinoceros Beetle": 0.7
-        }
-    },
-
-    "dakshina kannada": {
-        "areca nut": {
-            "Yellow Leaf Disease": 0.7
-        },
-        "paddy": {
-            "Brown Planthopper": 0.6
-        }
-    },
-
-    "kodagu": {
-        "coffee": {
-            "Coffee Berry Borer": 0.8
-        },
-        "pepper": {
-            "Quick Wilt": 0.6
-        }
-    },
-
-    # ================= SOUTH KARNATAKA =================
-    "mysuru": {
-        "paddy": {
-            "Brown Planthopper": 0.7
-        },
-        "cotton": {
-            "Whitefly & Viral Complex": 0.6
-        }
-    },
-
-    "mandya": {
-        "sugarcane": {
-            "Early Shoot Borer": 0.8
-        },
-        "paddy": {
-            "Blast Disease": 0.6
-        }
-    },
-
-    "hassan": {
-        "paddy": {
-            "Blast Disease": 0.6
-        },
-        "banana": {
-            "Sigatoka Leaf Spot": 0.7
-        }
-    },
-
-    "chamarajanagar": {
-        "ragi": {
-            "Blast Disease": 0.6
-        },
-        "cotton": {
-            "Pink Bollworm": 0.6
-        }
-    }
-}
+PEST_HISTORY = get_knowledge_store().district_history
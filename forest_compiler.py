@@ -0,0 +1,240 @@
+# forest_compiler.py
+"""
+Array-based evaluator for the new-crop model.
+
+new_crop_model.pkl is a Pipeline(StandardScaler -> RandomForestClassifier).
+For a single row, sklearn spends most of its time on input validation and
+per-tree dispatch. CompiledForest flattens every tree of the forest into
+contiguous NumPy arrays (feature, threshold, left, right, leaf value) and
+folds the scaler into the thresholds, so prediction is a fixed number of
+vectorized gathers over all (row, tree) pairs at once.
+
+    forest = CompiledForest.from_pipeline(joblib.load("new_crop_model.pkl"))
+    proba = forest.predict_proba(X)   # same as pipe.predict_proba(X)
+"""
+
+from typing import Any, Optional
+
+import numpy as np
+
+# Rows per traversal chunk; bounds the (rows x trees x classes) gather buffer
+CHUNK_ROWS = 256
+
+
+def _ordered_key(x: np.ndarray) -> np.ndarray:
+    """Map float64 to int64 so that integer order matches float order."""
+    bits = x.view(np.int64)
+    return np.where(bits < 0, -(bits & 0x7FFFFFFFFFFFFFFF), bits)
+
+
+def _from_ordered_key(key: np.ndarray) -> np.ndarray:
+    bits = np.where(key < 0, (-key) | np.int64(-0x8000000000000000), key)
+    return bits.astype(np.int64).view(np.float64)
+
+
+def _fold_thresholds(threshold: np.ndarray, feature: np.ndarray, scalers) -> np.ndarray:
+    """
+    Raw-feature split points equivalent to the fitted splits.
+
+    sklearn scales X in float64, casts it to float32 and then tests
+    `x32 <= threshold`. That test is monotone in the raw value, so for
+    every node there is a largest float64 x* that still goes left. It is
+    found by bisection over the ordered float64 bit patterns, which makes
+    `x <= x*` agree exactly with the pipeline instead of approximately
+    (the naive `t * scale + mean` flips leaves near float32 boundaries).
+    """
+
+    def goes_left(x):
+        z = x
+        for mean, scale in scalers:
+            z = (z - mean[feature]) / scale[feature]
+        return z.astype(np.float32) <= threshold
+
+    guess = threshold.astype(np.float64)
+    for mean, scale in reversed(scalers):
+        guess = guess * scale[feature] + mean[feature]
+
+    # float32 rounding moves the cut by ~2**-24 relative; 2**44 ulps is ample
+    span = np.int64(1) << np.int64(44)
+    lo = _ordered_key(guess) - span
+    hi = _ordered_key(guess) + span
+    if not (goes_left(_from_ordered_key(lo)).all() and not goes_left(_from_ordered_key(hi)).any()):
+        raise ValueError("Could not bracket folded thresholds")
+
+    # Invariant: lo goes left, hi goes right
+    while True:
+        gap = hi - lo
+        if (gap <= 1).all():
+            break
+        mid = lo + gap // 2
+        left = goes_left(_from_ordered_key(mid))
+        lo = np.where(left, mid, lo)
+        hi = np.where(left, hi, mid)
+
+    return _from_ordered_key(lo)
+
+
+class CompiledForest:
+    """
+    All trees of a forest stored as one flat node table.
+
+    Leaves point to themselves in `left`/`right` and carry +inf thresholds,
+    so traversal can run a fixed `max_depth` steps for every tree.
+    """
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        classes: np.ndarray,
+        n_features: int,
+        children: Optional[np.ndarray] = None,
+    ):
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.intp)
+        self.right = np.ascontiguousarray(right, dtype=np.intp)
+        self.value = np.ascontiguousarray(value, dtype=np.float32)
+        self.roots = np.ascontiguousarray(roots, dtype=np.intp)
+        self.max_depth = int(max_depth)
+        self.classes_ = np.asarray(classes)
+        self.n_features = int(n_features)
+        self.n_trees = len(self.roots)
+        # Interleaved [left, right] pairs: child of node i is children[2 * i + go_right]
+        if children is None:
+            children = np.stack([self.left, self.right], axis=1).ravel()
+        self.children = np.ascontiguousarray(children, dtype=np.intp)
+
+    # Node arrays, in the order to_arrays() / from_arrays() use
+    ARRAYS = ("feature", "threshold", "left", "right", "value", "roots", "children")
+
+    def to_arrays(self):
+        """(meta, arrays) for saving; from_arrays() takes them back without copying."""
+        meta = {
+            "maxDepth": self.max_depth,
+            "classes": [str(c) for c in self.classes_],
+            "nFeatures": self.n_features,
+        }
+        return meta, {name: getattr(self, name) for name in self.ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, meta: dict, arrays: dict) -> "CompiledForest":
+        # Arrays already in the right dtype (e.g. views of a memory map) are used in place
+        return cls(
+            **{name: arrays[name] for name in cls.ARRAYS},
+            max_depth=meta["maxDepth"],
+            classes=np.array(meta["classes"]),
+            n_features=meta["nFeatures"],
+        )
+
+    @classmethod
+    def from_pipeline(cls, model: Any) -> "CompiledForest":
+        """Compile a fitted Pipeline(StandardScaler, RandomForestClassifier) or a bare forest."""
+        steps = [s for _, s in model.steps] if hasattr(model, "steps") else [model]
+        *transforms, forest = steps
+
+        if not hasattr(forest, "estimators_"):
+            raise ValueError(f"Unsupported final estimator: {type(forest).__name__}")
+        if getattr(forest, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests are supported")
+
+        n_features = forest.n_features_in_
+        scalers = []
+        for step in transforms:
+            if type(step).__name__ != "StandardScaler":
+                raise ValueError(f"Unsupported pipeline step: {type(step).__name__}")
+            scalers.append((
+                step.mean_ if step.mean_ is not None else np.zeros(n_features),
+                step.scale_ if step.scale_ is not None else np.ones(n_features),
+            ))
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for est in forest.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(n)
+
+            feat = np.where(is_leaf, 0, tree.feature)
+            thr = np.full(n, np.inf)
+            thr[~is_leaf] = _fold_thresholds(tree.threshold[~is_leaf], feat[~is_leaf], scalers)
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+
+            val = tree.value[:, 0, :].astype(np.float64)
+            norm = val.sum(axis=1, keepdims=True)
+            norm[norm == 0] = 1.0
+
+            features.append(feat)
+            thresholds.append(thr)
+            lefts.append(left)
+            rights.append(right)
+            values.append(val / norm)
+            roots.append(offset)
+
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.array(roots),
+            max_depth=max_depth,
+            classes=forest.classes_,
+            n_features=n_features,
+        )
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node index per (row, tree), shape (n_rows, n_trees)."""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        n_rows = len(X)
+        # One flat slot per (row, tree); `base` is each slot's row offset into X.ravel()
+        base = np.repeat(np.arange(n_rows) * self.n_features, self.n_trees)
+        node = np.tile(self.roots, n_rows)
+        x_flat = X.ravel()
+
+        active = np.arange(len(node))
+        cur = node
+        for _ in range(self.max_depth):
+            feat = self.feature.take(cur)
+            go_right = x_flat.take(base.take(active) + feat) > self.threshold.take(cur)
+            cur = self.children.take(2 * cur + go_right)
+            node[active] = cur
+
+            # Drop slots that reached a leaf so deep trees don't keep the whole batch busy
+            moving = self.threshold.take(cur) != np.inf
+            if not moving.all():
+                active = active[moving]
+                cur = cur[moving]
+                if len(active) == 0:
+                    break
+
+        return node.reshape(n_rows, self.n_trees)
+
+    def predict_proba(self, X: np.ndarray, chunk_rows: Optional[int] = None) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(
+                f"Expected input of shape (n, {self.n_features}), got {X.shape}"
+            )
+
+        chunk_rows = chunk_rows or CHUNK_ROWS
+        out = np.empty((len(X), len(self.classes_)), dtype=np.float64)
+        for start in range(0, len(X), chunk_rows):
+            leaves = self.apply(X[start:start + chunk_rows])
+            out[start:start + chunk_rows] = self.value[leaves].mean(axis=1, dtype=np.float64)
+        return out
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
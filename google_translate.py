@@ -1,11 +1,22 @@
 # google_translate.py
 import os
 import json
+import asyncio
 
-from google.cloud import translate_v2 as translate
-from google.oauth2 import service_account
+from typing import Dict, List, Optional, Tuple
+
+from translation_cache import TranslationCache
+from translation_catalog import TranslationCatalog, DEFAULT_CATALOG_PATH
+from translation_client import TranslationClient
 
 _translate_client = None
+_translation_cache = None
+_translation_catalog = None
+_upstream_client = None
+
+# Cloud Translate v2 limits per request
+MAX_SEGMENTS_PER_REQUEST = 128
+MAX_CHARS_PER_REQUEST = 30000
 
 
 def _get_client():
@@ -13,6 +24,10 @@ def _get_client():
     if _translate_client is not None:
         return _translate_client
 
+    # The Cloud client libraries are slow to import; only pay for them on first use
+    from google.cloud import translate_v2 as translate
+    from google.oauth2 import service_account
+
     if "GOOGLE_TRANSLATE_KEY" in os.environ:
         key_json = json.loads(os.environ["GOOGLE_TRANSLATE_KEY"])
         credentials = service_account.Credentials.from_service_account_info(key_json)
@@ -31,14 +46,146 @@ def _get_client():
     return _translate_client
 
 
-def translate_text(text: str, target_lang: str) -> str:
+def get_translation_cache() -> TranslationCache:
+    global _translation_cache
+    if _translation_cache is None:
+        _translation_cache = TranslationCache.from_env()
+    return _translation_cache
+
+
+def translation_catalog_path() -> str:
+    return os.environ.get("TRANSLATION_CATALOG_PATH", DEFAULT_CATALOG_PATH)
+
+
+def get_translation_catalog() -> TranslationCatalog:
+    global _translation_catalog
+    if _translation_catalog is None:
+        _translation_catalog = TranslationCatalog.load(translation_catalog_path())
+    return _translation_catalog
+
+
+def translation_catalog_loaded() -> bool:
+    return _translation_catalog is not None
+
+
+def set_translation_catalog(catalog: TranslationCatalog):
+    """Use an already loaded catalog (e.g. from a warm snapshot) instead of reading the file."""
+    global _translation_catalog
+    _translation_catalog = catalog
+
+
+def get_upstream_client() -> TranslationClient:
+    """Deadline / concurrency / circuit-breaker wrapper around every upstream call."""
+    global _upstream_client
+    if _upstream_client is None:
+        _upstream_client = TranslationClient.from_env(_translate_many_upstream)
+    return _upstream_client
+
+
+def _chunks(texts: List[str]):
+    chunk, chars = [], 0
+    for text in texts:
+        if chunk and (len(chunk) >= MAX_SEGMENTS_PER_REQUEST
+                      or chars + len(text) > MAX_CHARS_PER_REQUEST):
+            yield chunk
+            chunk, chars = [], 0
+        chunk.append(text)
+        chars += len(text)
+    if chunk:
+        yield chunk
+
+
+def _translate_many_upstream(texts: List[str], target_lang: str) -> Dict[str, str]:
+    """Translate distinct texts in as few requests as the API allows; raises on upstream errors."""
     client = _get_client()
-    if client is None or not text:
-        return text
+    if client is None:
+        return {}
+
+    translated = {}
+    for chunk in _chunks(texts):
+        results = client.translate(chunk, target_language=target_lang)
+        for text, result in zip(chunk, results):
+            translated[text] = result["translatedText"]
+    return translated
+
+
+def _translate_upstream(text: str, target_lang: str) -> Optional[str]:
+    """Single-string upstream call; None when unavailable, failed or over budget."""
+    return get_upstream_client().translate([text], target_lang).get(text)
+
+
+def _resolve_locally(
+    texts: List[str], target_lang: str, use_catalog: bool
+) -> Tuple[Dict[str, str], List[str]]:
+    """Serve distinct texts from the catalog and cache; return (resolved, still missing)."""
+    catalog = get_translation_catalog() if use_catalog else None
+    cache = get_translation_cache()
+    resolved: Dict[str, str] = {}
+    missing = []
+
+    for text in dict.fromkeys(t for t in texts if t):
+        if catalog is not None:
+            localized = catalog.lookup(text, target_lang)
+            if localized is not None:
+                resolved[text] = localized
+                continue
+        cached = cache.get(text, target_lang)
+        if cached is not None:
+            resolved[text] = cached
+        else:
+            missing.append(text)
+
+    return resolved, missing
+
 
-    try:
-        result = client.translate(text, target_language=target_lang)
-        return result["translatedText"]
-    except Exception as e:
-        print("[Translate] Error while translating:", e)
+def _merge(texts: List[str], target_lang: str, resolved: Dict[str, str], fresh: Dict[str, str]) -> List[str]:
+    if fresh:
+        get_translation_cache().put_many(target_lang, fresh)
+        resolved.update(fresh)
+    # Anything still unresolved (timeout, error, open breaker) stays in English
+    return [resolved.get(t, t) if t else t for t in texts]
+
+
+def translate_text(text: str, target_lang: str) -> str:
+    if not text:
         return text
+    return translate_many([text], target_lang)[0]
+
+
+def translate_many(
+    texts: List[str],
+    target_lang: str,
+    use_catalog: bool = True,
+    deadline: Optional[float] = None,
+    client: Optional[TranslationClient] = None,
+) -> List[str]:
+    """
+    Translate a list of strings, returned in input order. Duplicates are
+    translated once; catalog and cached strings are served locally, and
+    the remaining ones go upstream in batched requests, bounded by the
+    request's latency budget (`deadline`, time.monotonic() based).
+    """
+    resolved, missing = _resolve_locally(texts, target_lang, use_catalog)
+    fresh = (client or get_upstream_client()).translate(missing, target_lang, deadline) if missing else {}
+    return _merge(texts, target_lang, resolved, fresh)
+
+
+async def translate_many_async(
+    texts: List[str],
+    target_lang: str,
+    deadline: Optional[float] = None,
+) -> List[str]:
+    """translate_many() for async handlers; never blocks the event loop on the network or SQLite."""
+    # Cache reads can hit the SQLite tier (and its busy timeout): run them in a worker thread
+    resolved, missing = await asyncio.to_thread(_resolve_locally, texts, target_lang, True)
+    if not missing:
+        return _merge(texts, target_lang, resolved, {})
+    fresh = await get_upstream_client().translate_async(missing, target_lang, deadline)
+    if not fresh:
+        return _merge(texts, target_lang, resolved, fresh)
+    return await asyncio.to_thread(_merge, texts, target_lang, resolved, fresh)
+
+
+def warm_translation_cache(texts, langs) -> int:
+    """Preload the cache for (text, lang) pairs, translating whatever is not on disk yet."""
+    return get_translation_cache().warm_up(texts, langs, _translate_upstream)
@@ -0,0 +1,91 @@
+# inference_runtime.py
+"""
+Serving-side thread control for model inference.
+
+train_new_crop_model.py pickles the forest with n_jobs=-1, so every
+predict_proba call would otherwise fan out joblib threads over all cores,
+in every uvicorn worker at once. InferenceRuntime pins the estimator to
+serial prediction, caps BLAS/OpenMP pools per worker, and only goes
+parallel (row chunks on a small thread pool) for batches large enough to
+amortize it.
+
+Configured from the environment:
+    INFERENCE_N_JOBS             threads for large batches (default 1 = always serial)
+    INFERENCE_BLAS_THREADS       BLAS/OpenMP threads per worker (default 1)
+    INFERENCE_PARALLEL_MIN_ROWS  batch size at which prediction goes parallel (default 2048)
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+# Env vars read by OpenBLAS / MKL / OpenMP when they first load; setting
+# them here covers libraries imported after this module and child processes.
+_THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+
+class InferenceRuntime:
+
+    def __init__(
+        self,
+        n_jobs: int = 1,
+        blas_threads: int = 1,
+        parallel_min_rows: int = 2048,
+    ):
+        if n_jobs == -1:
+            n_jobs = os.cpu_count() or 1
+        self.n_jobs = max(1, int(n_jobs))
+        self.blas_threads = max(1, int(blas_threads))
+        self.parallel_min_rows = max(1, int(parallel_min_rows))
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._limiter = None
+
+    @classmethod
+    def from_env(cls) -> "InferenceRuntime":
+        return cls(
+            n_jobs=int(os.environ.get("INFERENCE_N_JOBS", 1)),
+            blas_threads=int(os.environ.get("INFERENCE_BLAS_THREADS", 1)),
+            parallel_min_rows=int(os.environ.get("INFERENCE_PARALLEL_MIN_ROWS", 2048)),
+        )
+
+    def configure(self, model: Any):
+        """Pin the model to serial prediction and cap native thread pools for this worker."""
+        for var in _THREAD_ENV_VARS:
+            os.environ.setdefault(var, str(self.blas_threads))
+
+        try:
+            from threadpoolctl import threadpool_limits
+            self._limiter = threadpool_limits(limits=self.blas_threads)
+        except ImportError:
+            print("[Inference] threadpoolctl not installed; relying on thread env vars only.")
+
+        estimator = model.steps[-1][1] if hasattr(model, "steps") else model
+        if hasattr(estimator, "n_jobs"):
+            estimator.n_jobs = 1
+
+    def predict(self, predict_fn: Callable[[np.ndarray], np.ndarray], X: np.ndarray) -> np.ndarray:
+        """Serial for small batches; row chunks across the thread pool for large ones."""
+        if self.n_jobs == 1 or len(X) < self.parallel_min_rows:
+            return predict_fn(X)
+
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.n_jobs, thread_name_prefix="inference"
+            )
+        chunks = np.array_split(X, self.n_jobs)
+        return np.vstack(list(self._pool.map(predict_fn, chunks)))
+
+    def stats(self) -> dict:
+        return {
+            "nJobs": self.n_jobs,
+            "blasThreads": self.blas_threads,
+            "parallelMinRows": self.parallel_min_rows,
+        }
@@ -1,604 +1,995 @@
-import firebase_admin
-import os
-import json
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict, Optional
-from ml_advisor import NewCropAdvisor, ExistingCropAdvisor
-from google_translate import translate_text
-from datetime import datetime
-from pest_engine import PestEngine
-from pest_db_extended import PEST_DB
-from district_pest_history import PEST_HISTORY
-from typing import List
-from firebase_admin import credentials, db
-from yield_predioctor import YieldPredictor
-from utils.crop_utils import extract_crop_name
-
-
-firebase_credentials = json.loads(os.environ["FIREBASE_CREDENTIALS"])
-firebase_db_url = os.environ["FIREBASE_DB_URL"]
-
-# --------------------------------------------------
-# Firebase Init
-# --------------------------------------------------
-cred = credentials.Certificate(json.loads(os.environ["FIREBASE_CREDENTIALS"]))
-if not firebase_admin._apps:
-    firebase_admin.initialize_app(cred, {
-        "databaseURL": os.environ["FIREBASE_DB_URL"]
-    })
-
-firebase_db = db
-app = FastAPI(title="KrishiSakhi Crop Advisory")
-
-new_crop_advisor = NewCropAdvisor()
-existing_crop_advisor = ExistingCropAdvisor()
-pest_engine = PestEngine(PEST_DB, PEST_HISTORY)
-yield_predictor = YieldPredictor()
-
-
-# ============== MODELS =================
-class FarmDetails(BaseModel):
-    cropName: Optional[str] = None
-    district: Optional[str] = None
-    taluk: Optional[str] = None
-    soilType: Optional[str] = None
-    farmSizeAcre: Optional[float] = 1.0
-
-class SecondaryCropModel(BaseModel):
-    cropName: str
-    activityLogs: List[Dict] = []
-
-
-class ExistingCropRequest(BaseModel):
-    language: Optional[str] = "en"          # ✅ REQUIRED
-    farmDetails: FarmDetails
-    activityLogs: List[Dict] = []           # primary crop logs
-    secondaryCrops: List[SecondaryCropModel] = []
-
-
-
-class ExistingCropResponse(BaseModel):
-    cropName: str
-    cropManagement: List[str]
-    nutrientManagement: List[str]
-    waterManagement: List[str]
-    protectionManagement: List[str]
-    harvestMarketing: List[str]
-
-
-class ExistingCropFullResponse(BaseModel):
-    primaryCropAdvice: ExistingCropResponse
-    secondaryCropsAdvice: List[ExistingCropResponse]
-
-
-
-class NewCropRequest(BaseModel):
-    district: str
-    taluk: str
-    soilType: str
-    farmSizeAcre: float
-    avgRainfall: float
-    avgTemp: float
-    language: Optional[str] = "en"
-
-
-class NewCropAdvice(BaseModel):
-    cropName: str
-    score: float
-    waterManagement: str
-    nutrientManagement: str
-    seedSelection: str
-    otherAdvice: str
-    avgMarketPricePerQuintal: Optional[int] = None
-    expectedYieldPerAcreQuintal: Optional[int] = None
-    estimatedNetProfitPerAcre: Optional[int] = None
-    priceSource: Optional[str] = None
-
-
-class NewCropResponse(BaseModel):
-    recommendations: List[NewCropAdvice]
-
-
-class PestRiskRequest(BaseModel):
-    userId: str
-    
-    
-
-class PestAlert(BaseModel):
-    cropName: str
-    pestName: str
-    riskLevel: str
-    score: float
-    reasons: List[str]
-    symptoms: str
-    preventive: str
-    corrective: str
-
-class PestRiskResponse(BaseModel):
-    alerts: List[PestAlert]
-
-
-class YieldPredictionRequest(BaseModel):
-    cropName: str
-    district: str
-    farmSizeAcre: float
-    avgRainfall: float
-    avgTemp: float
-
-
-
-class YieldPredictionResponse(BaseModel):
-    cropName: str
-    expectedYieldPerAcre: float
-    totalExpectedYield: float
-    confidence: str
-    explanation: str
-
-    
-def get_user_crops(user_id: str):
-    ref = firebase_db.reference(f"Users/{user_id}")
-    user = ref.get()
-    if not user:
-        return []
-
-    crops = []
-
-    # Primary
-    farm = user.get("farmDetails", {})
-    if farm.get("cropName"):
-        crops.append({
-            "cropName": farm.get("cropName"),
-            "district": farm.get("district")
-        })
-
-    # Secondary
-    for crop, data in user.get("secondaryCrops", {}).items():
-        crops.append({
-            "cropName": crop,
-            "district": farm.get("district")
-        })
-
-    return crops
-
-
-
-# ====== MARKET PRICE (KARNATAKA MANDI AVERAGE ₹/QUINTAL) ======
-# ====== MARKET PRICE (Karnataka Avg ₹/Quintal 2024–25) ======
-market_price_ktk = {
-    "areca nut": 58000,
-    "pepper": 64000,
-    "paddy": 3300,
-    "rice":3300,
-    "sugarcane": 3600,
-    "maize": 2300,
-    "banana": 1700,
-    "ginger": 8800,
-    "turmeric": 7600,
-    "soybean": 4700,
-    "cotton": 6400,
-    "groundnut": 6400,
-    "ragi": 3300,
-    "coffee": 23500,
-    "sunflower": 6200,
-    "chilli": 11200,
-    # Newly added
-    "tomato": 1300,
-    "potato": 1200,
-    "onion": 1500,
-    "pomegranate": 7500,
-    "mango": 3200,
-    "grapes": 3800,
-    "black gram": 7600,
-    "green gram": 7200,
-    "pigeon pea": 6900,
-}
-
-# ====== COST OF CULTIVATION PER ACRE (₹) ======
-cultivation_cost = {
-    "areca nut": 60000,
-    "pepper": 50000,
-    "paddy": 38000,
-    "rice":38000,
-    "sugarcane": 78000,
-    "maize": 27000,
-    "banana": 95000,
-    "ginger": 105000,
-    "turmeric": 90000,
-    "soybean": 25000,
-    "cotton": 52000,
-    "groundnut": 30000,
-    "ragi": 22000,
-    "coffee": 120000,
-    "sunflower": 24000,
-    "chilli": 92000,
-    # Newly added
-    "tomato": 45000,
-    "potato": 50000,
-    "onion": 38000,
-    "pomegranate": 90000,
-    "mango": 65000,
-    "grapes": 100000,
-    "black gram": 24000,
-    "green gram": 22000,
-    "pigeon pea": 26000,
-}
-
-# ====== YIELD PER ACRE (Quintals) ======
-yield_per_acre = {
-    "areca nut": 10,
-    "pepper": 3,
-    "paddy": 22,
-    "rice":22,
-    "sugarcane": 40,
-    "maize": 18,
-    "banana": 35,
-    "ginger": 65,
-    "turmeric": 55,
-    "soybean": 7,
-    "cotton": 5,
-    "groundnut": 9,
-    "ragi": 10,
-    "coffee": 7,
-    "sunflower": 6,
-    "chilli": 30,
-    # Newly added
-    "tomato": 100,
-    "potato": 75,
-    "onion": 80,
-    "pomegranate": 30,
-    "mango": 55,
-    "grapes": 60,
-    "black gram": 5,
-    "green gram": 5,
-    "pigeon pea": 6,
-}
-
-# ====== English → Kannada Crop Names ======
-CROP_NAME_KN = {
-    "areca nut": "ಅಡಿಕೆ",
-    "banana": "ಬಾಳೆ",
-    "paddy": "ಅಕ್ಕಿ",
-    "rice":"ಅಕ್ಕಿ",
-    "pepper": "ಮೆಣಸು",
-    "turmeric": "ಅರಿಶಿನ",
-    "ginger": "ಶುಂಠಿ",
-    "sugarcane": "ಕಬ್ಬು",
-    "groundnut": "ಶೇಂಗಾ",
-    "maize": "ಮೆಕ್ಕೆಜೋಳ",
-    "ragi": "ರಾಗಿ",
-    "cotton": "ಹತ್ತಿ",
-    "soybean": "ಸೋಯಾಬೀನ್",
-    "coffee": "ಕಾಫಿ",
-    "sunflower": "ಸೂರ್ಯಕಾಂತಿ",
-    "chilli": "ಮೆಣಸಿನಕಾಯಿ",
-    # Newly added
-    "tomato": "ಟೊಮ್ಯಾಟೊ",
-    "potato": "ಆಲೂಗಡ್ಡೆ",
-    "onion": "ಈರುಳ್ಳಿ",
-    "pomegranate": "ದಾಳಿಂಬೆ",
-    "mango": "ಮಾವು",
-    "grapes": "ದ್ರಾಕ್ಷಿ",
-    "black gram": "ಉದ್ದಿನಬೇಳೆ",
-    "green gram": "ಹೇಶರು",
-    "pigeon pea": "ತೊಗರಿ",
-}
-
-
-def enrich_existing_crop(base_result: dict, lang: str, fallback_crop: str):
-    # Always ensure cropName exists
-    crop_name = base_result.get("cropName") or fallback_crop
-    crop_eng = crop_name.lower().strip()
-
-    base_result["cropName"] = crop_name
-
-    # 💰 Market price
-    price = market_price_ktk.get(crop_eng)
-    base_result["marketPrice"] = (
-        f"₹ {price} /quintal" if price else "Market data unavailable"
-    )
-
-    # 📈 Profit
-    if price and crop_eng in cultivation_cost and crop_eng in yield_per_acre:
-        net = (price * yield_per_acre[crop_eng]) - cultivation_cost[crop_eng]
-        base_result["estimatedNetProfitPerAcre"] = f"₹ {net} /acre"
-    else:
-        base_result["estimatedNetProfitPerAcre"] = "Profit data unavailable"
-
-    
-
-    return base_result
-
-
-
-# ============ KNOWLEDGE BASE FOR KARNATAKA =================
-locality_crops = {
-    "uttara kannada": ["areca nut", "pepper", "paddy","rice", "banana", "turmeric"],
-    "belagavi": ["sugarcane", "soybean", "maize", "paddy","rice", "wheat"],
-    "shivamogga": ["areca nut", "pepper", "paddy","rice", "banana", "ginger"],
-    "dharwad": ["soybean", "cotton", "maize", "groundnut", "rice","sunflower"],
-    "haveri": ["cotton", "chilli", "maize", "paddy","rice", "jowar"],
-    "ballari": ["pomegranate", "groundnut", "sunflower""rice", "cotton"],
-    "chikkamagaluru": ["coffee", "pepper", "areca nut","rice", "banana"],
-    "mysuru": ["cotton", "ragi", "paddy", "groundnut","rice", "sugarcane"],
-    "mandya": ["sugarcane", "paddy", "mulberry","rice", "banana"],
-    "tumakuru": ["ragi", "groundnut", "pigeon pea", "rice","tomato"],
-}
-
-soil_crops = {
-    "red soil": ["areca nut", "pepper", "cotton", "groundnut", "ragi", "paddy","rice"],
-    "black soil": ["cotton", "soybean", "turmeric", "paddy", "rice","banana"],
-    "laterite": ["areca nut", "pepper", "coffee", "banana"],
-    "alluvial": ["paddy","rice", "sugarcane", "banana", "vegetables"],
-    "sandy": ["groundnut", "onion", "melon", "cucumber"],
-}
-
-temp_range = {
-    "areca nut": (18, 32), "pepper": (20, 30), "coffee": (15, 28),
-    "banana": (15, 35), "cotton": (22, 32), "soybean": (20, 32),
-    "maize": (20, 32), "paddy": (18, 38), "groundnut": (20, 36),
-    "turmeric": (20, 30), "sugarcane": (20, 35),"rice": (18, 38),
-}
-
-rainfall_range = {
-    "areca nut": (2000, 3500), "pepper": (2000, 3000), "coffee": (1800, 3000),
-    "paddy": (900, 2500), "cotton": (600, 1200), "soybean": (700, 1200),
-    "maize": (500, 900), "groundnut": (500, 1200), "banana": (1100, 3000),
-    "turmeric": (900, 1800), "sugarcane": (1100, 2200),"rice": (900, 2500),
-}
-
-
-
-
-
-
-# ================ EXISTING CROP ADVICE =================
-# ======================================================
-
-# --------------------------------------------------
-# EXISTING CROP API
-# --------------------------------------------------
-@app.post("/advice/existing/full", response_model=ExistingCropFullResponse)
-def existing_crop_advice(req: ExistingCropRequest):
-
-    # -------- PRIMARY CROP --------
-    primary_crop = (
-        req.farmDetails.cropName
-        or extract_crop_name(req.activityLogs)
-        or "Unknown Crop"
-    )
-
-    primary_result = existing_crop_advisor.advise(
-        req.activityLogs,
-        primary_crop
-    )
-
-    primary_resp = ExistingCropResponse(**primary_result)
-
-    # -------- SECONDARY CROPS --------
-    secondary_responses = []
-
-    for sc in req.secondaryCrops:
-        sec_crop = (
-            sc.cropName
-            or extract_crop_name(sc.activityLogs)
-            or "Secondary Crop"
-        )
-
-        sec_result = existing_crop_advisor.advise(
-            sc.activityLogs,
-            sec_crop
-        )
-
-        secondary_responses.append(
-            ExistingCropResponse(**sec_result)
-        )
-
-    return ExistingCropFullResponse(
-        primaryCropAdvice=primary_resp,
-        secondaryCropsAdvice=secondary_responses
-    )
-
-
-# ==================================================
-# YIELD PREDICTION
-# ==================================================
-
-@app.post("/yield/predict", response_model=YieldPredictionResponse)
-def predict_yield(req: YieldPredictionRequest):
-
-    result = yield_predictor.predict(
-        crop=req.cropName,
-        rainfall=req.avgRainfall,
-        temp=req.avgTemp,
-        farm_size=req.farmSizeAcre
-    )
-
-    # 🔥 FIX: Inject cropName into response
-    return {
-        "cropName": req.cropName,
-        "expectedYieldPerAcre": result["expectedYieldPerAcre"],
-        "totalExpectedYield": result["totalExpectedYield"],
-        "confidence": result["confidence"],
-        "explanation": result["explanation"]
-    }
-
-
-
-
-       
-# ================ NEW CROP ADVICE =================
-@app.post("/advice/new", response_model=NewCropResponse)
-def new_crop_advice(req: NewCropRequest):
-    try:
-        
-        payload = req.dict()
-        base_recs = new_crop_advisor.recommend(payload, top_k=6)
-
-        lang = (req.language or "en").lower()
-        district = (req.district or "").lower()
-        soil = (req.soilType or "").lower()
-        rain = req.avgRainfall
-        temp = req.avgTemp
-
-        ranked = []
-        for r in base_recs:
-            crop = r["cropName"].lower()
-            score = r["score"]
-
-            # Knowledge-base boosting
-            if district in locality_crops and crop in locality_crops[district]:
-                score += 0.35
-            if soil in soil_crops and crop in soil_crops[soil]:
-                score += 0.30
-            if crop in temp_range:
-                lo, hi = temp_range[crop]
-                if lo <= temp <= hi:
-                    score += 0.20
-            if crop in rainfall_range:
-                lo, hi = rainfall_range[crop]
-                if lo <= rain <= hi:
-                    score += 0.25
-
-            r["score"] = round(score, 3)
-            
-
-            # ⭐ MARKET PRICE
-            price = market_price_ktk.get(crop)
-            r["avgMarketPricePerQuintal"] = price if price else None
-
-
-             # ⭐ PROFIT ESTIMATION
-            if price and crop in yield_per_acre and crop in cultivation_cost:
-                expected_yield = yield_per_acre[crop]
-                net_profit = (price * expected_yield) - cultivation_cost[crop]
-
-                r["expectedYieldPerAcreQuintal"] = expected_yield
-                r["estimatedNetProfitPerAcre"] = int(net_profit)
-            else:
-                r["expectedYieldPerAcreQuintal"] = None
-                r["estimatedNetProfitPerAcre"] = None
-
-            # ⭐ Price source tag
-            r["priceSource"] = "Based on 2025 Karnataka Mandi Avg"
-
-            ranked.append(r)
-
-
-        ranked = sorted(ranked, key=lambda x: x["score"], reverse=True)[:4]
-
-        # language switch
-        if lang != "en":
-            for r in ranked:
-                crop_lower = r["cropName"].lower()
-                r["cropName"] = CROP_NAME_KN.get(crop_lower, r["cropName"])
-                for key in ("waterManagement", "nutrientManagement",
-                            "seedSelection", "otherAdvice"):
-                    try:
-                        r[key] = translate_text(r[key], lang)
-                    except Exception:
-                        pass
-
-        return {"recommendations": ranked}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-# ================ PEST DETECTION LOGIC =================
-
-
-@app.post("/pest/risk", response_model=PestRiskResponse)
-def pest_risk(req: PestRiskRequest):
-
-    ref = firebase_db.reference(f"Users/{req.userId}")
-    user = ref.get()
-
-    if not user:
-        return {"alerts": []}
-
-    farm = user.get("farmDetails", {})
-    district = farm.get("district")
-
-    crops = []
-
-    if farm.get("cropName"):
-        crops.append(farm["cropName"])
-
-    for c in user.get("secondaryCrops", {}).keys():
-        crops.append(c)
-
-    alerts = []
-
-    for crop in crops:
-        results = pest_engine.predict(
-            crop_name=crop,
-            district=district
-        )
-
-        for r in results:
-            alerts.append({
-                "cropName": crop,
-                **r
-            })
-
-    return {"alerts": alerts}
-
-
-
-# =====================================================
-# ✅ HEALTH CHECK
-# =====================================================
-
-@app.get("/")
-def root():
-    return {"status": "running", "message": "Crop advisory backend active"}
-
- 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+import os
+import hmac
+import json
+import time
+import threading
+import asyncio
+from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+from typing import List, Dict, Optional
+from collections import deque
+from ml_advisor import NewCropAdvisor, ExistingCropAdvisor
+from forest_compiler import CompiledForest
+from translation_catalog import TranslationCatalog, catalog_source_texts
+from inference_runtime import InferenceRuntime
+from google_translate import (
+    translate_many,
+    translate_many_async,
+    get_upstream_client,
+    warm_translation_cache,
+    get_translation_cache,
+    get_translation_catalog,
+    set_translation_catalog,
+    translation_catalog_loaded,
+    translation_catalog_path,
+)
+from datetime import datetime, date
+from pest_engine import PestEngine
+from pest_index import MONTHS, month_number
+from pest_detector import PestDetector
+from pest_stream import PestRiskStream
+from pest_kb import get_knowledge_store
+from yield_predioctor import YieldPredictor
+from crop_registry import CROP_REGISTRY
+from utils.crop_utils import extract_crop_name
+from user_profile import (
+    fetch_user_profile,
+    fetch_user_profile_async,
+    profile_from_user,
+    InvalidUserId,
+    UserProfileCache,
+    FirebaseProfileEventSource,
+)
+from user_store import store_from_env
+from warm_snapshot import WarmSnapshot, DEFAULT_SNAPSHOT_PATH, file_version, write_snapshot
+
+
+app = FastAPI(title="KrishiSakhi Crop Advisory")
+
+
+# --------------------------------------------------
+# Lazy subsystems
+# --------------------------------------------------
+# Nothing slow happens at import: Firebase, the user store, the crop model
+# and the streaming rules are created on first use (or by warm_up() below),
+# so a missing credential only disables the endpoints that need it.
+
+class SubsystemUnavailable(RuntimeError):
+    """A subsystem the request needs is not configured; served as 503."""
+
+
+_init_lock = threading.RLock()
+_firebase_config = None
+_firebase_db = None
+_user_store = None
+_new_crop_advisor = None
+_pest_stream = None
+
+NEW_CROP_MODEL_PATH = os.environ.get("NEW_CROP_MODEL_PATH", "new_crop_model.pkl")
+
+
+def get_firebase_config():
+    """(credentials dict, database URL) from the environment, parsed once; None if unset."""
+    global _firebase_config
+    if _firebase_config is None:
+        raw = os.environ.get("FIREBASE_CREDENTIALS")
+        db_url = os.environ.get("FIREBASE_DB_URL")
+        if not raw or not db_url:
+            return None
+        try:
+            _firebase_config = (json.loads(raw), db_url)
+        except ValueError as e:
+            raise SubsystemUnavailable(f"FIREBASE_CREDENTIALS is not valid JSON: {e}")
+    return _firebase_config
+
+
+def get_firebase_db():
+    global _firebase_db
+    if _firebase_db is None:
+        config = get_firebase_config()
+        if config is None:
+            raise SubsystemUnavailable("Firebase is not configured (FIREBASE_CREDENTIALS / FIREBASE_DB_URL)")
+        with _init_lock:
+            if _firebase_db is None:
+                import firebase_admin
+                from firebase_admin import credentials, db
+
+                credentials_info, db_url = config
+                if not firebase_admin._apps:
+                    firebase_admin.initialize_app(credentials.Certificate(credentials_info), {
+                        "databaseURL": db_url
+                    })
+                _firebase_db = db
+    return _firebase_db
+
+
+def get_user_store():
+    # Non-blocking reads of Users/{id} for the request path; firebase_db stays for the listener
+    global _user_store
+    if _user_store is None:
+        with _init_lock:
+            if _user_store is None:
+                config = get_firebase_config()
+                if config is None and os.environ.get("USER_STORE", "firebase") != "memory":
+                    raise SubsystemUnavailable("User store is not configured (FIREBASE_CREDENTIALS / FIREBASE_DB_URL)")
+                credentials_info, db_url = config or (None, None)
+                _user_store = store_from_env(db_url, credentials_info)
+    return _user_store
+
+
+def get_new_crop_advisor() -> NewCropAdvisor:
+    global _new_crop_advisor
+    if _new_crop_advisor is None:
+        with _init_lock:
+            if _new_crop_advisor is None:
+                # The compiled forest from the warm snapshot, if built from this model file
+                section = _from_snapshot("forest", lambda: file_version(NEW_CROP_MODEL_PATH))
+                _new_crop_advisor = NewCropAdvisor(
+                    model_path=NEW_CROP_MODEL_PATH,
+                    forest=CompiledForest.from_arrays(*section) if section else None,
+                    runtime=InferenceRuntime.from_env(),
+                    use_lattice=os.environ.get("NEW_CROP_LATTICE") == "1",
+                    lattice_temp_step=float(os.environ.get("NEW_CROP_LATTICE_TEMP_STEP", 0.5)),
+                    lattice_rain_step=float(os.environ.get("NEW_CROP_LATTICE_RAIN_STEP", 10)),
+                    micro_batch=os.environ.get("MICRO_BATCH") == "1",
+                    micro_batch_max_size=int(os.environ.get("MICRO_BATCH_MAX_SIZE", 64)),
+                    micro_batch_wait_ms=float(os.environ.get("MICRO_BATCH_WAIT_MS", 2)),
+                )
+    return _new_crop_advisor
+
+
+def get_pest_stream() -> PestRiskStream:
+    global _pest_stream
+    if _pest_stream is None:
+        with _init_lock:
+            if _pest_stream is None:
+                _pest_stream = PestRiskStream(
+                    PestDetector(pest_kb.current.pest_db),
+                    window_days=int(os.environ.get("PEST_STREAM_WINDOW_DAYS", 7)),
+                    persistence_days=int(os.environ.get("PEST_STREAM_PERSISTENCE_DAYS", 3)),
+                    max_districts=int(os.environ.get("PEST_STREAM_MAX_DISTRICTS", 1000)),
+                )
+    return _pest_stream
+
+
+# --------------------------------------------------
+# Warm snapshot
+# --------------------------------------------------
+# WARM_SNAPSHOT=1 (default) maps WARM_SNAPSHOT_PATH and uses every section
+# whose input is unchanged (see warm_snapshot.py); stale or missing sections
+# are built in full and the file is rewritten at the end of the warm-up.
+# "rebuild" ignores the existing file, "0" turns snapshots off.
+
+WARM_SNAPSHOT_MODE = os.environ.get("WARM_SNAPSHOT", "1")
+WARM_SNAPSHOT_PATH = os.environ.get("WARM_SNAPSHOT_PATH", DEFAULT_SNAPSHOT_PATH)
+
+_warm_snapshot = None
+_warm_snapshot_opened = False
+_warm_snapshot_written = None
+
+
+def get_warm_snapshot():
+    global _warm_snapshot, _warm_snapshot_opened
+    if not _warm_snapshot_opened:
+        with _init_lock:
+            if not _warm_snapshot_opened:
+                if WARM_SNAPSHOT_MODE == "1" and os.path.exists(WARM_SNAPSHOT_PATH):
+                    try:
+                        _warm_snapshot = WarmSnapshot(WARM_SNAPSHOT_PATH)
+                    except (OSError, ValueError) as e:
+                        print(f"[Snapshot] Ignoring {WARM_SNAPSHOT_PATH}: {e}")
+                _warm_snapshot_opened = True
+    return _warm_snapshot
+
+
+def _from_snapshot(name, version_fn):
+    # version_fn is only called (e.g. hashing the model file) when there is a snapshot
+    snapshot = get_warm_snapshot()
+    return snapshot.get(name, version_fn()) if snapshot is not None else None
+
+
+def save_warm_snapshot():
+    """Write a fresh snapshot unless every section was just served from a current one."""
+    global _warm_snapshot_written
+    snapshot = get_warm_snapshot()
+    if WARM_SNAPSHOT_MODE == "0" or _warm_snapshot_written is not None:
+        return
+    if snapshot is not None and not snapshot.misses:
+        return
+
+    advisor = get_new_crop_advisor()
+    catalog = get_translation_catalog()
+    sections = {
+        "pestEngine": (pest_kb.current.version, pest_engine.export_warm_state(), {}),
+        "translationCatalog": (
+            file_version(translation_catalog_path()),
+            {"version": catalog.version, "translations": catalog.translations},
+            {},
+        ),
+    }
+    if advisor.forest is not None:
+        meta, arrays = advisor.forest.to_arrays()
+        sections["forest"] = (file_version(advisor.model_path), meta, arrays)
+
+    try:
+        write_snapshot(WARM_SNAPSHOT_PATH, sections)
+    except OSError as e:
+        # e.g. a read-only deploy directory: keep serving, just without a snapshot
+        print(f"[Snapshot] Could not write {WARM_SNAPSHOT_PATH}: {e}")
+        return
+    _warm_snapshot_written = datetime.now().isoformat(timespec="seconds")
+    print(f"[Snapshot] Wrote {WARM_SNAPSHOT_PATH}: {sorted(sections)}")
+
+
+def get_warm_snapshot_stats() -> dict:
+    stats = _warm_snapshot.stats() if _warm_snapshot is not None else {"path": WARM_SNAPSHOT_PATH}
+    stats.update(mode=WARM_SNAPSHOT_MODE, written=_warm_snapshot_written)
+    return stats
+
+
+@app.exception_handler(SubsystemUnavailable)
+async def subsystem_unavailable(request: Request, exc: SubsystemUnavailable):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+
+@app.exception_handler(InvalidUserId)
+async def invalid_user_id(request: Request, exc: InvalidUserId):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+existing_crop_advisor = ExistingCropAdvisor(translate_many_fn=translate_many)
+pest_kb = get_knowledge_store()
+pest_engine = PestEngine(pest_kb.current.pest_db, pest_kb.current.district_history)
+yield_predictor = YieldPredictor()
+profile_cache = UserProfileCache(
+    lambda user_id: fetch_user_profile(get_firebase_db(), user_id),
+    ttl_seconds=float(os.environ.get("PROFILE_CACHE_TTL", 300)),
+    max_entries=int(os.environ.get("PROFILE_CACHE_SIZE", 10000)),
+    async_loader=lambda user_id: fetch_user_profile_async(get_user_store(), user_id),
+)
+
+
+# ============== MODELS =================
+class FarmDetails(BaseModel):
+    cropName: Optional[str] = None
+    district: Optional[str] = None
+    taluk: Optional[str] = None
+    soilType: Optional[str] = None
+    farmSizeAcre: Optional[float] = 1.0
+
+class SecondaryCropModel(BaseModel):
+    cropName: str
+    activityLogs: List[Dict] = []
+
+
+class ExistingCropRequest(BaseModel):
+    language: Optional[str] = "en"          # ✅ REQUIRED
+    farmDetails: FarmDetails
+    activityLogs: List[Dict] = []           # primary crop logs
+    secondaryCrops: List[SecondaryCropModel] = []
+
+
+
+class ExistingCropResponse(BaseModel):
+    cropName: str
+    cropManagement: List[str]
+    nutrientManagement: List[str]
+    waterManagement: List[str]
+    protectionManagement: List[str]
+    harvestMarketing: List[str]
+
+
+class ExistingCropFullResponse(BaseModel):
+    primaryCropAdvice: ExistingCropResponse
+    secondaryCropsAdvice: List[ExistingCropResponse]
+
+
+
+class NewCropRequest(BaseModel):
+    district: str
+    taluk: str
+    soilType: str
+    farmSizeAcre: float
+    avgRainfall: float
+    avgTemp: float
+    language: Optional[str] = "en"
+
+
+class NewCropAdvice(BaseModel):
+    cropName: str
+    score: float
+    waterManagement: str
+    nutrientManagement: str
+    seedSelection: str
+    otherAdvice: str
+    avgMarketPricePerQuintal: Optional[int] = None
+    expectedYieldPerAcreQuintal: Optional[int] = None
+    estimatedNetProfitPerAcre: Optional[int] = None
+    priceSource: Optional[str] = None
+
+
+class NewCropResponse(BaseModel):
+    recommendations: List[NewCropAdvice]
+
+
+class NewCropBatchRequest(BaseModel):
+    items: List[NewCropRequest]
+
+
+class NewCropBatchResponse(BaseModel):
+    results: List[NewCropResponse]
+
+
+class PestRiskRequest(BaseModel):
+    userId: str
+
+
+class PestRiskBulkRequest(BaseModel):
+    # Either explicit user ids or every user whose farm is in `district`
+    userIds: Optional[List[str]] = None
+    district: Optional[str] = None
+    
+    
+
+# Alias so the `date` field below doesn't shadow the type inside the class body
+ReadingDate = Optional[date]
+
+
+class WeatherReading(BaseModel):
+    district: str
+    date: ReadingDate = None        # defaults to today
+    temp: float
+    humidity: float
+    rainfall: float
+    stage: Optional[str] = None     # sticky per district once set
+
+
+class PestAlert(BaseModel):
+    cropName: str
+    pestName: str
+    riskLevel: str
+    score: float
+    reasons: List[str]
+    symptoms: str
+    preventive: str
+    corrective: str
+
+class PestRiskResponse(BaseModel):
+    alerts: List[PestAlert]
+
+
+class YieldPredictionRequest(BaseModel):
+    cropName: str
+    district: str
+    farmSizeAcre: float
+    avgRainfall: float
+    avgTemp: float
+
+
+
+class YieldPredictionResponse(BaseModel):
+    cropName: str
+    expectedYieldPerAcre: float
+    totalExpectedYield: float
+    confidence: str
+    explanation: str
+
+    
+async def get_user_crops(user_id: str):
+    profile = await profile_cache.get_async(user_id)
+
+    return [
+        {"cropName": crop, "district": profile.district}
+        for crop in profile.crops()
+    ]
+
+
+
+# ====== CROP FACTS ======
+# Prices, costs, yields, Kannada names, climate ranges and district / soil
+# membership: one registry with integer crop ids, see crop_registry.py.
+
+
+def enrich_existing_crop(base_result: dict, lang: str, fallback_crop: str):
+    # Always ensure cropName exists
+    crop_name = base_result.get("cropName") or fallback_crop
+    crop_eng = crop_name.lower().strip()
+
+    base_result["cropName"] = crop_name
+
+    crop = CROP_REGISTRY.lookup(crop_eng)
+
+    # 💰 Market price
+    price = crop.price
+    base_result["marketPrice"] = (
+        f"₹ {int(price)} /quintal" if price else "Market data unavailable"
+    )
+
+    # 📈 Profit
+    if price and crop.cost is not None and crop.yield_per_acre is not None:
+        net = int(price * crop.yield_per_acre - crop.cost)
+        base_result["estimatedNetProfitPerAcre"] = f"₹ {net} /acre"
+    else:
+        base_result["estimatedNetProfitPerAcre"] = "Profit data unavailable"
+
+    
+
+    return base_result
+
+
+
+
+
+
+
+# ================ EXISTING CROP ADVICE =================
+# ======================================================
+
+# --------------------------------------------------
+# EXISTING CROP API
+# --------------------------------------------------
+@app.post("/advice/existing/full", response_model=ExistingCropFullResponse)
+def existing_crop_advice(req: ExistingCropRequest):
+
+    # -------- PRIMARY CROP --------
+    primary_crop = (
+        req.farmDetails.cropName
+        or extract_crop_name(req.activityLogs)
+        or "Unknown Crop"
+    )
+
+    # -------- SECONDARY CROPS --------
+    secondary_crops = [
+        (
+            sc.activityLogs,
+            sc.cropName
+            or extract_crop_name(sc.activityLogs)
+            or "Secondary Crop",
+        )
+        for sc in req.secondaryCrops
+    ]
+
+    # One translation call (and latency budget) for every crop's sentences
+    primary_result, *sec_results = existing_crop_advisor.advise_many(
+        [(req.activityLogs, primary_crop)] + secondary_crops,
+        lang=req.language,
+    )
+
+    primary_resp = ExistingCropResponse(**primary_result)
+    secondary_responses = [
+        ExistingCropResponse(**sec_result) for sec_result in sec_results
+    ]
+
+    return ExistingCropFullResponse(
+        primaryCropAdvice=primary_resp,
+        secondaryCropsAdvice=secondary_responses
+    )
+
+
+# ==================================================
+# YIELD PREDICTION
+# ==================================================
+
+@app.post("/yield/predict", response_model=YieldPredictionResponse)
+def predict_yield(req: YieldPredictionRequest):
+
+    result = yield_predictor.predict(
+        crop=req.cropName,
+        rainfall=req.avgRainfall,
+        temp=req.avgTemp,
+        farm_size=req.farmSizeAcre
+    )
+
+    # 🔥 FIX: Inject cropName into response
+    return {
+        "cropName": req.cropName,
+        "expectedYieldPerAcre": result["expectedYieldPerAcre"],
+        "totalExpectedYield": result["totalExpectedYield"],
+        "confidence": result["confidence"],
+        "explanation": result["explanation"]
+    }
+
+
+
+
+       
+# ================ NEW CROP ADVICE =================
+def rank_new_crop_recs(base_recs: List[Dict], req: NewCropRequest) -> List[Dict]:
+    district = (req.district or "").lower()
+    soil = (req.soilType or "").lower()
+    rain = req.avgRainfall
+    temp = req.avgTemp
+
+    district_bits = CROP_REGISTRY.district_bits(district)
+    soil_bits = CROP_REGISTRY.soil_bits(soil)
+
+    ranked = []
+    for r in base_recs:
+        crop = CROP_REGISTRY.lookup(r["cropName"])
+        score = r["score"]
+
+        # Knowledge-base boosting
+        if district_bits >> crop.id & 1:
+            score += 0.35
+        if soil_bits >> crop.id & 1:
+            score += 0.30
+        if crop.temp_min is not None and crop.temp_min <= temp <= crop.temp_max:
+            score += 0.20
+        if crop.rainfall_min is not None and crop.rainfall_min <= rain <= crop.rainfall_max:
+            score += 0.25
+
+        r["score"] = round(score, 3)
+        
+
+        # ⭐ MARKET PRICE
+        price = crop.price
+        r["avgMarketPricePerQuintal"] = int(price) if price else None
+
+
+         # ⭐ PROFIT ESTIMATION
+        if price and crop.yield_per_acre is not None and crop.cost is not None:
+            expected_yield = crop.yield_per_acre
+            net_profit = (price * expected_yield) - crop.cost
+
+            r["expectedYieldPerAcreQuintal"] = int(expected_yield)
+            r["estimatedNetProfitPerAcre"] = int(net_profit)
+        else:
+            r["expectedYieldPerAcreQuintal"] = None
+            r["estimatedNetProfitPerAcre"] = None
+
+        # ⭐ Price source tag
+        r["priceSource"] = "Based on 2025 Karnataka Mandi Avg"
+
+        ranked.append(r)
+
+
+    return sorted(ranked, key=lambda x: x["score"], reverse=True)[:4]
+
+
+async def localize_new_crop_recs(ranked_lists: List[List[Dict]], langs: List[str]):
+    """
+    Language switch for a whole batch of ranked recommendation lists.
+    All advice strings for a language are translated with one
+    translate_many_async call, so latency doesn't grow with the field count.
+    Languages share one latency budget; strings the upstream can't deliver
+    in time stay in English.
+    """
+    keys = ("waterManagement", "nutrientManagement", "seedSelection", "otherAdvice")
+
+    by_lang: Dict[str, List[Dict]] = {}
+    for ranked, lang in zip(ranked_lists, langs):
+        if lang != "en":
+            by_lang.setdefault(lang, []).extend(ranked)
+    if not by_lang:
+        return
+
+    deadline = get_upstream_client().deadline()
+    texts_by_lang = {
+        lang: [r[key] for r in recs for key in keys] for lang, recs in by_lang.items()
+    }
+    results = await asyncio.gather(
+        *[translate_many_async(texts, lang, deadline) for lang, texts in texts_by_lang.items()],
+        return_exceptions=True,
+    )
+
+    for (lang, recs), translated in zip(by_lang.items(), results):
+        if isinstance(translated, Exception):
+            translated = texts_by_lang[lang]
+
+        it = iter(translated)
+        for r in recs:
+            r["cropName"] = CROP_REGISTRY.lookup(r["cropName"]).kannada or r["cropName"]
+            for key in keys:
+                r[key] = next(it)
+
+
+async def build_new_crop_responses(reqs: List[NewCropRequest]) -> List[Dict]:
+    payloads = [req.dict() for req in reqs]
+    # Model not loaded yet (warm-up still running or off): load it off the event loop
+    new_crop_advisor = _new_crop_advisor or await run_in_threadpool(get_new_crop_advisor)
+    if new_crop_advisor.batcher is not None:
+        base_recs_batch = await new_crop_advisor.recommend_many_async(payloads, top_k=6)
+    else:
+        base_recs_batch = await run_in_threadpool(
+            new_crop_advisor.recommend_many, payloads, 6
+        )
+
+    ranked_lists = [
+        rank_new_crop_recs(base_recs, req)
+        for base_recs, req in zip(base_recs_batch, reqs)
+    ]
+    await localize_new_crop_recs(
+        ranked_lists, [(req.language or "en").lower() for req in reqs]
+    )
+
+    return [{"recommendations": ranked} for ranked in ranked_lists]
+
+
+@app.post("/advice/new", response_model=NewCropResponse)
+async def new_crop_advice(req: NewCropRequest):
+    try:
+        return (await build_new_crop_responses([req]))[0]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/advice/new/batch", response_model=NewCropBatchResponse)
+async def new_crop_advice_batch(req: NewCropBatchRequest):
+    try:
+        return {"results": await build_new_crop_responses(req.items)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ================ PEST DETECTION LOGIC =================
+
+
+def build_pest_alerts(profile):
+    alerts = []
+
+    for crop in profile.crops():
+        results = pest_engine.predict(
+            crop_name=crop,
+            district=profile.district
+        )
+
+        for r in results:
+            alerts.append({
+                "cropName": crop,
+                **r
+            })
+
+    return alerts
+
+
+@app.post("/pest/risk", response_model=PestRiskResponse)
+async def pest_risk(req: PestRiskRequest):
+
+    profile = await profile_cache.get_async(req.userId)
+
+    return {"alerts": build_pest_alerts(profile)}
+
+
+BULK_CONCURRENCY = int(os.environ.get("PEST_BULK_CONCURRENCY", 64))
+
+
+def require_admin_token(x_admin_token: Optional[str]):
+    # Admin endpoints are closed (404) unless ADMIN_TOKEN is configured
+    token = os.environ.get("ADMIN_TOKEN")
+    if not token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest((x_admin_token or "").encode("utf-8"), token.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+async def stream_bulk_pest_risk(req: PestRiskBulkRequest):
+    """
+    One NDJSON line per user. With userIds: in request order, at most
+    BULK_CONCURRENCY profile reads in flight, so memory stays flat however
+    many users are included. With district: one indexed query on
+    farmDetails/district (exact match on the stored value) returns just
+    that district's users. Alerts per (crop, district) come from
+    PestEngine's precomputed table, so users sharing a pair share the work.
+    """
+    if req.userIds is None:
+        users = await get_user_store().query("Users", "farmDetails/district", req.district.strip())
+        for user_id, user in users.items():
+            yield _bulk_line((user_id, profile_from_user(user_id, user), None))
+        return
+
+    async def load(user_id):
+        try:
+            # Read-through: cached profiles are reused, the rest aren't inserted
+            return user_id, await profile_cache.get_async(user_id, store=False), None
+        except Exception as e:
+            return user_id, None, str(e)
+
+    pending = deque()
+    try:
+        for user_id in req.userIds:
+            pending.append(asyncio.ensure_future(load(user_id)))
+            if len(pending) < BULK_CONCURRENCY:
+                continue
+            yield _bulk_line(await pending.popleft())
+
+        while pending:
+            yield _bulk_line(await pending.popleft())
+    finally:
+        # Client went away mid-stream: don't leave reads running
+        for task in pending:
+            task.cancel()
+
+
+def _bulk_line(result):
+    user_id, profile, error = result
+    if error is not None:
+        return json.dumps({"userId": user_id, "error": error}) + "\n"
+    return json.dumps({
+        "userId": user_id,
+        "district": profile.district,
+        "alerts": build_pest_alerts(profile),
+    }, ensure_ascii=False) + "\n"
+
+
+@app.post("/pest/risk/bulk")
+async def pest_risk_bulk(req: PestRiskBulkRequest, x_admin_token: Optional[str] = Header(default=None)):
+    # Returns many users' crops and locations: admin only, like the KB reload
+    require_admin_token(x_admin_token)
+    if (req.userIds is None) == (req.district is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of userIds or district")
+    # Fail with 503 before the 200 header goes out if there is no store
+    get_user_store()
+
+    return StreamingResponse(stream_bulk_pest_risk(req), media_type="application/x-ndjson")
+
+
+
+# ================ STREAMING PEST RISK =================
+
+@app.post("/weather/readings")
+def ingest_weather_reading(req: WeatherReading):
+    pest_stream = get_pest_stream()
+    if req.stage is not None:
+        pest_stream.set_stage(req.district, req.stage)
+    try:
+        events = pest_stream.update(
+            req.district,
+            {"temp": req.temp, "humidity": req.humidity, "rainfall": req.rainfall},
+            req.date or date.today(),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"events": [e.to_dict() for e in events]}
+
+
+@app.get("/pest/stream/{district}")
+def streaming_pest_risk(district: str):
+    snapshot = get_pest_stream().snapshot(district)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail=f"No readings for district: {district}")
+    return snapshot
+
+
+# ================ PEST EXPOSURE QUERIES =================
+
+@app.get("/pests/active")
+def active_pests(month: Optional[str] = None):
+    # month: 1-12 or a month name; defaults to the current month
+    n = month_number(month) if month is not None else datetime.now().month
+    if n is None:
+        raise HTTPException(status_code=400, detail=f"Invalid month: {month}")
+
+    return {"month": MONTHS[n - 1], "pests": pest_engine.index.pests_in_month(n)}
+
+
+@app.get("/pests/{pest_name}/exposure")
+def pest_exposure(pest_name: str):
+    index = pest_engine.index
+    name = index.pest_name(pest_name)
+    if name is None:
+        raise HTTPException(status_code=404, detail=f"Unknown pest: {pest_name}")
+
+    return {
+        "pestName": name,
+        "crops": index.crops_for(name),
+        "districts": index.districts_for(name),
+    }
+
+
+# ================ PEST KNOWLEDGE RELOAD =================
+
+def apply_pest_kb(kb):
+    # Requests already running keep the previous table / rules
+    pest_engine.rebuild(kb.pest_db, kb.district_history)
+    with _init_lock:
+        # Not built yet: it will compile the new rules on first use
+        if _pest_stream is not None:
+            _pest_stream.reload_rules(PestDetector(kb.pest_db))
+
+
+pest_kb.subscribe(apply_pest_kb)
+
+
+@app.on_event("startup")
+def watch_pest_kb():
+    # PEST_KB_WATCH_S=0 disables polling; /admin/pest-kb/reload still works
+    interval = float(os.environ.get("PEST_KB_WATCH_S", 10))
+    if interval > 0:
+        pest_kb.watch(interval)
+
+
+@app.post("/admin/pest-kb/reload")
+def reload_pest_kb(x_admin_token: Optional[str] = Header(default=None)):
+    require_admin_token(x_admin_token)
+
+    reloaded = pest_kb.reload(force=True)
+    return {"reloaded": reloaded, **pest_kb.stats()}
+
+
+# =====================================================
+# 🔥 WARM-UP
+# =====================================================
+# WARM_UP=background (default) loads the model, pest tables, translation
+# catalog and Firebase clients in a thread after startup, blocking does it
+# before the server accepts requests, off leaves everything to first use.
+# /readyz reports 503 until the warm-up has finished.
+
+WARM_UP_MODE = os.environ.get("WARM_UP", "background")
+
+warm_up_state = {"status": "pending", "seconds": None, "subsystems": {}}
+
+# A representative request: first real call then hits warm code paths
+_WARM_UP_PAYLOAD = {
+    "district": "dharwad", "taluk": "dharwad", "soilType": "Black Soil",
+    "farmSizeAcre": 1.0, "avgRainfall": 800.0, "avgTemp": 26.0,
+}
+
+
+def _warm_new_crop_model():
+    get_new_crop_advisor().recommend_many([_WARM_UP_PAYLOAD], 6)
+
+
+# The preload steps skip work that is already done, so a worker forked from
+# serve.py's preloaded parent keeps the parent's objects (and shared pages)
+# when its own startup warm-up runs them again.
+
+def _warm_pest_engine():
+    if pest_engine.is_warm:
+        return
+    section = _from_snapshot("pestEngine", lambda: pest_kb.current.version)
+    if section is not None:
+        pest_engine.restore_warm_state(section[0])
+    else:
+        pest_engine.warm()
+
+
+def _warm_translation_catalog():
+    if translation_catalog_loaded():
+        return
+    section = _from_snapshot("translationCatalog", lambda: file_version(translation_catalog_path()))
+    if section is not None:
+        data = section[0]
+        set_translation_catalog(TranslationCatalog(version=data["version"], translations=data["translations"]))
+    else:
+        get_translation_catalog()
+
+
+# Read-only state: serve.py loads these once before forking so workers share the pages
+PRELOAD_STEPS = [
+    ("newCropModel", _warm_new_crop_model),
+    ("pestEngine", _warm_pest_engine),
+    ("pestStream", get_pest_stream),
+    ("translationCatalog", _warm_translation_catalog),
+    ("warmSnapshot", save_warm_snapshot),
+]
+
+# Sockets, sqlite handles and threads don't survive fork: created in each worker
+CLIENT_STEPS = [
+    ("translationCache", get_translation_cache),
+    ("firebase", get_firebase_db),
+    ("userStore", get_user_store),
+]
+
+
+def warm_up(steps=None) -> dict:
+    """Initialize every subsystem now (or just `steps`); one failing doesn't stop the others."""
+    steps = steps if steps is not None else PRELOAD_STEPS + CLIENT_STEPS
+    warm_up_state["status"] = "running"
+    started = time.perf_counter()
+
+    for name, step in steps:
+        t0 = time.perf_counter()
+        try:
+            step()
+            status = {"status": "ready"}
+        except SubsystemUnavailable as e:
+            # Not an error for readiness: the endpoints that need it answer 503
+            status = {"status": "not_configured", "detail": str(e)}
+        except Exception as e:
+            status = {"status": "error", "detail": str(e)}
+            print(f"[WarmUp] {name} failed: {e}")
+        status["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        # Replace rather than mutate: /readyz may be serialising the old dict
+        warm_up_state["subsystems"] = {**warm_up_state["subsystems"], name: status}
+
+    warm_up_state["seconds"] = round(time.perf_counter() - started, 3)
+    warm_up_state["status"] = "done"
+    print(f"[WarmUp] Finished in {warm_up_state['seconds']}s")
+    return warm_up_state
+
+
+@app.on_event("startup")
+def start_warm_up():
+    if WARM_UP_MODE == "off":
+        warm_up_state["status"] = "skipped"
+    elif WARM_UP_MODE == "blocking":
+        warm_up()
+    else:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+
+@app.on_event("startup")
+def listen_profile_changes():
+    # Opt-in: listens on the profile fields of cached users only, at most
+    # PROFILE_CACHE_LISTEN_MAX of them; other entries just expire with the TTL
+    if os.environ.get("PROFILE_CACHE_LISTEN") == "1":
+        try:
+            profile_cache.attach(FirebaseProfileEventSource(
+                get_firebase_db(),
+                max_users=int(os.environ.get("PROFILE_CACHE_LISTEN_MAX", 100)),
+            ))
+        except SubsystemUnavailable as e:
+            print(f"[Profiles] Change listener disabled: {e}")
+
+
+@app.on_event("startup")
+def warm_translations():
+    # e.g. TRANSLATION_WARM_LANGS=kn ; runs in the background so startup isn't blocked
+    langs = [l.strip() for l in os.environ.get("TRANSLATION_WARM_LANGS", "").split(",") if l.strip()]
+    if not langs:
+        return
+
+    def _warm():
+        n = warm_translation_cache(catalog_source_texts(), langs)
+        print(f"[Translate] Warmed {n} cached translations for {langs}")
+
+    threading.Thread(target=_warm, name="translation-warmup", daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def close_user_store():
+    if _user_store is not None:
+        await _user_store.close()
+
+
+# =====================================================
+# 📊 METRICS
+# =====================================================
+
+@app.get("/metrics")
+def metrics():
+    inference = {"modelLoaded": _new_crop_advisor is not None}
+    if _new_crop_advisor is not None:
+        inference["runtime"] = _new_crop_advisor.runtime.stats()
+        if _new_crop_advisor.batcher is not None:
+            inference["microBatcher"] = _new_crop_advisor.batcher.stats()
+        if _new_crop_advisor.lattice is not None:
+            inference["lattice"] = _new_crop_advisor.lattice_stats()
+    return {
+        "warmUp": warm_up_state,
+        "warmSnapshot": get_warm_snapshot_stats(),
+        "inference": inference,
+        "userProfiles": profile_cache.stats(),
+        "userStore": _user_store.stats() if _user_store is not None else None,
+        "pestEngine": pest_engine.stats(),
+        "pestKnowledge": pest_kb.stats(),
+        "pestStream": _pest_stream.stats() if _pest_stream is not None else None,
+        "translation": {
+            "catalog": get_translation_catalog().stats(),
+            "cache": get_translation_cache().stats(),
+            "upstream": get_upstream_client().stats(),
+        },
+    }
+
+
+# =====================================================
+# ✅ HEALTH CHECKS
+# =====================================================
+
+@app.get("/healthz")
+def healthz():
+    # Liveness: the process is up and serving; never depends on warm-up
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    # Readiness: warm-up finished (or is disabled) and nothing failed
+    done = warm_up_state["status"] in ("done", "skipped")
+    failed = [name for name, s in warm_up_state["subsystems"].items() if s["status"] == "error"]
+    body = {"ready": done and not failed, **warm_up_state}
+    if failed:
+        body["failed"] = failed
+    return JSONResponse(status_code=200 if body["ready"] else 503, content=body)
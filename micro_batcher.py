@@ -0,0 +1,141 @@
+# micro_batcher.py
+"""
+Dynamic micro-batching for model inference.
+
+Concurrent /advice/new requests each score a single feature row. The
+MicroBatcher queues rows from all callers and a background thread scores
+whatever arrived within `max_wait_ms` of the first queued row (or up to
+`max_batch_size` rows) in one call, then hands every caller its own row
+of the result.
+
+The worker thread does not survive os.fork(); a batcher created before a
+pre-fork server (serve.py) forks starts a fresh queue and thread in each
+worker process on first use.
+
+    batcher = MicroBatcher(model.predict_proba, max_batch_size=64, max_wait_ms=2)
+    proba = batcher.score(x)               # sync handlers / threadpool
+    proba = await batcher.score_async(x)   # async handlers
+"""
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+_STOP = object()
+_restart_lock = threading.Lock()
+
+
+class MicroBatcher:
+
+    def __init__(
+        self,
+        score_fn: Callable[[np.ndarray], np.ndarray],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+    ):
+        self.score_fn = score_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._batches = 0
+        self._rows = 0
+        self._max_queue_depth = 0
+        self._batch_sizes: Counter = Counter()
+        self._start()
+
+    def _start(self):
+        self._pid = os.getpid()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, name="micro-batcher", daemon=True
+        )
+        self._thread.start()
+
+    # ---------------- callers ----------------
+
+    def submit(self, row: np.ndarray) -> Future:
+        """Queue one feature row; the future resolves to its probability row."""
+        if self._pid != os.getpid():
+            # Forked since the thread was started: it only exists in the parent
+            with _restart_lock:
+                if self._pid != os.getpid():
+                    self._start()
+        fut: Future = Future()
+        self._queue.put((np.asarray(row, dtype=np.float64).ravel(), fut))
+        depth = self._queue.qsize()
+        if depth > self._max_queue_depth:
+            with self._lock:
+                self._max_queue_depth = max(self._max_queue_depth, depth)
+        return fut
+
+    def score(self, row: np.ndarray) -> np.ndarray:
+        return self.submit(row).result()
+
+    async def score_async(self, row: np.ndarray) -> np.ndarray:
+        return await asyncio.wrap_future(self.submit(row))
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join(timeout=1.0)
+
+    # ---------------- worker ----------------
+
+    def _collect(self, first) -> Tuple[List, bool]:
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch, stop = self._collect(first)
+
+            rows = np.vstack([row for row, _ in batch])
+            try:
+                proba = self.score_fn(rows)
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+            else:
+                for i, (_, fut) in enumerate(batch):
+                    fut.set_result(proba[i])
+
+            with self._lock:
+                self._batches += 1
+                self._rows += len(batch)
+                self._batch_sizes[len(batch)] += 1
+
+    # ---------------- metrics ----------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queueDepth": self._queue.qsize(),
+                "maxQueueDepth": self._max_queue_depth,
+                "batches": self._batches,
+                "rows": self._rows,
+                "avgBatchSize": round(self._rows / self._batches, 3) if self._batches else 0.0,
+                "batchSizeHistogram": dict(sorted(self._batch_sizes.items())),
+                "maxBatchSize": self.max_batch_size,
+                "maxWaitMs": self.max_wait * 1000.0,
+            }
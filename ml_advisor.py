@@ -1,223 +1,470 @@
-# ml_advisor.py
-from typing import List, Dict, Any
-import os
-import numpy as np
-import joblib
-from ml_features import extract_features
-
-
-# ----------------- Helper data for new crop advisory -----------------
-
-# Approximate nutrient/pH/humidity profiles per soil type
-SOIL_PROFILES = {
-    "Red Soil":      {"N": 80, "P": 40, "K": 40, "ph": 6.5, "humidity": 70},
-    "Black Soil":    {"N": 90, "P": 45, "K": 50, "ph": 7.2, "humidity": 65},
-    "Laterite":      {"N": 75, "P": 35, "K": 40, "ph": 5.8, "humidity": 75},
-    "Alluvial":      {"N": 85, "P": 42, "K": 45, "ph": 7.0, "humidity": 68},
-    "Sandy":         {"N": 60, "P": 30, "K": 30, "ph": 6.2, "humidity": 60},
-    "Loamy":         {"N": 88, "P": 44, "K": 46, "ph": 6.8, "humidity": 72},
-}
-
-DEFAULT_PROFILE = {"N": 85, "P": 40, "K": 40, "ph": 6.6, "humidity": 70}
-
-# Advice templates per crop label (from Kaggle dataset labels)
-CROP_TEMPLATES: Dict[str, Dict[str, str]] = {
-    "rice": {
-        "water": "Maintain standing water of 2–5 cm in early growth. Prefer puddled fields or controlled flooding.",
-        "nutrient": "Apply 10–12 t/ha FYM before puddling. Use split N application (basal, tillering, panicle initiation) with balanced P & K.",
-        "seed": "Use certified high-yielding varieties; ensure proper seed treatment and 2–3 cm sowing depth.",
-        "other": "Keep fields weed-free in first 30–40 days; monitor for blast and BPH regularly.",
-    },
-    "wheat": {
-        "water": "Give first irrigation at CRI stage (18–21 days) then at tillering, jointing, heading and milking depending on rainfall.",
-        "nutrient": "Apply basal NPK at sowing; split remaining N in 2–3 doses. Avoid excess N to prevent lodging.",
-        "seed": "Use bold, disease-free seeds of region-specific varieties; maintain recommended seed rate and spacing.",
-        "other": "Timely sowing and weed management within 20–25 days are crucial for good yield.",
-    },
-    "maize": {
-        "water": "Ensure adequate moisture at germination, tasseling and grain filling. Avoid waterlogging.",
-        "nutrient": "Apply FYM + basal NPK and top-dress N in 2–3 splits. Zinc deficiency is common; apply ZnSO4 if needed.",
-        "seed": "Select hybrid seed suitable for your season; maintain proper plant population.",
-        "other": "Practice earthing-up and monitor for stem borer and foliar diseases.",
-    },
-    "chickpea": {
-        "water": "Generally grown on conserved soil moisture; 1–2 life-saving irrigations at flowering/pod filling if needed.",
-        "nutrient": "Apply basal P and moderate N; inoculate seed with Rhizobium culture for better nodulation.",
-        "seed": "Use wilt-tolerant varieties; treat seed against seed-borne diseases.",
-        "other": "Avoid waterlogging; practice wider spacing in heavy soils.",
-    },
-    "mango": {
-        "water": "Irrigate young plants frequently; for bearing trees, irrigate at critical fruit development stages and avoid water stress.",
-        "nutrient": "Apply FYM + NPK based on tree age, split between pre- and post-monsoon.",
-        "seed": "Use grafted plants of recommended varieties; plant on raised pits with good drainage.",
-        "other": "Regular pruning and pest/disease monitoring are essential for quality fruits.",
-    },
-    "banana": {
-        "water": "Requires uniform moisture; adopt drip or basin irrigation. Avoid moisture stress especially during bunch initiation.",
-        "nutrient": "High feeder crop – follow scheduled NPK fertigation plus FYM/compost mulching.",
-        "seed": "Use tissue-cultured, disease-free planting material of high-yielding clones.",
-        "other": "Provide propping, de-suckering and leaf sanitation to reduce disease pressure.",
-    },
-    # Add more crops as needed; others fall back to generic template
-}
-
-GENERIC_TEMPLATE = {
-    "water": "Maintain adequate soil moisture without waterlogging; adjust based on rainfall and crop stage.",
-    "nutrient": "Apply well-decomposed FYM before planting and follow a balanced NPK schedule with 2–3 split applications.",
-    "seed": "Use certified, disease-free seeds or planting material of recommended high-yielding varieties.",
-    "other": "Monitor pests and diseases regularly; keep field weed-free, especially in early growth stages.",
-}
-
-
-# ----------------- New crop advisor (ML-based) -----------------
-
-
-class NewCropAdvisor:
-    """
-    ML-based crop recommendation using RandomForest model trained
-    on Kaggle Crop Recommendation dataset (N, P, K, temperature, humidity, pH, rainfall).
-
-    Model is saved as new_crop_model.pkl using train_new_crop_model.py
-    and loaded here as a scikit-learn Pipeline.
-    """
-
-    def __init__(self, model_path: str = "new_crop_model.pkl"):
-        self.model_path = model_path
-        self.model_available = False
-        self.model = None
-
-        if os.path.exists(self.model_path):
-            try:
-                self.model = joblib.load(self.model_path)
-                self.model_available = True
-                print("Loaded new crop model from", self.model_path)
-            except Exception as e:
-                print("Failed to load model:", e)
-        else:
-            print("new_crop_model.pkl not found; using fallback recommendations.")
-
-    def _build_features_from_payload(self, payload: Dict[str, Any]) -> np.ndarray:
-        soil_type = (payload.get("soilType") or "").strip()
-        profile = SOIL_PROFILES.get(soil_type, DEFAULT_PROFILE)
-
-        N = float(profile["N"])
-        P = float(profile["P"])
-        K = float(profile["K"])
-        ph = float(profile["ph"])
-        humidity = float(profile["humidity"])
-
-        temperature = float(payload.get("avgTemp", 26.0))
-        rainfall = float(payload.get("avgRainfall", 2000.0))
-
-        return np.array([[N, P, K, temperature, humidity, ph, rainfall]])
-
-    def recommend(self, payload: Dict[str, Any], top_k: int = 3) -> List[Dict[str, Any]]:
-        """
-        payload: {
-          "district": "...",
-          "taluk": "...",
-          "soilType": "Red Soil",
-          "farmSizeAcre": 1.0,
-          "avgRainfall": 2300,
-          "avgTemp": 27
-        }
-        """
-        if not self.model_available:
-            # Fallback simple list if model is not present
-            fallback = ["rice", "arecanut", "banana"]
-            recommendations = []
-            for name in fallback:
-                tmpl = CROP_TEMPLATES.get(name, GENERIC_TEMPLATE)
-                recommendations.append(
-                    {
-                        "cropName": name,
-                        "score": 0.0,
-                        "waterManagement": tmpl["water"],
-                        "nutrientManagement": tmpl["nutrient"],
-                        "seedSelection": tmpl["seed"],
-                        "otherAdvice": tmpl["other"],
-                    }
-                )
-            return recommendations
-
-        X = self._build_features_from_payload(payload)
-        proba = self.model.predict_proba(X)[0]
-        classes = self.model.classes_
-
-        # Top-k crops by probability
-        idx_sorted = np.argsort(proba)[::-1][:top_k]
-
-        recommendations: List[Dict[str, Any]] = []
-        for idx in idx_sorted:
-            crop_label = str(classes[idx])
-            score = float(proba[idx])
-            tmpl = CROP_TEMPLATES.get(crop_label, GENERIC_TEMPLATE)
-
-            recommendations.append(
-                {
-                    "cropName": crop_label,
-                    "score": score,
-                    "waterManagement": tmpl["water"],
-                    "nutrientManagement": tmpl["nutrient"],
-                    "seedSelection": tmpl["seed"],
-                    "otherAdvice": tmpl["other"],
-                }
-            )
-
-        return recommendations
-
-
-# ----------------- Existing crop advisor (Firebase logs) -----------------
-
-class ExistingCropAdvisor:
-
-    def advise(self, activity_logs: list, crop_name: str):
-
-        rec = {
-            "cropName": crop_name,
-            "cropManagement": [],
-            "nutrientManagement": [],
-            "waterManagement": [],
-            "protectionManagement": [],
-            "harvestMarketing": []
-        }
-
-        if not activity_logs:
-            rec["cropManagement"].append(
-                "Add farm activities to receive personalized advice."
-            )
-            return rec
-
-        for log in activity_logs:
-            sub = log.get("subActivity")
-
-            if sub == "water_management":
-                freq = log.get("frequencyDays", 3)
-                rec["waterManagement"].append(
-                    f"Irrigate every {freq} days. Avoid water stress."
-                )
-
-            elif sub == "nutrient_management":
-                for app in log.get("applications", []):
-                    rec["nutrientManagement"].append(
-                        f"Applied {app['fertilizerName']} ({app['quantity']}). "
-                        f"Next dose after {app['gapDays']} days."
-                    )
-
-            elif sub == "crop_protection_maintenance":
-                rec["protectionManagement"].append(
-                    "Continue weekly pest and disease monitoring."
-                )
-
-            elif sub == "harvesting_cut_gather":
-                rec["harvestMarketing"].append(
-                    "Harvest at maturity. Dry, grade and store properly."
-                )
-
-        # fallback
-        if not any(rec[k] for k in rec if k != "cropName"):
-            rec["cropManagement"].append(
-                "Follow standard crop management practices."
-            )
-
-        return rec
+# ml_advisor.py
+from typing import List, Dict, Any, Optional, Callable, Tuple
+import os
+import asyncio
+import threading
+import numpy as np
+from ml_features import extract_features
+from crop_lattice import (
+    RecommendationLattice,
+    DEFAULT_PROFILE_KEY,
+    DEFAULT_LATTICE_PATH,
+    DEFAULT_TEMP_STEP,
+    DEFAULT_RAIN_STEP,
+)
+from forest_compiler import CompiledForest
+from inference_runtime import InferenceRuntime
+from micro_batcher import MicroBatcher
+from warm_snapshot import file_version
+
+
+# ----------------- Helper data for new crop advisory -----------------
+
+# Approximate nutrient/pH/humidity profiles per soil type
+SOIL_PROFILES = {
+    "Red Soil":      {"N": 80, "P": 40, "K": 40, "ph": 6.5, "humidity": 70},
+    "Black Soil":    {"N": 90, "P": 45, "K": 50, "ph": 7.2, "humidity": 65},
+    "Laterite":      {"N": 75, "P": 35, "K": 40, "ph": 5.8, "humidity": 75},
+    "Alluvial":      {"N": 85, "P": 42, "K": 45, "ph": 7.0, "humidity": 68},
+    "Sandy":         {"N": 60, "P": 30, "K": 30, "ph": 6.2, "humidity": 60},
+    "Loamy":         {"N": 88, "P": 44, "K": 46, "ph": 6.8, "humidity": 72},
+}
+
+DEFAULT_PROFILE = {"N": 85, "P": 40, "K": 40, "ph": 6.6, "humidity": 70}
+
+# Advice templates per crop label (from Kaggle dataset labels)
+CROP_TEMPLATES: Dict[str, Dict[str, str]] = {
+    "rice": {
+        "water": "Maintain standing water of 2–5 cm in early growth. Prefer puddled fields or controlled flooding.",
+        "nutrient": "Apply 10–12 t/ha FYM before puddling. Use split N application (basal, tillering, panicle initiation) with balanced P & K.",
+        "seed": "Use certified high-yielding varieties; ensure proper seed treatment and 2–3 cm sowing depth.",
+        "other": "Keep fields weed-free in first 30–40 days; monitor for blast and BPH regularly.",
+    },
+    "wheat": {
+        "water": "Give first irrigation at CRI stage (18–21 days) then at tillering, jointing, heading and milking depending on rainfall.",
+        "nutrient": "Apply basal NPK at sowing; split remaining N in 2–3 doses. Avoid excess N to prevent lodging.",
+        "seed": "Use bold, disease-free seeds of region-specific varieties; maintain recommended seed rate and spacing.",
+        "other": "Timely sowing and weed management within 20–25 days are crucial for good yield.",
+    },
+    "maize": {
+        "water": "Ensure adequate moisture at germination, tasseling and grain filling. Avoid waterlogging.",
+        "nutrient": "Apply FYM + basal NPK and top-dress N in 2–3 splits. Zinc deficiency is common; apply ZnSO4 if needed.",
+        "seed": "Select hybrid seed suitable for your season; maintain proper plant population.",
+        "other": "Practice earthing-up and monitor for stem borer and foliar diseases.",
+    },
+    "chickpea": {
+        "water": "Generally grown on conserved soil moisture; 1–2 life-saving irrigations at flowering/pod filling if needed.",
+        "nutrient": "Apply basal P and moderate N; inoculate seed with Rhizobium culture for better nodulation.",
+        "seed": "Use wilt-tolerant varieties; treat seed against seed-borne diseases.",
+        "other": "Avoid waterlogging; practice wider spacing in heavy soils.",
+    },
+    "mango": {
+        "water": "Irrigate young plants frequently; for bearing trees, irrigate at critical fruit development stages and avoid water stress.",
+        "nutrient": "Apply FYM + NPK based on tree age, split between pre- and post-monsoon.",
+        "seed": "Use grafted plants of recommended varieties; plant on raised pits with good drainage.",
+        "other": "Regular pruning and pest/disease monitoring are essential for quality fruits.",
+    },
+    "banana": {
+        "water": "Requires uniform moisture; adopt drip or basin irrigation. Avoid moisture stress especially during bunch initiation.",
+        "nutrient": "High feeder crop – follow scheduled NPK fertigation plus FYM/compost mulching.",
+        "seed": "Use tissue-cultured, disease-free planting material of high-yielding clones.",
+        "other": "Provide propping, de-suckering and leaf sanitation to reduce disease pressure.",
+    },
+    # Add more crops as needed; others fall back to generic template
+}
+
+GENERIC_TEMPLATE = {
+    "water": "Maintain adequate soil moisture without waterlogging; adjust based on rainfall and crop stage.",
+    "nutrient": "Apply well-decomposed FYM before planting and follow a balanced NPK schedule with 2–3 split applications.",
+    "seed": "Use certified, disease-free seeds or planting material of recommended high-yielding varieties.",
+    "other": "Monitor pests and diseases regularly; keep field weed-free, especially in early growth stages.",
+}
+
+
+# ----------------- New crop advisor (ML-based) -----------------
+
+
+class NewCropAdvisor:
+    """
+    ML-based crop recommendation using RandomForest model trained
+    on Kaggle Crop Recommendation dataset (N, P, K, temperature, humidity, pH, rainfall).
+
+    Model is saved as new_crop_model.pkl using train_new_crop_model.py
+    and loaded here as a scikit-learn Pipeline.
+
+    Unless use_compiled=False, the loaded pipeline is compiled into a
+    CompiledForest (see forest_compiler.py) which is used for scoring
+    instead of the sklearn predict_proba path for small batches.
+
+    The pickled forest's n_jobs=-1 is overridden by `runtime` (see
+    inference_runtime.py) so single-row calls stay serial inside web workers.
+
+    With micro_batch=True, small requests are coalesced across concurrent
+    callers by a MicroBatcher (see micro_batcher.py) before scoring.
+
+    With use_lattice=True, scoring is answered from a precomputed
+    RecommendationLattice (see crop_lattice.py) instead of the forest.
+    The lattice is loaded from lattice_path if it exists and was built
+    from this model file with the configured grid steps, otherwise built
+    from the model at startup. Rows outside the lattice grid are scored by
+    the model instead; lattice_stats() counts them.
+
+    A `forest` passed in (compiled from this model_path, e.g. mapped from
+    a warm snapshot, see warm_snapshot.py) is used as is and the pickle is
+    not loaded at all; every batch size is then scored by the forest.
+    """
+
+    def __init__(
+        self,
+        model_path: str = "new_crop_model.pkl",
+        use_lattice: bool = False,
+        lattice_path: str = DEFAULT_LATTICE_PATH,
+        lattice_temp_step: float = DEFAULT_TEMP_STEP,
+        lattice_rain_step: float = DEFAULT_RAIN_STEP,
+        use_compiled: bool = True,
+        runtime: Optional[InferenceRuntime] = None,
+        micro_batch: bool = False,
+        micro_batch_max_size: int = 64,
+        micro_batch_wait_ms: float = 2.0,
+        forest: Optional[CompiledForest] = None,
+    ):
+        self.model_path = model_path
+        self.runtime = runtime or InferenceRuntime()
+        self.model_available = False
+        self.model = None
+        self.forest = None
+        self.classes_ = None
+        self.lattice = None
+        self.batcher = None
+
+        self._lattice_lock = threading.Lock()
+        self.lattice_rows = 0
+        self.lattice_out_of_bounds = 0
+
+        if forest is not None:
+            self.forest = forest
+            self.classes_ = forest.classes_
+            self.runtime.configure(None)
+            self.model_available = True
+            print("Using compiled new crop model from snapshot:", forest.n_trees, "trees")
+        elif os.path.exists(self.model_path):
+            try:
+                # joblib (and sklearn, via the pickle) only once a model is actually loaded
+                import joblib
+
+                self.model = joblib.load(self.model_path)
+                self.runtime.configure(self.model)
+                self.classes_ = self.model.classes_
+                self.model_available = True
+                print("Loaded new crop model from", self.model_path)
+            except Exception as e:
+                print("Failed to load model:", e)
+        else:
+            print("new_crop_model.pkl not found; using fallback recommendations.")
+
+        if use_compiled and self.model is not None:
+            try:
+                self.forest = CompiledForest.from_pipeline(self.model)
+                print("Compiled new crop model:", self.forest.n_trees, "trees,",
+                      len(self.forest.threshold), "nodes")
+            except Exception as e:
+                print("Failed to compile model; using sklearn predict_proba:", e)
+                self.forest = None
+
+        if use_lattice and self.model_available:
+            try:
+                if os.path.exists(lattice_path):
+                    self.lattice = RecommendationLattice.load(lattice_path)
+                    stale = self.lattice.stale_reason(
+                        file_version(self.model_path),
+                        self.classes_,
+                        list(SOIL_PROFILES) + [DEFAULT_PROFILE_KEY],
+                        lattice_temp_step,
+                        lattice_rain_step,
+                    )
+                    if stale is None:
+                        print("Loaded recommendation lattice from", lattice_path,
+                              "max deviation:", self.lattice.max_deviation)
+                    else:
+                        print(f"Ignoring recommendation lattice {lattice_path} ({stale}); rebuilding")
+                        self.lattice = None
+                if self.lattice is None:
+                    self.lattice = self.build_lattice(
+                        temp_step=lattice_temp_step, rain_step=lattice_rain_step
+                    )
+            except Exception as e:
+                print("Failed to prepare lattice; using exact model:", e)
+                self.lattice = None
+
+        if micro_batch and self.model_available and self.lattice is None:
+            self.batcher = MicroBatcher(
+                self._predict_proba,
+                max_batch_size=micro_batch_max_size,
+                max_wait_ms=micro_batch_wait_ms,
+            )
+
+    def build_lattice(
+        self,
+        temp_step: float = DEFAULT_TEMP_STEP,
+        rain_step: float = DEFAULT_RAIN_STEP,
+        interpolate: bool = True,
+    ) -> RecommendationLattice:
+        return RecommendationLattice.build(
+            self._predict_proba,
+            self.classes_,
+            SOIL_PROFILES,
+            DEFAULT_PROFILE,
+            temp_step=temp_step,
+            rain_step=rain_step,
+            interpolate=interpolate,
+            model_version=file_version(self.model_path),
+        )
+
+    # Above this many rows sklearn's C traversal beats the compiled forest
+    # (see benchmarks/new_crop_inference.py)
+    COMPILED_MAX_ROWS = 1024
+
+    def _predict_proba(self, X: np.ndarray) -> np.ndarray:
+        if self.forest is not None and (len(X) <= self.COMPILED_MAX_ROWS or self.model is None):
+            return self.forest.predict_proba(X)
+        return self.runtime.predict(self.model.predict_proba, X)
+
+    def _feature_row(self, payload: Dict[str, Any]) -> List[float]:
+        soil_type = (payload.get("soilType") or "").strip()
+        profile = SOIL_PROFILES.get(soil_type, DEFAULT_PROFILE)
+
+        N = float(profile["N"])
+        P = float(profile["P"])
+        K = float(profile["K"])
+        ph = float(profile["ph"])
+        humidity = float(profile["humidity"])
+
+        temperature = float(payload.get("avgTemp", 26.0))
+        rainfall = float(payload.get("avgRainfall", 2000.0))
+
+        return [N, P, K, temperature, humidity, ph, rainfall]
+
+    def _build_features_from_payload(self, payload: Dict[str, Any]) -> np.ndarray:
+        return np.array([self._feature_row(payload)])
+
+    def _build_feature_matrix(self, payloads: List[Dict[str, Any]]) -> np.ndarray:
+        """Stack many payloads into one (n_rows, 7) feature matrix."""
+        return np.array([self._feature_row(p) for p in payloads], dtype=float).reshape(-1, 7)
+
+    @staticmethod
+    def _advice_entry(crop_label: str, score: float) -> Dict[str, Any]:
+        tmpl = CROP_TEMPLATES.get(crop_label, GENERIC_TEMPLATE)
+        return {
+            "cropName": crop_label,
+            "score": score,
+            "waterManagement": tmpl["water"],
+            "nutrientManagement": tmpl["nutrient"],
+            "seedSelection": tmpl["seed"],
+            "otherAdvice": tmpl["other"],
+        }
+
+    def _fallback_recommendations(self) -> List[Dict[str, Any]]:
+        # Fallback simple list if model is not present
+        fallback = ["rice", "arecanut", "banana"]
+        return [self._advice_entry(name, 0.0) for name in fallback]
+
+    def recommend(self, payload: Dict[str, Any], top_k: int = 3) -> List[Dict[str, Any]]:
+        """
+        payload: {
+          "district": "...",
+          "taluk": "...",
+          "soilType": "Red Soil",
+          "farmSizeAcre": 1.0,
+          "avgRainfall": 2300,
+          "avgTemp": 27
+        }
+        """
+        return self.recommend_many([payload], top_k=top_k)[0]
+
+    def recommend_many(
+        self, payloads: List[Dict[str, Any]], top_k: int = 3
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Batch version of recommend(): all payloads are stacked into one
+        feature matrix and scored with a single predict_proba call.
+        Returns one recommendation list per payload, in input order.
+        """
+        if not payloads:
+            return []
+
+        if not self.model_available:
+            return [self._fallback_recommendations() for _ in payloads]
+
+        X = self._build_feature_matrix(payloads)
+        if self.lattice is not None:
+            proba = self._lattice_proba(payloads, X)
+        elif self._use_batcher(X):
+            proba = np.vstack([f.result() for f in [self.batcher.submit(x) for x in X]])
+        else:
+            proba = self._predict_proba(X)
+
+        return self._top_k(proba, top_k)
+
+    async def recommend_many_async(
+        self, payloads: List[Dict[str, Any]], top_k: int = 3
+    ) -> List[List[Dict[str, Any]]]:
+        """recommend_many() for async handlers: awaits the micro-batcher instead of blocking."""
+        if not payloads or not self.model_available or self.lattice is not None:
+            return self.recommend_many(payloads, top_k=top_k)
+
+        X = self._build_feature_matrix(payloads)
+        if not self._use_batcher(X):
+            return self.recommend_many(payloads, top_k=top_k)
+
+        rows = await asyncio.gather(*[self.batcher.score_async(x) for x in X])
+        return self._top_k(np.vstack(rows), top_k)
+
+    def _use_batcher(self, X: np.ndarray) -> bool:
+        # Requests that already carry a full batch go straight to the model
+        return self.batcher is not None and len(X) < self.batcher.max_batch_size
+
+    def _lattice_proba(self, payloads: List[Dict[str, Any]], X: np.ndarray) -> np.ndarray:
+        soil_idx = np.array([
+            self.lattice.profile_idx((p.get("soilType") or "").strip()) for p in payloads
+        ])
+        proba = self.lattice.lookup_many(soil_idx, X[:, 3], X[:, 6])
+
+        # The lattice would clamp these to its edge; the model extrapolates like it always did
+        outside = ~self.lattice.in_bounds(X[:, 3], X[:, 6])
+        if outside.any():
+            proba = proba.astype(np.float64)
+            proba[outside] = self._predict_proba(X[outside])
+
+        with self._lattice_lock:
+            self.lattice_rows += len(X)
+            self.lattice_out_of_bounds += int(outside.sum())
+        return proba
+
+    def lattice_stats(self) -> Optional[dict]:
+        if self.lattice is None:
+            return None
+        with self._lattice_lock:
+            return {
+                "rows": self.lattice_rows,
+                "outOfBounds": self.lattice_out_of_bounds,
+                "maxDeviation": self.lattice.max_deviation,
+            }
+
+    def _top_k(self, proba: np.ndarray, top_k: int) -> List[List[Dict[str, Any]]]:
+        classes = self.classes_
+
+        # Top-k crops by probability, per row
+        idx_sorted = np.argsort(proba, axis=1)[:, ::-1][:, :top_k]
+
+        results: List[List[Dict[str, Any]]] = []
+        for row, row_idx in zip(proba, idx_sorted):
+            results.append(
+                [self._advice_entry(str(classes[idx]), float(row[idx])) for idx in row_idx]
+            )
+
+        return results
+
+
+# ----------------- Existing crop advisor (Firebase logs) -----------------
+
+# Sentence templates used by ExistingCropAdvisor; placeholders are filled
+# after localization so the templates can live in the translation catalog.
+EXISTING_CROP_SENTENCES: Dict[str, str] = {
+    "no_logs": "Add farm activities to receive personalized advice.",
+    "water": "Irrigate every {freq} days. Avoid water stress.",
+    "nutrient": "Applied {fertilizer} ({quantity}). Next dose after {gap} days.",
+    "protection": "Continue weekly pest and disease monitoring.",
+    "harvest": "Harvest at maturity. Dry, grade and store properly.",
+    "fallback": "Follow standard crop management practices.",
+}
+
+
+class ExistingCropAdvisor:
+    """
+    Advice from a crop's activity logs. The sentences are picked first and
+    localized afterwards: every template a request needs goes through one
+    translate_many_fn call, so a request makes one upstream round trip under
+    one latency budget however many logs and crops it has.
+    """
+
+    def __init__(self, translate_many_fn: Optional[Callable[[List[str], str], List[str]]] = None):
+        self.translate_many_fn = translate_many_fn
+
+    def _localized_templates(self, keys, lang: str) -> Dict[str, str]:
+        if lang == "en" or self.translate_many_fn is None or not keys:
+            return {}
+        keys = sorted(keys)
+        localized = self.translate_many_fn([EXISTING_CROP_SENTENCES[key] for key in keys], lang)
+        return dict(zip(keys, localized))
+
+    @staticmethod
+    def _sentence(key: str, localized: Dict[str, str], values: dict) -> str:
+        template = EXISTING_CROP_SENTENCES[key]
+        if key in localized:
+            try:
+                return localized[key].format(**values)
+            except (KeyError, IndexError, ValueError):
+                # Placeholders mangled by translation; keep the English sentence
+                pass
+        return template.format(**values)
+
+    def _plan(self, activity_logs: list, crop_name: str):
+        """The empty response for the crop and its (section, template key, values) sentences."""
+        rec = {
+            "cropName": crop_name,
+            "cropManagement": [],
+            "nutrientManagement": [],
+            "waterManagement": [],
+            "protectionManagement": [],
+            "harvestMarketing": []
+        }
+
+        if not activity_logs:
+            return rec, [("cropManagement", "no_logs", {})]
+
+        sentences = []
+        for log in activity_logs:
+            sub = log.get("subActivity")
+
+            if sub == "water_management":
+                freq = log.get("frequencyDays", 3)
+                sentences.append(("waterManagement", "water", {"freq": freq}))
+
+            elif sub == "nutrient_management":
+                for app in log.get("applications", []):
+                    sentences.append((
+                        "nutrientManagement", "nutrient",
+                        {
+                            "fertilizer": app['fertilizerName'],
+                            "quantity": app['quantity'],
+                            "gap": app['gapDays'],
+                        },
+                    ))
+
+            elif sub == "crop_protection_maintenance":
+                sentences.append(("protectionManagement", "protection", {}))
+
+            elif sub == "harvesting_cut_gather":
+                sentences.append(("harvestMarketing", "harvest", {}))
+
+        # fallback
+        if not sentences:
+            sentences.append(("cropManagement", "fallback", {}))
+
+        return rec, sentences
+
+    def advise(self, activity_logs: list, crop_name: str, lang: str = "en"):
+        return self.advise_many([(activity_logs, crop_name)], lang)[0]
+
+    def advise_many(self, crops: List[Tuple[list, str]], lang: str = "en") -> List[dict]:
+        """advise() for several (activity_logs, crop_name) pairs, localized together."""
+        lang = (lang or "en").lower()
+        planned = [self._plan(activity_logs, crop_name) for activity_logs, crop_name in crops]
+        localized = self._localized_templates(
+            {key for _, sentences in planned for _, key, _ in sentences}, lang
+        )
+
+        for rec, sentences in planned:
+            for section, key, values in sentences:
+                rec[section].append(self._sentence(key, localized, values))
+        return [rec for rec, _ in planned]
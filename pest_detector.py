@@ -1,73 +1,92 @@
-from pest_db import PEST_DB
-import datetime
-
-class PestDetector:
-
-    def detect(self, crop_name, weather, stage, symptoms_text=None):
-        crop = crop_name.lower()
-
-        if crop not in PEST_DB:
-            return []
-
-        month_name = datetime.datetime.now().strftime("%B")
-
-        alerts = []
-
-        for pest, rules in PEST_DB[crop].items():
-            match = True
-
-            # Rule: temp greater than X
-            if "temp_gt" in rules:
-                if not (weather["temp"] > rules["temp_gt"]):
-                    match = False
-
-            # Rule: humidity greater
-            if "humidity_gt" in rules:
-                if not (weather["humidity"] > rules["humidity_gt"]):
-                    match = False
-
-            # Rule: humidity lesser
-            if "humidity_lt" in rules:
-                if not (weather["humidity"] < rules["humidity_lt"]):
-                    match = False
-
-            # Rule: rainfall greater
-            if "rainfall_gt" in rules:
-                if not (weather["rainfall"] > rules["rainfall_gt"]):
-                    match = False
-
-            # Rule: rainfall lesser
-            if "rainfall_lt" in rules:
-                if not (weather["rainfall"] < rules["rainfall_lt"]):
-                    match = False
-
-            # Rule: temperature in range
-            if "temp_range" in rules:
-                lo, hi = rules["temp_range"]
-                if not (lo <= weather["temp"] <= hi):
-                    match = False
-
-            # Stage match
-            if "stage" in rules:
-                if stage not in rules["stage"]:
-                    match = False
-
-            # Month match
-            if "season" in rules:
-                if month_name not in rules["season"]:
-                    match = False
-
-            # Symptom text matching
-            if symptoms_text:
-                if rules["symptoms"].split(" ")[0].lower() not in symptoms_text.lower():
-                    pass  # soft check (not blocking)
-
-            if match:
-                alerts.append({
-                    "pest": pest,
-                    "symptoms": rules["symptoms"],
-                    "preventive": rules["preventive"],
-                    "corrective": rules["corrective"]
-                })
-
-        return alerts
+from pest_db import PEST_DB
+from pest_rules import compile_rules, evaluate_rule_arrays, month_bit
+import datetime
+import numpy as np
+
+class PestDetector:
+
+    def __init__(self, pest_db=PEST_DB, clock=datetime.datetime.now):
+        # Rules are compiled once; see pest_rules.py for the representation
+        self.rules = compile_rules(pest_db)
+        self.clock = clock
+
+    def detect(self, crop_name, weather, stage, symptoms_text=None, on=None):
+        """
+        `on` is the reference date for `season` matching (defaults to clock()).
+        symptoms_text is accepted for compatibility; it never affected matching.
+        """
+        crop = crop_name.lower()
+
+        rules = self.rules.rules.get(crop)
+        if rules is None:
+            return []
+
+        # Same KeyError as before if a rule needs a reading the caller didn't send
+        for key in self.rules.required[crop]:
+            weather[key]
+
+        month = month_bit((on or self.clock()).month)
+        stage_bit = self.rules.stage_bit(stage)
+
+        alerts = []
+
+        for rule in rules:
+            # Month match
+            if rule.season_mask is not None and not rule.season_mask & month:
+                continue
+
+            # Stage match
+            if rule.stage_mask is not None and not rule.stage_mask & stage_bit:
+                continue
+
+            # Temperature / humidity / rainfall thresholds
+            for key, cmp, value in rule.checks:
+                if not cmp(weather[key], value):
+                    break
+            else:
+                alerts.append(dict(rule.alert))
+
+        return alerts
+
+    # ---------------- batch ----------------
+
+    def stage_codes(self, stages):
+        """Stage names -> int64 bit codes; pass the result to detect_batch to reuse across crops."""
+        return np.array([self.rules.stage_bit(s) for s in stages], dtype=np.int64)
+
+    def detect_batch(self, crop_name, weather, stage, month, score=False):
+        """
+        detect() for one crop over many observations in one vectorised pass.
+
+        weather: {"temp": [...], "humidity": [...], "rainfall": [...]} columns
+                 (only the readings this crop's rules use are required)
+        stage:   a stage name, a sequence of names, or codes from stage_codes()
+        month:   1-12, scalar or per observation
+
+        Returns (pests, matrix) where matrix is observations x pests: True
+        where detect() would report the pest, or with score=True the fraction
+        of that pest's conditions the observation meets (1.0 == match).
+        """
+        arrays = self.rules.arrays.get(crop_name.lower())
+
+        if isinstance(stage, str) or stage is None:
+            stage = np.int64(self.rules.stage_bit(stage))
+        else:
+            stage = np.asarray(stage)
+            if not np.issubdtype(stage.dtype, np.integer):
+                stage = self.stage_codes(stage)
+
+        month = np.asarray(month, dtype=np.int64)
+        if ((month < 1) | (month > 12)).any():
+            raise ValueError("month must be in 1..12")
+
+        required = self.rules.required.get(crop_name.lower(), ())
+        columns = {key: np.asarray(weather[key], dtype=np.float64) for key in required}
+        n = np.broadcast(np.empty(1), stage, month, *columns.values()).shape[0]
+
+        if arrays is None:
+            # No rules to read any column from; size the result by whatever was sent
+            n = np.broadcast(np.empty(n), *(np.asarray(v) for v in weather.values())).shape[0]
+            return (), np.zeros((n, 0), dtype=np.float64 if score else bool)
+
+        return arrays.pests, evaluate_rule_arrays(arrays, columns, stage, month, n, score)
@@ -1,43 +1,228 @@
 # pest_engine.py
-from datetime import datetime
+"""
+Crop x district pest alerts.
+
+Alerts depend only on (crop, district) and the static PEST_DB /
+PEST_HISTORY tables, so the engine builds each crop's alerts for every
+district once, into a frozen table, and predict() is a dictionary lookup.
+A crop is built on its first lookup, so only the crops actually queried
+are read from the knowledge base. The reverse indexes in pest_index.py are
+built from the same data on first use. rebuild() starts a new table for
+new data and swaps it in, so readers never see a half-built table.
+"""
+
+import threading
+from types import MappingProxyType
+from typing import Dict, Tuple
+
+from pest_index import PestIndex
+
+GENERIC_SCORE = 0.6
+GENERIC_REASONS = ("Weather & crop stage favourable",)
+HISTORY_REASONS = ("Reported outbreaks in your district",)
+
+
+def risk_level_for(score: float) -> str:
+    if score >= 0.7:
+        return "HIGH"
+    if score >= 0.4:
+        return "MEDIUM"
+    return "LOW"
+
+
+def _alert(pest, risk_level, score, reasons, rule):
+    return MappingProxyType({
+        "pestName": pest,
+        "riskLevel": risk_level,
+        "score": score,
+        "reasons": reasons,
+        "symptoms": rule.get("symptoms", ""),
+        "preventive": rule.get("preventive", ""),
+        "corrective": rule.get("corrective", "")
+    })
+
+
+def normalize_history(district_history) -> dict:
+    """district -> crop -> pest -> (score, risk level), district and crop keys lower-cased."""
+    history = {}
+    for district, crops in district_history.items():
+        by_crop = history.setdefault(district.lower().strip(), {})
+        for crop, pests in crops.items():
+            entries = by_crop.setdefault(crop.lower().strip(), {})
+            for pest, info in pests.items():
+                # Entries are a bare score, or {"score": .., "risk_level": ..}
+                if isinstance(info, dict):
+                    score = float(info.get("score", 0.85))
+                    entries[pest] = (score, info.get("risk_level") or risk_level_for(score))
+                else:
+                    entries[pest] = (float(info), risk_level_for(float(info)))
+    return history
 
-class PestEngine:
+
+def build_crop_alerts(crop, crop_pests, history_by_district) -> Dict[Tuple[str, str], tuple]:
+    """
+    (crop, district) -> alerts for one crop. (crop, "") holds the generic
+    alerts used for districts without recorded history. `history_by_district`
+    is district -> pest -> (score, risk level) for this crop.
+    """
+
+    # 1️⃣ From PEST_DB
+    generic = [(pest, _alert(pest, "MEDIUM", GENERIC_SCORE, GENERIC_REASONS, rule))
+               for pest, rule in crop_pests.items()]
+
+    entries = {}
+
+    # 2️⃣ District history overrides the generic alert for the same pest
+    for district, pests in history_by_district.items():
+        hist_alerts = []
+        for pest, (score, level) in pests.items():
+            hist_alerts.append(_alert(pest, level, score, HISTORY_REASONS, crop_pests.get(pest, {})))
+
+        entries[(crop, district)] = tuple(
+            [a for pest, a in generic if pest not in pests] + hist_alerts
+        )
+
+    entries[(crop, "")] = tuple(a for _, a in generic)
+    return entries
+
+
+class _EngineState:
+    """One version of the data: the alert table, filled per crop, and the index."""
 
     def __init__(self, pest_db, district_history):
         self.pest_db = pest_db
-        self.district_history = district_history
+        # Iterating keys does not load a lazily-backed PEST_DB
+        self.crop_keys = {k.lower().strip(): k for k in pest_db}
+        self.history = normalize_history(district_history)
+        self.history_by_crop: Dict[str, dict] = {}
+        for district, crops in self.history.items():
+            for crop, pests in crops.items():
+                self.history_by_crop.setdefault(crop, {})[district] = pests
+
+        self.table: Dict[Tuple[str, str], tuple] = {}
+        self.index = None
+        # Every crop's alerts and the index are built (warm() / restore_warm_state())
+        self.warm = False
+        self.lock = threading.Lock()
+
+    def load_crop(self, crop_key, district_key) -> tuple:
+        if crop_key not in self.crop_keys and crop_key not in self.history_by_crop:
+            return ()  # unknown crop; not cached so arbitrary input can't grow the table
+
+        with self.lock:
+            if (crop_key, "") not in self.table:
+                source_key = self.crop_keys.get(crop_key)
+                crop_pests = self.pest_db[source_key] if source_key is not None else {}
+                entries = build_crop_alerts(crop_key, crop_pests, self.history_by_crop.get(crop_key, {}))
+                generic = entries.pop((crop_key, ""))
+                self.table.update(entries)
+                # Written last: its presence marks the crop as complete for lock-free readers
+                self.table[(crop_key, "")] = generic
+
+        alerts = self.table.get((crop_key, district_key))
+        return alerts if alerts is not None else self.table[(crop_key, "")]
+
+    def get_index(self) -> PestIndex:
+        if self.index is None:
+            with self.lock:
+                if self.index is None:
+                    normalized_db = {key: self.pest_db[src] for key, src in self.crop_keys.items()}
+                    self.index = PestIndex.build(normalized_db, self.history)
+        return self.index
+
+
+class PestEngine:
+
+    def __init__(self, pest_db, district_history):
+        self._lock = threading.Lock()
+        self.version = 0
+        self.rebuild(pest_db, district_history)
+
+    def rebuild(self, pest_db=None, district_history=None):
+        """Start from new data (or re-read the current sources) and swap it in atomically."""
+        with self._lock:
+            pest_db = self.pest_db if pest_db is None else pest_db
+            district_history = self.district_history if district_history is None else district_history
+
+            state = _EngineState(pest_db, district_history)
+
+            # Single attribute assignment; readers see the old or the new state
+            self.pest_db = pest_db
+            self.district_history = district_history
+            self._state = state
+            self.version += 1
+
+    def warm(self):
+        """Build every crop's alerts and the index now instead of on first use."""
+        state = self._state
+        if state.warm:
+            return
+        for crop_key in list(state.crop_keys) + list(state.history_by_crop):
+            state.load_crop(crop_key, "")
+        state.get_index()
+        state.warm = True
+
+    @property
+    def is_warm(self) -> bool:
+        """True once the current data's table and index are fully built; a rebuild resets it."""
+        return self._state.warm
+
+    def export_warm_state(self) -> dict:
+        """The fully built table and index as JSON-serialisable data (see warm_snapshot.py)."""
+        self.warm()
+        state = self._state
+        alerts, ids = [], {}
+        table = []
+        for (crop, district), entry in list(state.table.items()):
+            # Alerts are shared between districts; store each one once
+            refs = []
+            for alert in entry:
+                if id(alert) not in ids:
+                    ids[id(alert)] = len(alerts)
+                    alerts.append(dict(alert))
+                refs.append(ids[id(alert)])
+            table.append([crop, district, refs])
+        return {"alerts": alerts, "table": table, "index": state.get_index().to_dict()}
+
+    def restore_warm_state(self, data: dict):
+        """Install a table and index from export_warm_state() built from the current data."""
+        alerts = [
+            MappingProxyType({**a, "reasons": tuple(a["reasons"])}) for a in data["alerts"]
+        ]
+        table = {
+            (crop, district): tuple(alerts[i] for i in refs)
+            for crop, district, refs in data["table"]
+        }
+        index = PestIndex.from_dict(data["index"])
+
+        state = self._state
+        with state.lock:
+            state.table = table
+            state.index = index
+            state.warm = True
+
+    @property
+    def index(self) -> PestIndex:
+        return self._state.get_index()
 
     def predict(self, crop_name, district):
+        state = self._state
         crop_key = crop_name.lower().strip()
         district_key = (district or "").lower().strip()
-
-        alerts = []
-
-        # 1️⃣ From PEST_DB
-        crop_pests = self.pest_db.get(crop_key, {})
-        for pest, rule in crop_pests.items():
-            alerts.append({
-                "pestName": pest,
-                "riskLevel": "MEDIUM",
-                "score": 0.6,
-                "reasons": ["Weather & crop stage favourable"],
-                "symptoms": rule.get("symptoms", ""),
-                "preventive": rule.get("preventive", ""),
-                "corrective": rule.get("corrective", "")
-            })
-
-        # 2️⃣ District history override
-        district_data = self.district_history.get(district_key, {})
-        hist = district_data.get(crop_key, {})
-        for pest, info in hist.items():
-            alerts.append({
-                "pestName": pest,
-                "riskLevel": info.get("risk_level", "HIGH"),
-                "score": 0.85,
-                "reasons": ["Reported outbreaks in your district"],
-                "symptoms": crop_pests.get(pest, {}).get("symptoms", ""),
-                "preventive": crop_pests.get(pest, {}).get("preventive", ""),
-                "corrective": crop_pests.get(pest, {}).get("corrective", "")
-            })
-
+        alerts = state.table.get((crop_key, district_key))
+        if alerts is None:
+            alerts = state.table.get((crop_key, ""))
+            if alerts is None:
+                alerts = state.load_crop(crop_key, district_key)
         return alerts
+
+    def stats(self) -> dict:
+        state = self._state
+        table = state.table
+        return {
+            "version": self.version,
+            "entries": len(table),
+            "alerts": sum(len(v) for v in list(table.values())),
+            "cropsLoaded": sum(1 for crop, district in list(table) if district == ""),
+            "indexBuilt": state.index is not None,
+        }
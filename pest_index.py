@@ -0,0 +1,128 @@
+# pest_index.py
+"""
+Reverse indexes over the pest databases, for "who is at risk" queries:
+
+    pest  -> crops it affects (PEST_DB rules and district history)
+    pest  -> districts with recorded history, with score and risk level
+    month -> pests whose rule `season` includes it
+
+Built once with the alert table (PestEngine.rebuild) and never mutated;
+every query is a dictionary lookup on a lower-cased pest name or a month.
+"""
+
+from typing import Dict, Optional, Tuple
+
+MONTHS = (
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+)
+MONTH_NUMBERS = {name.lower(): i for i, name in enumerate(MONTHS, start=1)}
+
+
+def month_number(month) -> Optional[int]:
+    """1-12 from a month number, full name or three-letter abbreviation; None if invalid."""
+    if isinstance(month, int) or (isinstance(month, str) and month.strip().isdigit()):
+        n = int(month)
+        return n if 1 <= n <= 12 else None
+    key = str(month).lower().strip()
+    for name, n in MONTH_NUMBERS.items():
+        if key == name or (len(key) == 3 and name.startswith(key)):
+            return n
+    return None
+
+
+class PestIndex:
+
+    def __init__(
+        self,
+        names: Dict[str, str],
+        crops: Dict[str, Tuple[str, ...]],
+        districts: Dict[str, Tuple[dict, ...]],
+        months: Dict[int, Tuple[dict, ...]],
+    ):
+        self._names = names
+        self._crops = crops
+        self._districts = districts
+        self._months = months
+
+    @classmethod
+    def build(cls, pest_db, history) -> "PestIndex":
+        """`history` is district -> crop -> pest -> (score, risk level), see normalize_history()."""
+        names: Dict[str, str] = {}
+        crops: Dict[str, list] = {}
+        districts: Dict[str, list] = {}
+        months: Dict[int, list] = {n: [] for n in range(1, 13)}
+
+        def key(pest):
+            k = pest.lower().strip()
+            names.setdefault(k, pest)
+            return k
+
+        for crop, pests in pest_db.items():
+            for pest, rule in pests.items():
+                k = key(pest)
+                crops.setdefault(k, []).append(crop)
+                for month in rule.get("season", []):
+                    n = month_number(month)
+                    if n is not None:
+                        months[n].append({"pestName": pest, "cropName": crop})
+
+        for district, by_crop in history.items():
+            for crop, pests in by_crop.items():
+                for pest, (score, level) in pests.items():
+                    k = key(pest)
+                    if crop not in crops.setdefault(k, []):
+                        crops[k].append(crop)
+                    districts.setdefault(k, []).append({
+                        "district": district,
+                        "cropName": crop,
+                        "score": score,
+                        "riskLevel": level,
+                    })
+
+        return cls(
+            names=names,
+            crops={k: tuple(v) for k, v in crops.items()},
+            districts={
+                k: tuple(sorted(v, key=lambda e: (-e["score"], e["district"])))
+                for k, v in districts.items()
+            },
+            months={n: tuple(v) for n, v in months.items()},
+        )
+
+    def to_dict(self) -> dict:
+        """JSON-serialisable form, for warm snapshots."""
+        return {
+            "names": self._names,
+            "crops": self._crops,
+            "districts": self._districts,
+            "months": self._months,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PestIndex":
+        return cls(
+            names=data["names"],
+            crops={k: tuple(v) for k, v in data["crops"].items()},
+            districts={k: tuple(v) for k, v in data["districts"].items()},
+            months={int(n): tuple(v) for n, v in data["months"].items()},
+        )
+
+    def pest_name(self, pest: str) -> Optional[str]:
+        return self._names.get(pest.lower().strip())
+
+    def crops_for(self, pest: str) -> Tuple[str, ...]:
+        return self._crops.get(pest.lower().strip(), ())
+
+    def districts_for(self, pest: str) -> Tuple[dict, ...]:
+        """Districts with recorded history of `pest`, highest score first."""
+        return self._districts.get(pest.lower().strip(), ())
+
+    def pests_in_month(self, month) -> Tuple[dict, ...]:
+        return self._months.get(month_number(month), ())
+
+    def stats(self) -> dict:
+        return {
+            "pests": len(self._names),
+            "pestsWithHistory": len(self._districts),
+        }
@@ -0,0 +1,313 @@
+# pest_kb.py
+"""
+File-backed pest knowledge base: the extended PEST_DB rules and the
+district PEST_HISTORY, previously Python literals.
+
+pest_knowledge.jsonl is one header line followed by one JSON line per crop
+and a final line with the district history:
+
+    {"formatVersion": 1, "version": "<sha256 of the body>", "createdAt": "...",
+     "crops": {"cotton": [offset, length], ...}, "history": [offset, length]}
+    {"cotton": {"Pink Bollworm": {...}, ...}}
+    ...
+    {"ballari": {"cotton": {"Pink Bollworm": 0.9, ...}}, ...}
+
+Offsets are bytes from the start of the body (after the header line). The
+file is memory-mapped and a crop's rules are parsed on first access, so
+startup only reads the header; the mapped pages are shared page cache
+across workers.
+
+PestKnowledgeStore owns the current PestKnowledgeBase. reload() opens the
+new file, verifies it against its version hash and swaps it in with one
+assignment; subscribers (PestEngine, the stream) rebuild from the new
+snapshot while requests already running keep reading the old one, whose
+mapping stays valid after the file is replaced.
+
+Edit the data with:
+
+    python pest_kb.py dump > kb.json      # {"pests": {...}, "history": {...}}
+    python pest_kb.py build kb.json       # writes a new pest_knowledge.jsonl atomically
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sys
+import threading
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+KB_FORMAT_VERSION = 1
+DEFAULT_KB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pest_knowledge.jsonl")
+
+
+def write_knowledge_base(pest_db: dict, district_history: dict, path: str = DEFAULT_KB_PATH) -> dict:
+    """Serialise rules + history to `path` (write to temp file, then rename)."""
+    body = bytearray()
+    crops = {}
+    for crop, pests in pest_db.items():
+        line = json.dumps({crop: pests}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        crops[crop] = [len(body), len(line)]
+        body += line + b"\n"
+    line = json.dumps(district_history, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    history = [len(body), len(line)]
+    body += line + b"\n"
+
+    header = {
+        "formatVersion": KB_FORMAT_VERSION,
+        "version": hashlib.sha256(body).hexdigest()[:16],
+        "createdAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "crops": crops,
+        "history": history,
+    }
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(json.dumps(header, separators=(",", ":")).encode("utf-8") + b"\n")
+        f.write(body)
+    os.replace(tmp_path, path)
+    return header
+
+
+class PestKnowledgeBase:
+    """One immutable version of the knowledge base, parsed lazily per crop."""
+
+    def __init__(self, path: str, verify: bool = False):
+        self.path = path
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = stat.st_size
+
+        header_end = self._map.find(b"\n")
+        header = json.loads(self._map[:header_end])
+        if header.get("formatVersion") != KB_FORMAT_VERSION:
+            raise ValueError(f"Unsupported pest knowledge format {header.get('formatVersion')} in {path}")
+
+        self.version: str = header["version"]
+        self.created_at: Optional[str] = header.get("createdAt")
+        self._body = header_end + 1
+        self._index: Dict[str, List[int]] = header["crops"]
+        self._history_span: List[int] = header["history"]
+        if verify:
+            self.verify()
+
+        self._crops: Dict[str, dict] = {}
+        self._history: Optional[dict] = None
+        self._lock = threading.Lock()
+
+        self.pest_db = PestDBView(self)
+        self.district_history = HistoryView(self)
+
+    def verify(self):
+        digest = hashlib.sha256(self._map[self._body:]).hexdigest()[:16]
+        if digest != self.version:
+            raise ValueError(f"{self.path} is corrupt or partially written "
+                             f"(body hash {digest}, header says {self.version})")
+
+    def _read(self, span: List[int]):
+        offset, length = span
+        start = self._body + offset
+        return json.loads(self._map[start:start + length])
+
+    @property
+    def crops(self) -> List[str]:
+        return list(self._index)
+
+    def rules_for(self, crop: str) -> Optional[dict]:
+        """Rules for `crop` (exact key, as stored: lower-case) or None."""
+        rules = self._crops.get(crop)
+        if rules is None and crop in self._index:
+            with self._lock:
+                rules = self._crops.get(crop)
+                if rules is None:
+                    rules = self._read(self._index[crop])[crop]
+                    self._crops[crop] = rules
+        return rules
+
+    def history(self) -> dict:
+        if self._history is None:
+            with self._lock:
+                if self._history is None:
+                    self._history = self._read(self._history_span)
+        return self._history
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "createdAt": self.created_at,
+            "crops": len(self._index),
+            "cropsLoaded": len(self._crops),
+            "historyLoaded": self._history is not None,
+        }
+
+
+class PestDBView(Mapping):
+    """Read-only crop -> rules mapping over one PestKnowledgeBase."""
+
+    def __init__(self, kb: PestKnowledgeBase):
+        self._kb = kb
+
+    def __getitem__(self, crop):
+        rules = self._kb.rules_for(crop)
+        if rules is None:
+            raise KeyError(crop)
+        return rules
+
+    def __contains__(self, crop):
+        return crop in self._kb._index
+
+    def __iter__(self):
+        return iter(self._kb._index)
+
+    def __len__(self):
+        return len(self._kb._index)
+
+
+class HistoryView(Mapping):
+    """Read-only district -> crop -> pest -> score mapping; loaded on first access."""
+
+    def __init__(self, kb: PestKnowledgeBase):
+        self._kb = kb
+
+    def __getitem__(self, district):
+        return self._kb.history()[district]
+
+    def __iter__(self):
+        return iter(self._kb.history())
+
+    def __len__(self):
+        return len(self._kb.history())
+
+
+class _CurrentView(Mapping):
+    """Mapping that always reads the store's current knowledge base."""
+
+    def __init__(self, store: "PestKnowledgeStore", attr: str):
+        self._store = store
+        self._attr = attr
+
+    def _target(self) -> Mapping:
+        return getattr(self._store.current, self._attr)
+
+    def __getitem__(self, key):
+        return self._target()[key]
+
+    def __contains__(self, key):
+        return key in self._target()
+
+    def __iter__(self):
+        return iter(self._target())
+
+    def __len__(self):
+        return len(self._target())
+
+
+class PestKnowledgeStore:
+
+    def __init__(self, path: str = DEFAULT_KB_PATH):
+        self.path = path
+        self.current = PestKnowledgeBase(path)
+        self.reloads = 0
+        self.failed_reloads = 0
+        self._callbacks: List[Callable[[PestKnowledgeBase], None]] = []
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        # Follow reloads; modules that used to hold the literals export these
+        self.pest_db = _CurrentView(self, "pest_db")
+        self.district_history = _CurrentView(self, "district_history")
+
+    def subscribe(self, callback: Callable[[PestKnowledgeBase], None]):
+        self._callbacks.append(callback)
+
+    def reload(self, force: bool = False) -> bool:
+        """Swap in the file at self.path if it changed; False if unchanged or invalid."""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+                if not force and (stat.st_mtime_ns, stat.st_size) == (self.current.mtime_ns, self.current.size):
+                    return False
+                kb = PestKnowledgeBase(self.path, verify=True)
+            except Exception as e:
+                self.failed_reloads += 1
+                print(f"[PestKB] Reload of {self.path} failed, keeping {self.current.version}: {e}")
+                return False
+
+            if kb.version == self.current.version and not force:
+                self.current = kb
+                return False
+
+            previous = self.current.version
+            self.current = kb
+            self.reloads += 1
+
+        print(f"[PestKB] Reloaded {self.path}: {previous} -> {kb.version}")
+        for callback in self._callbacks:
+            callback(kb)
+        return True
+
+    def watch(self, interval_s: float = 10.0):
+        """Poll the file's mtime/size in a daemon thread and reload on change."""
+        if self._watcher is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval_s):
+                self.reload()
+
+        self._watcher = threading.Thread(target=run, name="pest-kb-watch", daemon=True)
+        self._watcher.start()
+
+    def close(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        stats = self.current.stats()
+        stats.update(path=self.path, reloads=self.reloads, failedReloads=self.failed_reloads,
+                     watching=self._watcher is not None)
+        return stats
+
+
+_store: Optional[PestKnowledgeStore] = None
+_store_lock = threading.Lock()
+
+
+def get_knowledge_store() -> PestKnowledgeStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PestKnowledgeStore(os.environ.get("PEST_KB_PATH", DEFAULT_KB_PATH))
+    return _store
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Dump or build pest_knowledge.jsonl.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    dump = sub.add_parser("dump", help="print the knowledge base as editable JSON")
+    dump.add_argument("--path", default=DEFAULT_KB_PATH)
+    build = sub.add_parser("build", help="write a new knowledge base from edited JSON")
+    build.add_argument("source", help='JSON file with {"pests": {...}, "history": {...}}')
+    build.add_argument("--out", default=DEFAULT_KB_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "dump":
+        kb = PestKnowledgeBase(args.path)
+        data = {"pests": {c: kb.rules_for(c) for c in kb.crops}, "history": kb.history()}
+        json.dump(data, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    else:
+        with open(args.source, encoding="utf-8") as f:
+            data = json.load(f)
+        header = write_knowledge_base(data["pests"], data["history"], args.out)
+        print(f"Wrote {args.out}: {len(header['crops'])} crops, version {header['version']}")
+
+
+if __name__ == "__main__":
+    main()
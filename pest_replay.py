@@ -0,0 +1,268 @@
+# pest_replay.py
+"""
+Replay historical daily weather through the pest rules.
+
+PestDetector answers "what fires today"; this answers "how often would
+each rule have fired" over years of past weather, and how those firings
+line up with the outbreaks recorded in PEST_HISTORY.
+
+Input is one or more CSV files of daily weather with columns
+
+    date, district, temp, humidity, rainfall[, stage]
+
+(`district` may be omitted when each file is one district; the file name
+is used instead). Without a `stage` column every rule's stage condition is
+treated as met, i.e. the crop is assumed to be at the right stage.
+
+Files are read in chunks with pandas and each chunk is scored for every
+crop with PestDetector.detect_batch; with --workers > 1 chunks are scored
+on a process pool and the partial counts merged.
+
+    python pest_replay.py weather/*.csv --out replay_report.json --workers 4
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+DEFAULT_CHUNK_ROWS = 50000
+
+
+class ReplayStats:
+    """Firing counts, mergeable across chunks and worker processes."""
+
+    def __init__(self):
+        self.rows: Dict[str, int] = {}                          # district -> observed days
+        self.fired: Dict[str, Dict[str, np.ndarray]] = {}       # district -> crop -> days fired per pest
+        self.years: Dict[str, Dict[int, np.ndarray]] = {}       # crop -> year -> fired at all, per pest
+        self.first_date: Optional[str] = None
+        self.last_date: Optional[str] = None
+
+    def merge(self, other: "ReplayStats") -> "ReplayStats":
+        for district, n in other.rows.items():
+            self.rows[district] = self.rows.get(district, 0) + n
+        for district, by_crop in other.fired.items():
+            mine = self.fired.setdefault(district, {})
+            for crop, counts in by_crop.items():
+                mine[crop] = mine[crop] + counts if crop in mine else counts.copy()
+        for crop, by_year in other.years.items():
+            mine = self.years.setdefault(crop, {})
+            for year, hit in by_year.items():
+                mine[year] = mine[year] | hit if year in mine else hit.copy()
+        dates = [d for d in (self.first_date, other.first_date) if d]
+        self.first_date = min(dates) if dates else None
+        dates = [d for d in (self.last_date, other.last_date) if d]
+        self.last_date = max(dates) if dates else None
+        return self
+
+
+# ---------------- scoring ----------------
+
+_detector = None
+
+
+def _get_detector():
+    # One compiled detector per process, over the rules the pest engine serves
+    global _detector
+    if _detector is None:
+        from pest_detector import PestDetector
+        from pest_db_extended import PEST_DB as PEST_DB_EXTENDED
+        _detector = PestDetector(PEST_DB_EXTENDED)
+    return _detector
+
+
+def replay_chunk(chunk, crops: Optional[List[str]] = None) -> ReplayStats:
+    """Score one DataFrame chunk (columns as in the module docstring) for every crop."""
+    import pandas as pd
+
+    detector = _get_detector()
+    stats = ReplayStats()
+    if chunk.empty:
+        return stats
+
+    dates = pd.to_datetime(chunk["date"])
+    months = dates.dt.month.to_numpy()
+    years = dates.dt.year.to_numpy()
+    stats.first_date = dates.min().date().isoformat()
+    stats.last_date = dates.max().date().isoformat()
+
+    districts = chunk["district"].astype(str).str.lower().str.strip()
+    codes, names = pd.factorize(districts)
+    for code, name in enumerate(names):
+        stats.rows[name] = int((codes == code).sum())
+
+    if "stage" in chunk:
+        stages = detector.stage_codes(chunk["stage"].tolist())
+    else:
+        # Every stage bit set: each rule's stage condition holds
+        stages = np.int64(sum(detector.rules.stage_bits.values()))
+
+    weather = {
+        key: chunk[key].to_numpy(dtype=np.float64)
+        for key in ("temp", "humidity", "rainfall") if key in chunk
+    }
+    # One-hot district / year columns turn the per-group sums into matmuls
+    unique_years, year_codes = np.unique(years, return_inverse=True)
+    by_district_onehot = np.zeros((len(names), len(codes)), dtype=np.float32)
+    by_district_onehot[codes, np.arange(len(codes))] = 1.0
+    by_year_onehot = np.zeros((len(unique_years), len(codes)), dtype=np.float32)
+    by_year_onehot[year_codes, np.arange(len(codes))] = 1.0
+
+    for crop in crops or list(detector.rules.rules):
+        pests, matrix = detector.detect_batch(crop, weather, stages, months)
+        if not pests:
+            continue
+        matrix = matrix.astype(np.float32)
+
+        # float32 counts are exact well past any chunk size
+        by_district = (by_district_onehot @ matrix).astype(np.int64)
+        for code, name in enumerate(names):
+            stats.fired.setdefault(name, {})[crop] = by_district[code]
+
+        by_year = (by_year_onehot @ matrix) > 0
+        stats.years[crop] = {int(year): by_year[i] for i, year in enumerate(unique_years)}
+
+    return stats
+
+
+# ---------------- input ----------------
+
+def read_chunks(paths: Iterable[str], chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator:
+    import pandas as pd
+
+    for path in paths:
+        district = os.path.splitext(os.path.basename(path))[0]
+        for chunk in pd.read_csv(path, chunksize=chunk_rows):
+            if "district" not in chunk:
+                chunk["district"] = district
+            yield chunk
+
+
+def replay(
+    paths: Iterable[str],
+    workers: int = 1,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    crops: Optional[List[str]] = None,
+) -> ReplayStats:
+    total = ReplayStats()
+    chunks = read_chunks(paths, chunk_rows)
+
+    if workers <= 1:
+        for chunk in chunks:
+            total.merge(replay_chunk(chunk, crops))
+        return total
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Bounded number of chunks in flight so memory stays flat
+        pending = []
+        for chunk in chunks:
+            pending.append(pool.submit(replay_chunk, chunk, crops))
+            if len(pending) >= workers * 2:
+                total.merge(pending.pop(0).result())
+        for fut in pending:
+            total.merge(fut.result())
+    return total
+
+
+# ---------------- report ----------------
+
+def build_report(stats: ReplayStats, district_history=None) -> dict:
+    from pest_engine import normalize_history
+
+    if district_history is None:
+        from district_pest_history import PEST_HISTORY as district_history
+
+    detector = _get_detector()
+    total_days = sum(stats.rows.values())
+
+    rules = []
+    for crop, compiled in detector.rules.rules.items():
+        pests = [r.pest for r in compiled]
+        fired = sum(
+            (by_crop[crop] for by_crop in stats.fired.values() if crop in by_crop),
+            np.zeros(len(pests), dtype=np.int64),
+        )
+        years = stats.years.get(crop, {})
+        for j, pest in enumerate(pests):
+            rules.append({
+                "cropName": crop,
+                "pestName": pest,
+                "firedDays": int(fired[j]),
+                "fireRate": round(fired[j] / total_days, 4) if total_days else 0.0,
+                "yearsFired": sum(1 for hit in years.values() if hit[j]),
+                "districtsFired": sum(
+                    1 for by_crop in stats.fired.values() if crop in by_crop and by_crop[crop][j]
+                ),
+            })
+
+    # Overlap: did the rule fire in districts with recorded outbreaks?
+    entries = []
+    for district, by_crop in normalize_history(district_history).items():
+        for crop, pests in by_crop.items():
+            for pest, (score, _) in pests.items():
+                compiled = detector.rules.rules.get(crop, ())
+                index = next((j for j, r in enumerate(compiled) if r.pest == pest), None)
+                days = stats.rows.get(district, 0)
+                entry = {"district": district, "cropName": crop, "pestName": pest, "score": score}
+                if index is None:
+                    entry["status"] = "no_rule"
+                elif not days:
+                    entry["status"] = "no_weather"
+                else:
+                    fired = int(stats.fired.get(district, {}).get(crop, np.zeros(index + 1))[index])
+                    entry.update(firedDays=fired, fireRate=round(fired / days, 4),
+                                 status="fired" if fired else "never_fired")
+                entries.append(entry)
+
+    evaluated = [e for e in entries if e["status"] in ("fired", "never_fired")]
+    fired = sum(1 for e in evaluated if e["status"] == "fired")
+
+    return {
+        "days": total_days,
+        "districts": len(stats.rows),
+        "dateRange": [stats.first_date, stats.last_date],
+        "rules": sorted(rules, key=lambda r: (-r["fireRate"], r["cropName"], r["pestName"])),
+        "history": {
+            "entries": len(entries),
+            "evaluated": len(evaluated),
+            "fired": fired,
+            "recall": round(fired / len(evaluated), 4) if evaluated else None,
+            "noRule": sum(1 for e in entries if e["status"] == "no_rule"),
+            "noWeather": sum(1 for e in entries if e["status"] == "no_weather"),
+            "detail": entries,
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay daily weather through the pest rules.")
+    parser.add_argument("paths", nargs="+", help="weather CSV files")
+    parser.add_argument("--out", default="replay_report.json")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--crops", default="", help="comma-separated crops (default: all)")
+    args = parser.parse_args(argv)
+
+    crops = [c.strip().lower() for c in args.crops.split(",") if c.strip()] or None
+    stats = replay(args.paths, workers=args.workers, chunk_rows=args.chunk_rows, crops=crops)
+    report = build_report(stats)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    hist = report["history"]
+    print(f"Replayed {report['days']} district-days, {report['districts']} districts, "
+          f"{report['dateRange'][0]} .. {report['dateRange'][1]}")
+    for rule in report["rules"][:10]:
+        print(f"  {rule['cropName']:<12} {rule['pestName']:<32} fired {rule['fireRate']:.1%} of days")
+    print(f"PEST_HISTORY overlap: {hist['fired']}/{hist['evaluated']} outbreaks had the rule fire "
+          f"({hist['noRule']} without a rule, {hist['noWeather']} without weather)")
+    print(f"Saved report to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
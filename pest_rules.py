@@ -0,0 +1,202 @@
+# pest_rules.py
+"""
+Pest rules compiled into a flat form for PestDetector.
+
+A rule dict like
+
+    {"temp_range": [18, 28], "humidity_gt": 85,
+     "season": ["July", "August"], "stage": ["vegetative"], ...}
+
+becomes a CompiledRule with
+  - season_mask: bit (m - 1) set for every month m in `season`
+  - stage_mask:  one bit per stage name, from a vocabulary shared by all rules
+  - checks:      (weather key, comparison, value) triples, e.g.
+                 ("temp", ge, 18), ("temp", le, 28), ("humidity", gt, 85)
+
+The comparisons are the ones PestDetector always used: strict for *_gt /
+*_lt, inclusive for temp_range. Masks are None when the rule has no
+season / stage condition (an empty list still never matches, as before).
+Month names are matched exactly, like strftime("%B") against `season`.
+
+Each crop's rules are also laid out as NumPy columns (RuleArrays) for
+PestDetector.detect_batch: one value array per (weather key, comparison)
+with a `has` mask for rules that lack that condition, plus the masks.
+"""
+
+from dataclasses import dataclass
+from operator import ge, gt, le, lt
+from types import MappingProxyType
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from pest_index import MONTHS
+
+MONTH_BITS = {name: 1 << i for i, name in enumerate(MONTHS)}
+
+# rule key -> (weather key, comparison applied as cmp(weather[key], value))
+THRESHOLD_RULES = {
+    "temp_gt": ("temp", gt),
+    "humidity_gt": ("humidity", gt),
+    "humidity_lt": ("humidity", lt),
+    "rainfall_gt": ("rainfall", gt),
+    "rainfall_lt": ("rainfall", lt),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledRule:
+    pest: str
+    season_mask: Optional[int]
+    stage_mask: Optional[int]
+    checks: Tuple[tuple, ...]
+    alert: MappingProxyType
+
+
+@dataclass(frozen=True, slots=True)
+class RuleArrays:
+    pests: Tuple[str, ...]
+    # (weather key, comparison, values[n_pests], has[n_pests])
+    checks: Tuple[tuple, ...]
+    season_mask: np.ndarray     # int64, 0 where has_season is False
+    has_season: np.ndarray
+    stage_mask: np.ndarray
+    has_stage: np.ndarray
+    n_conditions: np.ndarray    # conditions per rule, for fractional scores
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledRuleSet:
+    rules: Dict[str, Tuple[CompiledRule, ...]]    # crop -> rules, in PEST_DB order
+    arrays: Dict[str, RuleArrays]                 # crop -> the same rules as columns
+    required: Dict[str, Tuple[str, ...]]          # crop -> weather keys any of its rules reads
+    stage_bits: Dict[str, int]
+
+    def stage_bit(self, stage) -> int:
+        return self.stage_bits.get(stage, 0) if isinstance(stage, str) else 0
+
+
+def month_bit(month: int) -> int:
+    return 1 << (month - 1)
+
+
+def _checks(rule: dict) -> Tuple[tuple, ...]:
+    checks = []
+    for key, (field, cmp) in THRESHOLD_RULES.items():
+        if key in rule:
+            checks.append((field, cmp, rule[key]))
+    if "temp_range" in rule:
+        lo, hi = rule["temp_range"]
+        checks.append(("temp", ge, lo))
+        checks.append(("temp", le, hi))
+    return tuple(checks)
+
+
+def rule_arrays(compiled: Tuple[CompiledRule, ...]) -> RuleArrays:
+    n = len(compiled)
+    groups: Dict[tuple, tuple] = {}
+    for i, rule in enumerate(compiled):
+        for field, cmp, value in rule.checks:
+            if (field, cmp) not in groups:
+                groups[(field, cmp)] = (np.zeros(n, dtype=np.float64), np.zeros(n, dtype=bool))
+            values, has = groups[(field, cmp)]
+            values[i] = value
+            has[i] = True
+
+    def mask(attr):
+        values = [getattr(r, attr) for r in compiled]
+        return (np.array([v or 0 for v in values], dtype=np.int64),
+                np.array([v is not None for v in values], dtype=bool))
+
+    season_mask, has_season = mask("season_mask")
+    stage_mask, has_stage = mask("stage_mask")
+    n_conditions = has_season.astype(np.int64) + has_stage
+    for _, has in groups.values():
+        n_conditions += has
+
+    return RuleArrays(
+        pests=tuple(r.pest for r in compiled),
+        checks=tuple((field, cmp, values, has) for (field, cmp), (values, has) in groups.items()),
+        season_mask=season_mask,
+        has_season=has_season,
+        stage_mask=stage_mask,
+        has_stage=has_stage,
+        n_conditions=n_conditions,
+    )
+
+
+def compile_rules(pest_db) -> CompiledRuleSet:
+    stage_bits: Dict[str, int] = {}
+    for pests in pest_db.values():
+        for rule in pests.values():
+            for stage in rule.get("stage", ()):
+                stage_bits.setdefault(stage, 1 << len(stage_bits))
+
+    rules = {}
+    required = {}
+    for crop, pests in pest_db.items():
+        compiled = []
+        for pest, rule in pests.items():
+            season_mask = None
+            if "season" in rule:
+                season_mask = 0
+                for month in rule["season"]:
+                    season_mask |= MONTH_BITS.get(month, 0)
+
+            stage_mask = None
+            if "stage" in rule:
+                stage_mask = 0
+                for stage in rule["stage"]:
+                    stage_mask |= stage_bits[stage]
+
+            compiled.append(CompiledRule(
+                pest=pest,
+                season_mask=season_mask,
+                stage_mask=stage_mask,
+                checks=_checks(rule),
+                alert=MappingProxyType({
+                    "pest": pest,
+                    "symptoms": rule["symptoms"],
+                    "preventive": rule["preventive"],
+                    "corrective": rule["corrective"]
+                }),
+            ))
+
+        rules[crop] = tuple(compiled)
+        required[crop] = tuple(dict.fromkeys(field for r in compiled for field, _, _ in r.checks))
+
+    return CompiledRuleSet(
+        rules=rules,
+        arrays={crop: rule_arrays(compiled) for crop, compiled in rules.items()},
+        required=required,
+        stage_bits=stage_bits,
+    )
+
+
+def evaluate_rule_arrays(arrays: RuleArrays, columns, stage, month, n: int, score: bool = False) -> np.ndarray:
+    """
+    n observations x rules. `columns` maps weather keys to float arrays,
+    `stage` holds stage bit codes and `month` 1-12 (each scalar or length n).
+    """
+    def column(values):
+        return np.broadcast_to(values, (n,))[:, None]
+
+    month_bits = column(np.left_shift(1, month - 1))
+    conditions = [
+        (arrays.has_season, (arrays.season_mask & month_bits) != 0),
+        (arrays.has_stage, (arrays.stage_mask & column(stage)) != 0),
+    ]
+    for key, cmp, values, has in arrays.checks:
+        conditions.append((has, cmp(column(columns[key]), values)))
+
+    if score:
+        met = np.zeros((n, len(arrays.pests)), dtype=np.int64)
+        for has, ok in conditions:
+            met += has & ok
+        # A rule with no conditions always matches
+        return np.where(arrays.n_conditions > 0, met / np.maximum(arrays.n_conditions, 1), 1.0)
+
+    matrix = np.ones((n, len(arrays.pests)), dtype=bool)
+    for has, ok in conditions:
+        matrix &= ~has | ok
+    return matrix
@@ -0,0 +1,264 @@
+# pest_stream.py
+"""
+Streaming pest risk from live per-district weather readings.
+
+The rules in PEST_DB are point-in-time, but outbreaks follow persistent
+conditions. PestRiskStream keeps a consecutive-day counter per rule (all
+crops) and district, advanced when that day's reading meets the rule and
+reset when it doesn't or a day is skipped.
+
+A rule becomes active once its counter reaches `persistence_days` and
+inactive when the conditions break. update() evaluates every crop's rules
+against one reading in a single vectorised pass and returns (and publishes
+to subscribers) RiskEvents only for rules whose state changed, so readers
+query the current state instead of recomputing it per request.
+
+For display, snapshot() also reports the rolling mean / min / max of each
+reading over the last `window_days` readings (RollingStats: O(1) amortised
+per update); rules are evaluated on the day's reading, not on these.
+
+At most `max_districts` districts are tracked; past that the district
+updated least recently is dropped, so readings for arbitrary district
+names can't grow the state without bound.
+"""
+
+import datetime
+import math
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from pest_rules import evaluate_rule_arrays, rule_arrays
+
+WEATHER_KEYS = ("temp", "humidity", "rainfall")
+
+
+class RollingStats:
+    """Mean / min / max over the last `size` values with monotonic deques."""
+
+    __slots__ = ("size", "values", "total", "_min", "_max")
+
+    def __init__(self, size: int):
+        self.size = max(1, int(size))
+        self.values = deque()
+        self.total = 0.0
+        self._min = deque()
+        self._max = deque()
+
+    def push(self, x: float):
+        if len(self.values) == self.size:
+            old = self.values.popleft()
+            self.total -= old
+            if self._min[0] == old:
+                self._min.popleft()
+            if self._max[0] == old:
+                self._max.popleft()
+
+        self.values.append(x)
+        self.total += x
+        while self._min and self._min[-1] > x:
+            self._min.pop()
+        self._min.append(x)
+        while self._max and self._max[-1] < x:
+            self._max.pop()
+        self._max.append(x)
+
+    def summary(self) -> dict:
+        if not self.values:
+            return {"mean": None, "min": None, "max": None, "count": 0}
+        return {
+            "mean": round(self.total / len(self.values), 3),
+            "min": self._min[0],
+            "max": self._max[0],
+            "count": len(self.values),
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class RiskEvent:
+    district: str
+    crop_name: str
+    pest_name: str
+    active: bool            # True: risk raised, False: cleared
+    date: str
+    consecutive_days: int
+
+    def to_dict(self) -> dict:
+        return {
+            "district": self.district,
+            "cropName": self.crop_name,
+            "pestName": self.pest_name,
+            "status": "raised" if self.active else "cleared",
+            "date": self.date,
+            "consecutiveDays": self.consecutive_days,
+        }
+
+
+class _DistrictState:
+
+    __slots__ = ("rolling", "consecutive", "active", "last_date", "stage")
+
+    def __init__(self, window_days: int, n_rules: int):
+        self.rolling = {key: RollingStats(window_days) for key in WEATHER_KEYS}
+        self.consecutive = np.zeros(n_rules, dtype=np.int64)
+        self.active = np.zeros(n_rules, dtype=bool)
+        self.last_date: Optional[datetime.date] = None
+        self.stage: Optional[str] = None
+
+
+class PestRiskStream:
+
+    def __init__(self, detector, window_days: int = 7, persistence_days: int = 3, max_districts: int = 1000):
+        self.window_days = max(1, int(window_days))
+        self.persistence_days = max(1, int(persistence_days))
+        self.max_districts = max(1, int(max_districts))
+        self._districts: "OrderedDict[str, _DistrictState]" = OrderedDict()
+        self._callbacks: List[Callable[[RiskEvent], None]] = []
+        self._lock = threading.Lock()
+        self._keys: List[Tuple[str, str]] = []
+        self.reload_rules(detector)
+
+        self.readings = 0
+        self.skipped = 0
+        self.events = 0
+        self.evicted = 0
+
+    def reload_rules(self, detector):
+        """
+        Switch to a detector's (re)compiled rules. Streaks and active flags
+        carry over for (crop, pest) rules that still exist; a changed rule
+        keeps its streak and is re-evaluated from the next reading.
+        """
+        rules = detector.rules
+
+        # Every crop's rules side by side, so one reading is one evaluation
+        keys: List[Tuple[str, str]] = []
+        compiled = []
+        for crop, crop_rules in rules.rules.items():
+            for rule in crop_rules:
+                keys.append((crop, rule.pest))
+                compiled.append(rule)
+        arrays = rule_arrays(tuple(compiled))
+
+        with self._lock:
+            old_index = {key: i for i, key in enumerate(self._keys)}
+            mapping = np.array([old_index.get(key, -1) for key in keys], dtype=np.int64)
+            kept = mapping >= 0
+            for state in self._districts.values():
+                consecutive = np.zeros(len(keys), dtype=np.int64)
+                active = np.zeros(len(keys), dtype=bool)
+                consecutive[kept] = state.consecutive[mapping[kept]]
+                active[kept] = state.active[mapping[kept]]
+                state.consecutive, state.active = consecutive, active
+
+            self.rules = rules
+            self._keys = keys
+            self._arrays = arrays
+            self._all_stages = np.int64(sum(rules.stage_bits.values()))
+
+    def subscribe(self, callback: Callable[[RiskEvent], None]):
+        self._callbacks.append(callback)
+
+    def set_stage(self, district: str, stage: Optional[str]):
+        """Crop stage for a district; unset means every rule's stage condition holds."""
+        with self._lock:
+            state = self._state(district.lower().strip())
+            state.stage = stage
+
+    def _state(self, district: str) -> _DistrictState:
+        # Caller holds self._lock
+        state = self._districts.get(district)
+        if state is None:
+            state = _DistrictState(self.window_days, len(self._keys))
+            self._districts[district] = state
+            while len(self._districts) > self.max_districts:
+                self._districts.popitem(last=False)
+                self.evicted += 1
+        else:
+            self._districts.move_to_end(district)
+        return state
+
+    def update(self, district: str, reading: Dict[str, float], on: datetime.date) -> List[RiskEvent]:
+        """Feed one daily reading (temp, humidity, rainfall) for `district` on date `on`."""
+        district = district.lower().strip()
+        values = {key: float(reading[key]) for key in WEATHER_KEYS}
+        if not all(math.isfinite(v) for v in values.values()):
+            raise ValueError(f"Non-finite weather reading: {values}")
+
+        with self._lock:
+            state = self._state(district)
+            if state.last_date is not None and on <= state.last_date:
+                # Late or duplicate reading: the day has already been counted
+                self.skipped += 1
+                return []
+            if state.last_date is not None and (on - state.last_date).days > 1:
+                # A missing day breaks every streak
+                state.consecutive[:] = 0
+            state.last_date = on
+            self.readings += 1
+
+            for key, value in values.items():
+                state.rolling[key].push(value)
+
+            stage = self._all_stages if state.stage is None else self.rules.stage_bit(state.stage)
+            matched = evaluate_rule_arrays(
+                self._arrays, values, stage, np.int64(on.month), 1
+            )[0]
+
+            state.consecutive = np.where(matched, state.consecutive + 1, 0)
+            active = state.consecutive >= self.persistence_days
+            changed = np.flatnonzero(active != state.active)
+            state.active = active
+
+            events = [
+                RiskEvent(
+                    district=district,
+                    crop_name=self._keys[i][0],
+                    pest_name=self._keys[i][1],
+                    active=bool(active[i]),
+                    date=on.isoformat(),
+                    consecutive_days=int(state.consecutive[i]),
+                )
+                for i in changed
+            ]
+            self.events += len(events)
+
+        for event in events:
+            for callback in self._callbacks:
+                callback(event)
+        return events
+
+    def snapshot(self, district: str) -> Optional[dict]:
+        """Current rolling aggregates and active risks for a district."""
+        with self._lock:
+            state = self._districts.get(district.lower().strip())
+            if state is None:
+                return None
+            return {
+                "district": district.lower().strip(),
+                "lastDate": state.last_date.isoformat() if state.last_date else None,
+                "windowDays": self.window_days,
+                "aggregates": {key: stats.summary() for key, stats in state.rolling.items()},
+                "activeRisks": [
+                    {"cropName": self._keys[i][0], "pestName": self._keys[i][1],
+                     "consecutiveDays": int(state.consecutive[i])}
+                    for i in np.flatnonzero(state.active)
+                ],
+            }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "districts": len(self._districts),
+                "maxDistricts": self.max_districts,
+                "evictedDistricts": self.evicted,
+                "rules": len(self._keys),
+                "readings": self.readings,
+                "skippedReadings": self.skipped,
+                "events": self.events,
+                "windowDays": self.window_days,
+                "persistenceDays": self.persistence_days,
+            }
@@ -0,0 +1,146 @@
+# serve.py
+"""
+Production entry point: a pre-fork server for main.app.
+
+The parent imports main, loads the read-only state once (the crop model and
+its compiled forest, the pest tables and rules, the translation catalog;
+see main.PRELOAD_STEPS), binds the listening socket and forks N uvicorn
+workers that accept on it. Workers inherit the loaded state copy-on-write,
+so the model's arrays are held once in physical memory however many
+workers run. gc.freeze() moves everything loaded so far out of the
+collector's reach, so collections in the workers don't write to (and
+un-share) those pages.
+
+Each worker still creates its own clients (translation cache, Firebase,
+user store) in its warm-up, since sockets, sqlite handles and threads don't
+survive fork, and keeps its own per-process state (profile cache, streaming
+pest risk). The parent restarts workers that die and forwards SIGTERM /
+SIGINT to them.
+
+Configured from the environment:
+    HOST              bind address (default 0.0.0.0)
+    PORT              bind port (default 8000)
+    WEB_CONCURRENCY   worker processes (default: CPU count)
+    SERVE_PRELOAD     "0" loads the state in each worker instead (for comparison)
+
+    python serve.py --workers 4
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+RESTART_BACKOFF_S = 1.0
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def preload():
+    """Import the app and load its read-only state in this (parent) process."""
+    import main
+
+    started = time.perf_counter()
+    state = main.warm_up(main.PRELOAD_STEPS)
+    failed = [name for name, s in state["subsystems"].items() if s["status"] == "error"]
+    print(f"[Serve] Preloaded {len(state['subsystems'])} subsystems in "
+          f"{time.perf_counter() - started:.2f}s" + (f"; failed: {failed}" if failed else ""))
+
+    # Objects loaded so far are never collected: keep the GC from touching their pages
+    gc.collect()
+    gc.freeze()
+
+
+def run_worker(sock: socket.socket, log_level: str):
+    import uvicorn
+
+    # Loaded here without preload; a no-op import with it
+    from main import app
+
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn(sock: socket.socket, log_level: str) -> int:
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        code = 0
+        try:
+            run_worker(sock, log_level)
+        except BaseException as e:
+            print(f"[Serve] Worker {os.getpid()} crashed: {e!r}")
+            code = 1
+        finally:
+            sys.stdout.flush()
+            os._exit(code)
+    return pid
+
+
+def serve(host: str, port: int, workers: int, preload_app: bool = True, log_level: str = "info"):
+    # Collections during the import would only scatter the long-lived objects
+    gc.disable()
+    if preload_app:
+        preload()
+    gc.enable()
+
+    sock = bind_socket(host, port)
+    children = {spawn(sock, log_level) for _ in range(workers)}
+    print(f"[Serve] {workers} workers on {host}:{port} (preload={'on' if preload_app else 'off'}): "
+          f"{sorted(children)}")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            print(f"[Serve] Worker {pid} exited ({os.waitstatus_to_exitcode(status)}); restarting")
+            time.sleep(RESTART_BACKOFF_S)
+            children.add(spawn(sock, log_level))
+
+    sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-fork server for the crop advisory API.")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    parser.add_argument("--workers", type=int,
+                        default=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--no-preload", action="store_true",
+                        default=os.environ.get("SERVE_PRELOAD") == "0")
+    parser.add_argument("--log-level", default=os.environ.get("LOG_LEVEL", "info"))
+    args = parser.parse_args(argv)
+
+    serve(args.host, args.port, max(1, args.workers), not args.no_preload, args.log_level)
+
+
+if __name__ == "__main__":
+    main()
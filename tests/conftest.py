@@ -0,0 +1,10 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# main.py reads these at import: no Firebase, no background warm-up
+os.environ.setdefault("USER_STORE", "memory")
+os.environ.setdefault("WARM_UP", "off")
+os.environ.setdefault("PEST_KB_WATCH_S", "0")
@@ -0,0 +1,25 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+def test_reload_is_closed_without_admin_token(client, monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.post("/admin/pest-kb/reload").status_code == 404
+    assert client.post("/admin/pest-kb/reload", headers={"X-Admin-Token": ""}).status_code == 404
+
+
+def test_reload_checks_admin_token(client, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    assert client.post("/admin/pest-kb/reload").status_code == 403
+    assert client.post("/admin/pest-kb/reload", headers={"X-Admin-Token": "s3cre"}).status_code == 403
+
+    resp = client.post("/admin/pest-kb/reload", headers={"X-Admin-Token": "s3cret"})
+    assert resp.status_code == 200
+    assert "reloaded" in resp.json()
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from crop_lattice import DEFAULT_PROFILE_KEY, RecommendationLattice
+
+CLASSES = ["maize", "rice"]
+PROFILES = {"Red Soil": {"N": 50, "P": 40, "K": 40, "humidity": 70, "ph": 6.0}}
+DEFAULT = {"N": 60, "P": 45, "K": 45, "humidity": 65, "ph": 6.5}
+PROFILE_KEYS = list(PROFILES) + [DEFAULT_PROFILE_KEY]
+
+
+def predict_proba(X):
+    rice = np.clip(X[:, 6] / 8000.0, 0.0, 1.0)
+    return np.column_stack([1.0 - rice, rice])
+
+
+@pytest.fixture
+def saved(tmp_path):
+    lattice = RecommendationLattice.build(
+        predict_proba, CLASSES, PROFILES, DEFAULT, temp_step=5.0, rain_step=500.0,
+        deviation_samples=0, model_version="abc123",
+    )
+    path = str(tmp_path / "lattice.npz")
+    lattice.save(path)
+    return path
+
+
+def test_saved_lattice_matches_its_model(saved):
+    lattice = RecommendationLattice.load(saved)
+    assert lattice.model_version == "abc123"
+    assert lattice.stale_reason("abc123", CLASSES, PROFILE_KEYS, 5.0, 500.0) is None
+
+
+@pytest.mark.parametrize("model_version, classes, profile_keys, temp_step, rain_step", [
+    ("def456", CLASSES, PROFILE_KEYS, 5.0, 500.0),
+    (None, CLASSES, PROFILE_KEYS, 5.0, 500.0),
+    ("abc123", ["maize", "wheat"], PROFILE_KEYS, 5.0, 500.0),
+    ("abc123", CLASSES, PROFILE_KEYS + ["Laterite"], 5.0, 500.0),
+    ("abc123", CLASSES, PROFILE_KEYS, 0.5, 500.0),
+    ("abc123", CLASSES, PROFILE_KEYS, 5.0, 10.0),
+])
+def test_mismatch_is_stale(saved, model_version, classes, profile_keys, temp_step, rain_step):
+    lattice = RecommendationLattice.load(saved)
+    assert lattice.stale_reason(model_version, classes, profile_keys, temp_step, rain_step) is not None
+
+
+def test_unversioned_lattice_is_stale(saved):
+    with np.load(saved) as data:
+        legacy = {k: data[k] for k in data.files if k not in ("model_version", "temp_step", "rain_step")}
+    np.savez(saved, **legacy)
+
+    lattice = RecommendationLattice.load(saved)
+    assert lattice.model_version is None
+    assert lattice.stale_reason("abc123", CLASSES, PROFILE_KEYS, 5.0, 500.0) is not None
+
+
+class Model:
+    def __init__(self):
+        self.rows = 0
+
+    def predict_proba(self, X):
+        self.rows += len(X)
+        return predict_proba(X)
+
+
+def test_out_of_grid_rows_are_scored_by_the_model():
+    from ml_advisor import DEFAULT_PROFILE, SOIL_PROFILES, NewCropAdvisor
+
+    advisor = NewCropAdvisor(model_path="missing.pkl")
+    advisor.forest = Model()
+    advisor.classes_ = np.array(CLASSES)
+    advisor.model_available = True
+    advisor.lattice = RecommendationLattice.build(
+        predict_proba, CLASSES, SOIL_PROFILES, DEFAULT_PROFILE,
+        temp_step=5.0, rain_step=500.0, deviation_samples=0,
+    )
+    payloads = [
+        {"soilType": "Red Soil", "avgTemp": 27, "avgRainfall": 2000},
+        {"soilType": "Red Soil", "avgTemp": 27, "avgRainfall": 6000},
+        {"soilType": "Sandy", "avgTemp": -5, "avgRainfall": 1000},
+    ]
+    advisor.forest.rows = 0
+
+    recs = advisor.recommend_many(payloads, top_k=1)
+
+    # A clamped lookup would answer for 4000 mm (0.5 rice); the model says 0.75
+    assert recs[1][0]["cropName"] == "rice" and recs[1][0]["score"] == 0.75
+    assert advisor.forest.rows == 2
+    assert advisor.lattice_stats()["rows"] == 3
+    assert advisor.lattice_stats()["outOfBounds"] == 2
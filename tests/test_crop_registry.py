@@ -0,0 +1,22 @@
+from crop_registry import CROP_REGISTRY
+
+
+def test_aliases_share_a_row():
+    assert CROP_REGISTRY.lookup(" Rice ") is CROP_REGISTRY.lookup("paddy")
+    assert CROP_REGISTRY.lookup("arecanut").kannada == "ಅಡಿಕೆ"
+
+
+def test_facts_and_memberships():
+    paddy = CROP_REGISTRY.lookup("paddy")
+    assert (paddy.price, paddy.cost, paddy.yield_per_acre) == (3300, 38000, 22)
+    assert (paddy.temp_min, paddy.temp_max, paddy.rainfall_min, paddy.rainfall_max) == (18, 38, 900, 2500)
+    assert CROP_REGISTRY.district_bits("Mandya") >> paddy.id & 1
+    assert not CROP_REGISTRY.soil_bits("laterite") >> paddy.id & 1
+    assert CROP_REGISTRY.lookup("ginger").temp_min is None
+
+
+def test_unknown_crop_has_no_facts():
+    unknown = CROP_REGISTRY.lookup("dragon fruit")
+    assert unknown.id == CROP_REGISTRY.unknown
+    assert unknown.name is None and unknown.price is None and unknown.yield_per_acre is None
+    assert not CROP_REGISTRY.district_bits("mandya") >> unknown.id & 1
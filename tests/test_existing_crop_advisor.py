@@ -0,0 +1,64 @@
+from ml_advisor import EXISTING_CROP_SENTENCES, ExistingCropAdvisor
+
+LOGS = [
+    {"subActivity": "water_management", "frequencyDays": 4},
+    {"subActivity": "nutrient_management", "applications": [
+        {"fertilizerName": "Urea", "quantity": "20 kg", "gapDays": 15},
+        {"fertilizerName": "DAP", "quantity": "10 kg", "gapDays": 30},
+    ]},
+    {"subActivity": "crop_protection_maintenance"},
+    {"subActivity": "water_management", "frequencyDays": 2},
+]
+
+
+class Translator:
+    def __init__(self, translate=lambda text: "KN " + text):
+        self.calls = []
+        self.translate = translate
+
+    def __call__(self, texts, lang):
+        self.calls.append((list(texts), lang))
+        return [self.translate(t) for t in texts]
+
+
+def test_one_translation_call_per_request():
+    translator = Translator()
+    advisor = ExistingCropAdvisor(translate_many_fn=translator)
+
+    primary, secondary, empty = advisor.advise_many(
+        [(LOGS, "paddy"), ([{"subActivity": "harvesting_cut_gather"}], "ragi"), ([], "maize")], lang="kn"
+    )
+
+    assert len(translator.calls) == 1
+    texts, lang = translator.calls[0]
+    assert lang == "kn"
+    assert sorted(texts) == sorted(
+        EXISTING_CROP_SENTENCES[k] for k in ("water", "nutrient", "protection", "harvest", "no_logs")
+    )
+    assert primary["waterManagement"] == [
+        "KN Irrigate every 4 days. Avoid water stress.",
+        "KN Irrigate every 2 days. Avoid water stress.",
+    ]
+    assert primary["nutrientManagement"][1] == "KN Applied DAP (10 kg). Next dose after 30 days."
+    assert secondary["harvestMarketing"] == ["KN " + EXISTING_CROP_SENTENCES["harvest"]]
+    assert empty["cropManagement"] == ["KN " + EXISTING_CROP_SENTENCES["no_logs"]]
+
+
+def test_english_and_mangled_placeholders():
+    translator = Translator(lambda text: text.replace("{freq}", "{frequency}"))
+    advisor = ExistingCropAdvisor(translate_many_fn=translator)
+
+    assert advisor.advise(LOGS, "paddy", lang="en")["waterManagement"][0] == (
+        "Irrigate every 4 days. Avoid water stress."
+    )
+    assert translator.calls == []
+
+    rec = advisor.advise([{"subActivity": "unknown"}, LOGS[0]], "paddy", lang="KN")
+    # The translation lost {freq}: that sentence stays in English
+    assert rec["waterManagement"] == ["Irrigate every 4 days. Avoid water stress."]
+    assert rec["cropManagement"] == []
+
+
+def test_fallback_when_no_log_matches():
+    rec = ExistingCropAdvisor().advise([{"subActivity": "sowing"}], "paddy", lang="kn")
+    assert rec["cropManagement"] == [EXISTING_CROP_SENTENCES["fallback"]]
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from forest_compiler import CompiledForest
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    rng = np.random.default_rng(0)
+    # Scales like the real features (temperature, rainfall, pH, ...)
+    X = rng.normal([25.0, 1200.0, 6.5, 60.0], [8.0, 600.0, 0.8, 15.0], size=(300, 4))
+    y = np.array(["rice", "ragi", "maize"])[(X[:, 0] > 25).astype(int) + (X[:, 1] > 1200)]
+    pipe = Pipeline([
+        ("scaler", StandardScaler()),
+        ("forest", RandomForestClassifier(n_estimators=7, max_depth=6, random_state=0)),
+    ])
+    return pipe.fit(X, y), X
+
+
+def boundary_rows(pipe, X):
+    """Rows that put one feature exactly on, just below and just above every split."""
+    scaler, forest = pipe.named_steps["scaler"], pipe.named_steps["forest"]
+    base = X.mean(axis=0)
+    rows = []
+    for est in forest.estimators_:
+        tree = est.tree_
+        for node in np.flatnonzero(tree.children_left != -1):
+            f = tree.feature[node]
+            # The naive fold; the exact cut is within a few ulps of it
+            cut = tree.threshold[node] * scaler.scale_[f] + scaler.mean_[f]
+            for x in (cut, np.nextafter(cut, -np.inf), np.nextafter(cut, np.inf),
+                      np.nextafter(np.nextafter(cut, np.inf), np.inf)):
+                row = base.copy()
+                row[f] = x
+                rows.append(row)
+    return np.array(rows)
+
+
+def test_matches_pipeline_on_training_rows(pipeline):
+    pipe, X = pipeline
+    forest = CompiledForest.from_pipeline(pipe)
+
+    np.testing.assert_allclose(forest.predict_proba(X), pipe.predict_proba(X), atol=1e-6)
+    assert list(forest.classes_) == list(pipe.classes_)
+
+
+def test_matches_pipeline_at_split_thresholds(pipeline):
+    pipe, X = pipeline
+    forest = CompiledForest.from_pipeline(pipe)
+    rows = boundary_rows(pipe, X)
+
+    # Same leaf in every tree, not just close probabilities
+    expected = pipe.named_steps["forest"].apply(pipe.named_steps["scaler"].transform(rows))
+    assert np.array_equal(forest.apply(rows) - forest.roots, expected)
+    np.testing.assert_allclose(forest.predict_proba(rows), pipe.predict_proba(rows), atol=1e-6)
+
+
+def test_arrays_round_trip(pipeline):
+    pipe, X = pipeline
+    meta, arrays = CompiledForest.from_pipeline(pipe).to_arrays()
+
+    restored = CompiledForest.from_arrays(meta, arrays)
+
+    np.testing.assert_allclose(restored.predict_proba(X), pipe.predict_proba(X), atol=1e-6)
@@ -0,0 +1,119 @@
+import datetime
+import itertools
+
+import numpy as np
+import pytest
+
+from pest_db import PEST_DB
+from pest_detector import PestDetector
+
+# Every condition kind, with rules that share stages and months
+TEST_DB = {
+    "ragi": {
+        "Blast": {
+            "temp_range": [20, 30], "humidity_gt": 85,
+            "season": ["July", "August"], "stage": ["vegetative", "flowering"],
+            "symptoms": "s", "preventive": "p", "corrective": "c",
+        },
+        "Aphids": {
+            "temp_gt": 28, "humidity_lt": 60, "rainfall_lt": 500,
+            "stage": ["vegetative"],
+            "symptoms": "s", "preventive": "p", "corrective": "c",
+        },
+        "Rot": {
+            "rainfall_gt": 1500, "humidity_gt": 90, "season": ["September"],
+            "symptoms": "s", "preventive": "p", "corrective": "c",
+        },
+        "Never": {
+            "season": [],
+            "symptoms": "s", "preventive": "p", "corrective": "c",
+        },
+    },
+}
+
+
+def original_detect(pest_db, crop_name, weather, stage, month):
+    """The dict-walking detector PestDetector replaced, with the month passed in."""
+    month_name = datetime.date(2024, month, 1).strftime("%B")
+    alerts = []
+    for pest, rules in pest_db.get(crop_name.lower(), {}).items():
+        match = True
+        if "temp_gt" in rules and not weather["temp"] > rules["temp_gt"]:
+            match = False
+        if "humidity_gt" in rules and not weather["humidity"] > rules["humidity_gt"]:
+            match = False
+        if "humidity_lt" in rules and not weather["humidity"] < rules["humidity_lt"]:
+            match = False
+        if "rainfall_gt" in rules and not weather["rainfall"] > rules["rainfall_gt"]:
+            match = False
+        if "rainfall_lt" in rules and not weather["rainfall"] < rules["rainfall_lt"]:
+            match = False
+        if "temp_range" in rules:
+            lo, hi = rules["temp_range"]
+            if not lo <= weather["temp"] <= hi:
+                match = False
+        if "stage" in rules and stage not in rules["stage"]:
+            match = False
+        if "season" in rules and month_name not in rules["season"]:
+            match = False
+        if match:
+            alerts.append(pest)
+    return alerts
+
+
+def fixed_rows(pest_db, crop):
+    """Readings on, just below and just above every threshold of the crop's rules."""
+    edges = {"temp": {25.0}, "humidity": {70.0}, "rainfall": {1000.0}}
+    for rules in pest_db[crop].values():
+        for key, value in rules.items():
+            field = {"temp_gt": "temp", "temp_range": "temp", "humidity_gt": "humidity",
+                     "humidity_lt": "humidity", "rainfall_gt": "rainfall",
+                     "rainfall_lt": "rainfall"}.get(key)
+            for v in (value if key == "temp_range" else [value] if field else []):
+                edges[field].update((v - 0.5, float(v), v + 0.5))
+    stages = sorted({s for r in pest_db[crop].values() for s in r.get("stage", ())})
+    stages += ["harvest", None]
+    return [
+        ({"temp": t, "humidity": h, "rainfall": r}, stage, month)
+        for t, h, r in itertools.product(*(sorted(edges[k]) for k in ("temp", "humidity", "rainfall")))
+        for stage in stages
+        for month in (1, 3, 7, 9)
+    ]
+
+
+@pytest.mark.parametrize("pest_db, crop", [(TEST_DB, "ragi")] + [(PEST_DB, crop) for crop in PEST_DB])
+def test_detect_batch_matches_per_row_detector(pest_db, crop):
+    detector = PestDetector(pest_db)
+    rows = fixed_rows(pest_db, crop)
+
+    pests, matrix = detector.detect_batch(
+        crop,
+        {key: [w[key] for w, _, _ in rows] for key in ("temp", "humidity", "rainfall")},
+        [stage for _, stage, _ in rows],
+        [month for _, _, month in rows],
+    )
+
+    for (weather, stage, month), hits in zip(rows, matrix):
+        batch = [pest for pest, hit in zip(pests, hits) if hit]
+        on = datetime.date(2024, month, 1)
+        assert batch == [a["pest"] for a in detector.detect(crop, weather, stage, on=on)]
+        assert batch == original_detect(pest_db, crop, weather, stage, month)
+
+
+def test_humidity_gt_is_strict():
+    detector = PestDetector(TEST_DB)
+    weather = {"temp": 25.0, "humidity": [85.0, np.nextafter(85.0, np.inf)], "rainfall": 0.0}
+
+    pests, matrix = detector.detect_batch("ragi", weather, "vegetative", 7)
+
+    assert matrix[:, pests.index("Blast")].tolist() == [False, True]
+
+
+def test_scalar_stage_and_month_broadcast():
+    detector = PestDetector(TEST_DB)
+    weather = {"temp": [25.0, 29.0], "humidity": [90.0, 50.0], "rainfall": [0.0, 100.0]}
+
+    pests, matrix = detector.detect_batch("Ragi", weather, "vegetative", 7)
+
+    assert [[p for p, hit in zip(pests, row) if hit] for row in matrix] == [["Blast"], ["Aphids"]]
+    assert detector.detect_batch("wheat", weather, "vegetative", 7)[1].shape == (2, 0)
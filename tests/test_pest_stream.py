@@ -0,0 +1,37 @@
+import datetime
+
+from pest_detector import PestDetector
+from pest_stream import PestRiskStream
+
+READING = {"temp": 26.0, "humidity": 85.0, "rainfall": 12.0}
+DAY = datetime.date(2025, 7, 1)
+
+
+def test_district_state_is_bounded():
+    stream = PestRiskStream(PestDetector(), max_districts=2)
+
+    stream.update("Mandya", READING, DAY)
+    stream.update("Dharwad", READING, DAY)
+    stream.update("Mandya", READING, DAY + datetime.timedelta(days=1))
+    for i in range(50):
+        stream.update(f"no such district {i}", READING, DAY)
+
+    stats = stream.stats()
+    assert stats["districts"] == 2
+    assert stats["evictedDistricts"] == 50
+    assert stream.snapshot("Mandya") is None
+    assert stream.snapshot("no such district 49") is not None
+
+
+def test_recently_updated_district_is_kept():
+    stream = PestRiskStream(PestDetector(), max_districts=2)
+
+    stream.update("Mandya", READING, DAY)
+    stream.update("Dharwad", READING, DAY)
+    stream.update("Mandya", READING, DAY + datetime.timedelta(days=1))
+    stream.update("Mysuru", READING, DAY)
+
+    assert stream.snapshot("Dharwad") is None
+    snapshot = stream.snapshot("Mandya")
+    assert snapshot["lastDate"] == "2025-07-02"
+    assert snapshot["aggregates"]["temp"]["count"] == 2
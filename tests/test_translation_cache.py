@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import google_translate
+import translation_cache
+from translation_cache import TranslationCache
+from translation_catalog import TranslationCatalog
+from translation_client import TranslationClient
+
+
+def test_put_many_writes_one_transaction(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = TranslationCache(path)
+    commits = []
+    cache._db.set_trace_callback(lambda sql: commits.append(sql) if sql == "COMMIT" else None)
+
+    cache.put_many("kn", {"Water daily": "ಪ್ರತಿದಿನ ನೀರು", "Sow in June": "ಜೂನ್‌ನಲ್ಲಿ ಬಿತ್ತನೆ"})
+
+    assert commits == ["COMMIT"]
+    reopened = TranslationCache(path)
+    assert reopened.get("Water daily", "kn") == "ಪ್ರತಿದಿನ ನೀರು"
+    assert reopened.get("Sow in June", "kn") == "ಜೂನ್‌ನಲ್ಲಿ ಬಿತ್ತನೆ"
+    assert reopened.stats()["diskHits"] == 2
+
+
+class RecordingCache(TranslationCache):
+    """Notes the thread of every SQLite access."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = []
+
+    def _disk_get(self, key):
+        self.threads.append(threading.get_ident())
+        return super()._disk_get(key)
+
+    def _disk_put(self, rows):
+        self.threads.append(threading.get_ident())
+        return super()._disk_put(rows)
+
+
+@pytest.fixture
+def recording_cache(monkeypatch, tmp_path):
+    cache = RecordingCache(str(tmp_path / "cache.sqlite3"))
+    client = TranslationClient(lambda texts, lang: {t: t.upper() for t in texts})
+    monkeypatch.setattr(google_translate, "_translation_cache", cache)
+    monkeypatch.setattr(google_translate, "_translation_catalog", TranslationCatalog())
+    monkeypatch.setattr(google_translate, "_upstream_client", client)
+    return cache
+
+
+def test_translate_many_async_keeps_sqlite_off_the_loop(recording_cache):
+    async def run():
+        loop_thread = threading.get_ident()
+        first = await google_translate.translate_many_async(["a", "b", "a"], "kn")
+        recording_cache._memory.clear()
+        second = await google_translate.translate_many_async(["a", "b"], "kn")
+        return loop_thread, first, second
+
+    loop_thread, first, second = asyncio.run(run())
+
+    assert first == ["A", "B", "A"]
+    assert second == ["A", "B"]
+    assert recording_cache.stats()["diskHits"] == 2
+    assert recording_cache.threads
+    assert loop_thread not in recording_cache.threads
+
+
+def disk_rows(cache):
+    return cache._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+
+def test_expired_rows_are_purged_on_open(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = TranslationCache(path)
+    cache.put_many("kn", {"old": "OLD", "new": "NEW"})
+    cache._db.execute("UPDATE translations SET created_at = 0 WHERE translated = 'OLD'")
+    cache._db.commit()
+
+    reopened = TranslationCache(path)
+    assert disk_rows(reopened) == 1
+    assert reopened.stats()["diskPurged"] == 1
+    assert reopened.get("new", "kn") == "NEW"
+
+
+def test_disk_rows_are_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(translation_cache, "PURGE_EVERY", 10)
+    cache = TranslationCache(str(tmp_path / "cache.sqlite3"), max_rows=25)
+
+    for batch in range(5):
+        cache.put_many("kn", {f"text {batch}-{i}": f"T{batch}-{i}" for i in range(7)})
+        cache._db.execute("UPDATE translations SET created_at = ? WHERE translated LIKE ?",
+                          (time.time() - 100 + batch, f"T{batch}-%"))
+        cache._db.commit()
+
+    # Purged after the 14th and 28th row: down to the 25 newest
+    assert disk_rows(cache) == 25 + 7
+    cache._disk_purge()
+    assert disk_rows(cache) == 25
+    cache._memory.clear()
+    assert cache.get("text 0-0", "kn") is None
+    assert cache.get("text 4-6", "kn") == "T4-6"
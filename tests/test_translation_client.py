@@ -0,0 +1,32 @@
+import asyncio
+import threading
+
+import pytest
+
+from translation_client import CLOSED, HALF_OPEN, CircuitBreaker, TranslationClient
+
+
+def test_cancelled_half_open_probe_is_released():
+    release = threading.Event()
+
+    def upstream(texts, lang):
+        release.wait(5)
+        return {t: t.upper() for t in texts}
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    client = TranslationClient(upstream, budget_ms=5000, breaker=breaker)
+    breaker.record_failure()  # open; with no reset timeout the next call probes
+
+    async def run():
+        probe = asyncio.ensure_future(client.translate_async(["a"], "kn"))
+        await asyncio.sleep(0.05)
+        assert breaker.state == HALF_OPEN
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        release.set()
+        return await client.translate_async(["b"], "kn")
+
+    assert asyncio.run(run()) == {"b": "B"}
+    assert breaker.state == CLOSED
+    assert breaker.stats()["shortCircuited"] == 0
@@ -0,0 +1,129 @@
+from types import SimpleNamespace
+
+import pytest
+
+from user_profile import (
+    FirebaseProfileEventSource,
+    LocalProfileEventSource,
+    UserProfile,
+    UserProfileCache,
+)
+
+
+class FakeRegistration:
+    def __init__(self, db, path, callback):
+        self.db, self.path, self.callback = db, path, callback
+
+    def close(self):
+        self.db.open.remove(self)
+
+
+class FakeDb:
+    """firebase_admin.db shaped: reference(path).listen(callback) -> registration."""
+
+    def __init__(self):
+        self.open = []
+
+    def reference(self, path):
+        def listen(callback):
+            registration = FakeRegistration(self, path, callback)
+            self.open.append(registration)
+            callback(SimpleNamespace(event_type="put", path="/", data={"large": "snapshot"}))
+            return registration
+        return SimpleNamespace(listen=listen)
+
+    def paths(self):
+        return sorted(r.path for r in self.open)
+
+    def fire(self, path, event_path, event_type="put", data=None):
+        for registration in self.open:
+            if registration.path == path:
+                registration.callback(SimpleNamespace(event_type=event_type, path=event_path, data=data))
+
+
+def loader(user_id):
+    return UserProfile(user_id=user_id, crop_name="paddy", district="Mandya", secondary_crops=())
+
+
+def drain(source):
+    source._executor.submit(lambda: None).result()
+
+
+@pytest.fixture
+def listened():
+    db = FakeDb()
+    cache = UserProfileCache(loader, max_entries=2)
+    source = cache.attach(FirebaseProfileEventSource(db, max_users=10))
+    yield db, cache, source
+    source.close()
+
+
+def test_listens_only_on_cached_users_profile_fields(listened):
+    db, cache, source = listened
+    assert db.paths() == []
+
+    cache.get("u1")
+    drain(source)
+    assert db.paths() == ["Users/u1/farmDetails", "Users/u1/secondaryCrops"]
+    # The initial snapshots didn't invalidate anything
+    assert cache.stats()["invalidations"] == 0
+
+
+def test_field_change_invalidates(listened):
+    db, cache, source = listened
+    cache.get("u1")
+    drain(source)
+
+    db.fire("Users/u1/farmDetails", "/district")
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["invalidations"] == 1
+
+    drain(source)
+    assert db.paths() == []
+
+
+def test_patch_on_secondary_crops_invalidates(listened):
+    db, cache, source = listened
+    cache.get("u1")
+    drain(source)
+
+    db.fire("Users/u1/secondaryCrops", "/", event_type="patch", data={"ragi": True})
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_eviction_releases_listeners(listened):
+    db, cache, source = listened
+    for user_id in ("u1", "u2", "u3"):
+        cache.get(user_id)
+    drain(source)
+
+    assert cache.stats()["evictions"] == 1
+    assert db.paths() == [
+        "Users/u2/farmDetails", "Users/u2/secondaryCrops",
+        "Users/u3/farmDetails", "Users/u3/secondaryCrops",
+    ]
+    assert cache.stats()["changeSource"]["watchedUsers"] == 2
+
+
+def test_max_users_bounds_listeners():
+    db = FakeDb()
+    cache = UserProfileCache(loader, max_entries=10)
+    source = cache.attach(FirebaseProfileEventSource(db, max_users=1))
+    cache.get("u1")
+    cache.get("u2")
+    drain(source)
+
+    assert db.paths() == ["Users/u1/farmDetails", "Users/u1/secondaryCrops"]
+    assert source.stats()["skipped"] == 1
+    source.close()
+    assert db.paths() == []
+
+
+def test_local_source_tracks_entries():
+    cache = UserProfileCache(loader, ttl_seconds=0)
+    cache.get("u1")
+    source = cache.attach(LocalProfileEventSource())
+    assert source.watched == {"u1"}
+
+    source.emit("/u1/farmDetails/cropName")
+    assert source.watched == set()
@@ -0,0 +1,140 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi.testclient import TestClient
+
+import main
+from user_profile import InvalidUserId, check_user_id, fetch_user_profile_async
+from user_store import FirebaseRestStore, InMemoryUserStore
+
+BAD_IDS = ["", "a/../../secrets", "a/b", "..", "a.b", "a$b", "a#b", "a[0]", "a]", "a\nb"]
+
+
+@pytest.mark.parametrize("user_id", BAD_IDS)
+def test_check_user_id_rejects_keys_outside_users(user_id):
+    with pytest.raises(InvalidUserId):
+        check_user_id(user_id)
+
+
+def test_check_user_id_accepts_firebase_ids():
+    assert check_user_id("Xb3kP9q2LmZ-_aA") == "Xb3kP9q2LmZ-_aA"
+    assert check_user_id("user?x=1") == "user?x=1"
+
+
+def test_fetch_rejects_before_reading():
+    store = InMemoryUserStore({"Users": {}, "secrets": {"farmDetails": {"district": "leak"}}})
+    with pytest.raises(InvalidUserId):
+        asyncio.run(fetch_user_profile_async(store, "../secrets"))
+    assert store.requests == 0
+
+
+@pytest.fixture
+def rest_store():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    store = FirebaseRestStore("https://example.firebaseio.com/", {
+        "type": "service_account",
+        "client_email": "test@example.iam.gserviceaccount.com",
+        "private_key": pem,
+        "token_uri": "https://oauth2.googleapis.com/token",
+    })
+    requested = []
+
+    def handler(request):
+        requested.append(request.url)
+        return httpx.Response(200, content=b"null")
+
+    async def access_token():
+        return "token"
+
+    store._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    store._access_token = access_token
+    return store, requested
+
+
+def test_rest_store_quotes_each_segment(rest_store):
+    store, requested = rest_store
+    asyncio.run(store.get("Users/a?shallow=false#x/secondaryCrops", shallow=True))
+
+    (url,) = requested
+    assert url.raw_path == b"/Users/a%3Fshallow%3Dfalse%23x/secondaryCrops.json?shallow=true"
+    assert dict(url.params) == {"shallow": "true"}
+    assert url.fragment == ""
+
+
+@pytest.fixture
+def client(monkeypatch):
+    store = InMemoryUserStore({"Users": {
+        "u1": {"farmDetails": {"cropName": "paddy", "district": "Mandya"}},
+        "u2": {"farmDetails": {"cropName": "ragi", "district": "Tumakuru"}, "secondaryCrops": {"tomato": True}},
+        "u3": {"farmDetails": {"cropName": "maize", "district": "Tumakuru"}, "activityLogs": {"l1": {}}},
+    }})
+    monkeypatch.setattr(main, "_user_store", store)
+    main.profile_cache.clear()
+    return TestClient(main.app)
+
+
+def test_pest_risk_bad_user_id_is_400(client):
+    resp = client.post("/pest/risk", json={"userId": "u1/../../secrets"})
+    assert resp.status_code == 400
+    assert client.post("/pest/risk", json={"userId": "u1"}).status_code == 200
+
+
+ADMIN = {"X-Admin-Token": "s3cret"}
+
+
+def test_pest_risk_bulk_reports_bad_user_id(client, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    resp = client.post("/pest/risk/bulk", json={"userIds": ["u1", "a#b"]}, headers=ADMIN)
+    assert resp.status_code == 200
+    lines = resp.text.splitlines()
+    assert '"alerts"' in lines[0]
+    assert "Invalid userId" in lines[1]
+
+
+def test_pest_risk_bulk_needs_admin_token(client, monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.post("/pest/risk/bulk", json={"district": "Tumakuru"}).status_code == 404
+
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    assert client.post("/pest/risk/bulk", json={"district": "Tumakuru"}).status_code == 403
+
+
+def test_pest_risk_bulk_district_is_one_query(client, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    resp = client.post("/pest/risk/bulk", json={"district": "Tumakuru"}, headers=ADMIN)
+
+    assert resp.status_code == 200
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert sorted(line["userId"] for line in lines) == ["u2", "u3"]
+    assert all(line["district"] == "Tumakuru" for line in lines)
+    assert main._user_store.requests == 1
+
+
+def test_rest_store_query_params(rest_store):
+    store, requested = rest_store
+    assert asyncio.run(store.query("Users", "farmDetails/district", "Mandya")) == {}
+
+    (url,) = requested
+    assert url.path == "/Users.json"
+    assert dict(url.params) == {"orderBy": '"farmDetails/district"', "equalTo": '"Mandya"'}
+
+
+def test_pest_risk_bulk_does_not_fill_the_profile_cache(client, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    client.post("/pest/risk", json={"userId": "u1"})
+    hits = main.profile_cache.stats()["hits"]
+
+    resp = client.post("/pest/risk/bulk", json={"userIds": ["u1", "u2", "u3"]}, headers=ADMIN)
+
+    assert resp.status_code == 200
+    assert len(resp.text.splitlines()) == 3
+    stats = main.profile_cache.stats()
+    assert stats["entries"] == 1
+    assert stats["hits"] == hits + 1
@@ -0,0 +1,74 @@
+import pytest
+
+import google_translate
+import main
+from translation_catalog import TranslationCatalog
+from warm_snapshot import file_version, write_snapshot
+
+
+def warmed_objects():
+    state = main.pest_engine._state
+    return state, state.table, state.index, main.get_translation_catalog()
+
+
+@pytest.fixture
+def fresh(monkeypatch, tmp_path):
+    """Unwarmed pest engine and catalog; no snapshot unless a test writes one."""
+    monkeypatch.setattr(main, "WARM_SNAPSHOT_PATH", str(tmp_path / "warm_state.snapshot"))
+    monkeypatch.setattr(main, "_warm_snapshot", None)
+    monkeypatch.setattr(main, "_warm_snapshot_opened", False)
+    # Parent already wrote (or skipped) its snapshot
+    monkeypatch.setattr(main, "_warm_snapshot_written", "test")
+    monkeypatch.setattr(google_translate, "_translation_catalog", None)
+    main.pest_engine.rebuild()
+    return tmp_path
+
+
+def test_worker_warm_up_keeps_preloaded_state(fresh):
+    main.warm_up(main.PRELOAD_STEPS)
+    preloaded = warmed_objects()
+    assert main.pest_engine.is_warm
+
+    # What each forked worker's startup hook runs
+    main.warm_up()
+
+    for before, after in zip(preloaded, warmed_objects()):
+        assert after is before
+
+
+def test_worker_warm_up_keeps_state_restored_from_snapshot(fresh):
+    main.pest_engine.warm()
+    catalog = TranslationCatalog(version="v1", translations={"kn": {"Hello": "ನಮಸ್ಕಾರ"}})
+    write_snapshot(main.WARM_SNAPSHOT_PATH, {
+        "pestEngine": (main.pest_kb.current.version, main.pest_engine.export_warm_state(), {}),
+        "translationCatalog": (
+            file_version(google_translate.translation_catalog_path()),
+            {"version": catalog.version, "translations": catalog.translations},
+            {},
+        ),
+    })
+    main.pest_engine.rebuild()
+
+    main.warm_up(main.PRELOAD_STEPS)
+    preloaded = warmed_objects()
+    assert preloaded[3].version == "v1"
+    assert main.get_warm_snapshot().hits == ["pestEngine", "translationCatalog"]
+
+    main.warm_up()
+
+    for before, after in zip(preloaded, warmed_objects()):
+        assert after is before
+    # The worker didn't go back to the snapshot
+    assert main.get_warm_snapshot().hits == ["pestEngine", "translationCatalog"]
+
+
+def test_rebuild_warms_again(fresh):
+    main.warm_up(main.PRELOAD_STEPS)
+    state = main.pest_engine._state
+
+    main.pest_engine.rebuild()
+    assert not main.pest_engine.is_warm
+    main.warm_up(main.PRELOAD_STEPS)
+
+    assert main.pest_engine.is_warm
+    assert main.pest_engine._state is not state
@@ -0,0 +1,238 @@
+# translation_cache.py
+"""
+Two-tier cache for Cloud Translate results.
+
+Tier 1 is an in-process LRU with size and TTL limits. Tier 2 is a SQLite
+file (WAL mode) that survives restarts and is shared by every worker on
+the same host. Entries are keyed on (sha256(text), target language).
+
+The disk tier is purged when it is opened and after every PURGE_EVERY
+written rows: expired rows are deleted, then the oldest rows beyond
+`max_rows`.
+
+Configured from the environment:
+    TRANSLATION_CACHE_PATH       SQLite file (default translation_cache.sqlite3; "" = memory only)
+    TRANSLATION_CACHE_SIZE       max in-memory entries (default 5000)
+    TRANSLATION_CACHE_TTL        seconds an entry stays valid (default 30 days)
+    TRANSLATION_CACHE_MAX_ROWS   max rows in the SQLite file (default 200000)
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional
+
+DEFAULT_CACHE_PATH = "translation_cache.sqlite3"
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ROWS = 200000
+PURGE_EVERY = 1000
+
+
+def cache_key(text: str, lang: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest() + ":" + lang
+
+
+class TranslationCache:
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_CACHE_PATH,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_rows: int = DEFAULT_MAX_ROWS,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl_seconds)
+        self.max_rows = max(1, int(max_rows))
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_purged = 0
+        self._written_since_purge = 0
+
+        self._db = None
+        self.path = path or None
+        if self.path:
+            try:
+                self._db = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS translations ("
+                    " key TEXT PRIMARY KEY, translated TEXT NOT NULL, created_at REAL NOT NULL)"
+                )
+                self._db.execute(
+                    "CREATE INDEX IF NOT EXISTS translations_created_at ON translations (created_at)"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                print("[TranslateCache] Disk tier disabled:", e)
+                self._db = None
+            self._disk_purge()
+
+    @classmethod
+    def from_env(cls) -> "TranslationCache":
+        return cls(
+            path=os.environ.get("TRANSLATION_CACHE_PATH", DEFAULT_CACHE_PATH),
+            max_entries=int(os.environ.get("TRANSLATION_CACHE_SIZE", DEFAULT_MAX_ENTRIES)),
+            ttl_seconds=float(os.environ.get("TRANSLATION_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+            max_rows=int(os.environ.get("TRANSLATION_CACHE_MAX_ROWS", DEFAULT_MAX_ROWS)),
+        )
+
+    # ---------------- lookup ----------------
+
+    def get(self, text: str, lang: str) -> Optional[str]:
+        key = cache_key(text, lang)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                translated, created_at = entry
+                if now - created_at <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return translated
+                del self._memory[key]
+
+        row = self._disk_get(key)
+        if row is not None and now - row[1] <= self.ttl:
+            with self._lock:
+                self.disk_hits += 1
+                self._remember(key, row[0], row[1])
+            return row[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, text: str, lang: str, translated: str):
+        self.put_many(lang, {text: translated})
+
+    def put_many(self, lang: str, translations: Dict[str, str]):
+        """put() for several texts; the disk tier writes them in one transaction."""
+        now = time.time()
+        rows = [(cache_key(text, lang), translated, now) for text, translated in translations.items()]
+        if not rows:
+            return
+        with self._lock:
+            for key, translated, _ in rows:
+                self._remember(key, translated, now)
+        self._disk_put(rows)
+
+    def _remember(self, key: str, translated: str, created_at: float):
+        # Caller holds self._lock
+        self._memory[key] = (translated, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    # ---------------- disk tier ----------------
+
+    def _disk_get(self, key: str):
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                return self._db.execute(
+                    "SELECT translated, created_at FROM translations WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print("[TranslateCache] Disk read failed:", e)
+            return None
+
+    def _disk_put(self, rows):
+        # rows: (key, translated, created_at) tuples, committed together
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO translations (key, translated, created_at) VALUES (?, ?, ?)",
+                    rows,
+                )
+                self._db.commit()
+                self._written_since_purge += len(rows)
+                purge = self._written_since_purge >= PURGE_EVERY
+        except sqlite3.Error as e:
+            print("[TranslateCache] Disk write failed:", e)
+            return
+        if purge:
+            self._disk_purge()
+
+    def _disk_purge(self):
+        """Delete expired rows, then the oldest rows beyond max_rows."""
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._written_since_purge = 0
+                deleted = self._db.execute(
+                    "DELETE FROM translations WHERE created_at < ?", (time.time() - self.ttl,)
+                ).rowcount
+                (rows,) = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()
+                if rows > self.max_rows:
+                    deleted += self._db.execute(
+                        "DELETE FROM translations WHERE key IN"
+                        " (SELECT key FROM translations ORDER BY created_at LIMIT ?)",
+                        (rows - self.max_rows,),
+                    ).rowcount
+                self._db.commit()
+            with self._lock:
+                self.disk_purged += deleted
+        except sqlite3.Error as e:
+            print("[TranslateCache] Disk purge failed:", e)
+
+    # ---------------- warm-up / stats ----------------
+
+    def warm_up(
+        self,
+        texts: Iterable[str],
+        langs: Iterable[str],
+        translate_fn: Optional[Callable[[str, str], Optional[str]]] = None,
+    ) -> int:
+        """
+        Load (text, lang) pairs into memory from disk; with translate_fn,
+        also translate and store the ones missing on disk. Returns the
+        number of pairs now cached.
+        """
+        texts = list(dict.fromkeys(t for t in texts if t))
+        warmed = 0
+        for lang in langs:
+            for text in texts:
+                if self.get(text, lang) is not None:
+                    warmed += 1
+                    continue
+                if translate_fn is None:
+                    continue
+                translated = translate_fn(text, lang)
+                if translated is not None:
+                    self.put(text, lang, translated)
+                    warmed += 1
+        return warmed
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memoryEntries": len(self._memory),
+                "maxEntries": self.max_entries,
+                "ttlSeconds": self.ttl,
+                "memoryHits": self.memory_hits,
+                "diskHits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "diskPurged": self.disk_purged,
+                "hitRate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "diskEnabled": self._db is not None,
+            }
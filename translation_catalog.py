@@ -0,0 +1,155 @@
+# translation_catalog.py
+"""
+Pre-translated catalog of the static advice text.
+
+All advice strings shipped with the backend (CROP_TEMPLATES,
+GENERIC_TEMPLATE, pest symptoms/remedies and the ExistingCropAdvisor
+sentence templates) are translated once at deploy time by
+build_translation_catalog.py into translation_catalog.json:
+
+    {
+      "formatVersion": 1,
+      "version": "<sha256 of the source strings>",
+      "createdAt": "...",
+      "languages": ["kn", ...],
+      "strings": ["<english>", ...],
+      "translations": {"kn": ["<kannada>", ...], ...}   # index-aligned with "strings"
+    }
+
+The server loads the catalog at startup and answers lookups from memory.
+Lookups that miss are logged once per (text, lang) so the catalog can be
+rebuilt.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence
+
+CATALOG_FORMAT_VERSION = 1
+DEFAULT_CATALOG_PATH = "translation_catalog.json"
+SUPPORTED_LANGUAGES = ("kn",)
+
+
+def catalog_source_texts() -> List[str]:
+    """Every static advice string the backend can emit, deduplicated, in stable order."""
+    from ml_advisor import CROP_TEMPLATES, GENERIC_TEMPLATE, EXISTING_CROP_SENTENCES
+    from pest_db_extended import PEST_DB as PEST_DB_EXTENDED
+
+    texts: List[str] = []
+    for tmpl in list(CROP_TEMPLATES.values()) + [GENERIC_TEMPLATE]:
+        texts.extend(tmpl.values())
+    for pests in PEST_DB_EXTENDED.values():
+        for rule in pests.values():
+            texts.extend(rule.get(k, "") for k in ("symptoms", "preventive", "corrective"))
+    texts.extend(EXISTING_CROP_SENTENCES.values())
+
+    return list(dict.fromkeys(t for t in texts if t))
+
+
+def source_version(texts: Sequence[str]) -> str:
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+class TranslationCatalog:
+
+    def __init__(
+        self,
+        version: Optional[str] = None,
+        translations: Optional[Dict[str, Dict[str, str]]] = None,
+    ):
+        self.version = version
+        # lang -> {english: translated}
+        self.translations = translations or {}
+        self.hits = 0
+        self.misses = 0
+        self._logged_misses = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_CATALOG_PATH) -> "TranslationCatalog":
+        if not os.path.exists(path):
+            print(f"[Catalog] {path} not found; all strings go through translate_text.")
+            return cls()
+
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        if data.get("formatVersion") != CATALOG_FORMAT_VERSION:
+            print(f"[Catalog] Unsupported format {data.get('formatVersion')} in {path}; ignoring.")
+            return cls()
+
+        strings = data["strings"]
+        translations = {
+            lang: {src: dst for src, dst in zip(strings, values) if dst}
+            for lang, values in data["translations"].items()
+        }
+        catalog = cls(version=data.get("version"), translations=translations)
+
+        current = source_version(catalog_source_texts())
+        stale = "" if current == catalog.version else f" (stale: sources are now {current})"
+        print(f"[Catalog] Loaded {len(strings)} strings x {len(translations)} languages, "
+              f"version {catalog.version}{stale}")
+        return catalog
+
+    @property
+    def languages(self) -> List[str]:
+        return list(self.translations)
+
+    def lookup(self, text: str, lang: str) -> Optional[str]:
+        translated = self.translations.get(lang, {}).get(text)
+        with self._lock:
+            if translated is not None:
+                self.hits += 1
+                return translated
+            self.misses += 1
+            if self.version is None or (text, lang) in self._logged_misses:
+                return None
+            self._logged_misses.add((text, lang))
+        print(f"[Catalog] Miss ({lang}): {text[:80]!r}; rebuild the catalog to include it.")
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "version": self.version,
+                "languages": self.languages,
+                "entries": sum(len(v) for v in self.translations.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "distinctMisses": len(self._logged_misses),
+            }
+
+
+def build_catalog(
+    translate_many: Callable[[List[str], str], List[str]],
+    langs: Sequence[str] = SUPPORTED_LANGUAGES,
+    path: str = DEFAULT_CATALOG_PATH,
+) -> dict:
+    strings = catalog_source_texts()
+    translations = {}
+    for lang in langs:
+        values = translate_many(strings, lang)
+        # Untranslated strings (upstream failure) are stored empty and retried next build
+        translations[lang] = [v if v != s else "" for s, v in zip(strings, values)]
+
+    data = {
+        "formatVersion": CATALOG_FORMAT_VERSION,
+        "version": source_version(strings),
+        "createdAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "languages": list(langs),
+        "strings": strings,
+        "translations": translations,
+    }
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return data
@@ -0,0 +1,233 @@
+# translation_client.py
+"""
+Deadline-aware access to the Cloud Translate upstream.
+
+Every upstream call goes through a TranslationClient, which
+  - runs the blocking client on a bounded thread pool (max_concurrency),
+  - gives up once the caller's latency budget is spent,
+  - feeds a CircuitBreaker that opens after repeated failures or slow
+    responses; while open, no upstream calls are made and callers fall back
+    to the English text (catalog and cache hits are resolved before this).
+
+Configured from the environment:
+    TRANSLATE_BUDGET_MS          latency budget per request (default 800)
+    TRANSLATE_MAX_CONCURRENCY    concurrent upstream calls (default 8)
+    TRANSLATE_SLOW_MS            responses slower than this count as failures (default 500)
+    TRANSLATE_BREAKER_FAILURES   consecutive failures that open the breaker (default 5)
+    TRANSLATE_BREAKER_RESET_S    seconds before a half-open probe (default 30)
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, List, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.short_circuited = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                # Let exactly one request probe the upstream
+                self._probe_in_flight = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def release_probe(self):
+        """Give back a half-open probe that ended without an outcome (caller cancelled)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutiveFailures": self.consecutive_failures,
+                "timesOpened": self.times_opened,
+                "shortCircuited": self.short_circuited,
+            }
+
+
+class TranslationClient:
+
+    def __init__(
+        self,
+        upstream: Callable[[List[str], str], Dict[str, str]],
+        budget_ms: float = 800.0,
+        max_concurrency: int = 8,
+        slow_ms: float = 500.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.upstream = upstream
+        self.budget = float(budget_ms) / 1000.0
+        self.slow = float(slow_ms) / 1000.0
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.breaker = breaker or CircuitBreaker()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="translate"
+        )
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.slow_calls = 0
+        self.in_flight = 0
+
+    @classmethod
+    def from_env(cls, upstream: Callable[[List[str], str], Dict[str, str]]) -> "TranslationClient":
+        return cls(
+            upstream,
+            budget_ms=float(os.environ.get("TRANSLATE_BUDGET_MS", 800)),
+            max_concurrency=int(os.environ.get("TRANSLATE_MAX_CONCURRENCY", 8)),
+            slow_ms=float(os.environ.get("TRANSLATE_SLOW_MS", 500)),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.environ.get("TRANSLATE_BREAKER_FAILURES", 5)),
+                reset_timeout=float(os.environ.get("TRANSLATE_BREAKER_RESET_S", 30)),
+            ),
+        )
+
+    def deadline(self) -> float:
+        """Monotonic deadline for a request starting now."""
+        return time.monotonic() + self.budget
+
+    # ---------------- calls ----------------
+
+    def translate(self, texts: List[str], lang: str, deadline: Optional[float] = None) -> Dict[str, str]:
+        """Blocking call bounded by the deadline; {} on timeout, error or open breaker."""
+        remaining = self._remaining(deadline)
+        if not texts or remaining <= 0 or not self.breaker.allow():
+            return {}
+
+        start = time.monotonic()
+        fut = self._submit(texts, lang)
+        try:
+            result = fut.result(timeout=remaining)
+        except FutureTimeout:
+            fut.cancel()  # drop it if it is still queued behind other calls
+            self._record_timeout()
+            return {}
+        except Exception as e:
+            self._record_error(e)
+            return {}
+        self._record_done(time.monotonic() - start)
+        return result
+
+    async def translate_async(
+        self, texts: List[str], lang: str, deadline: Optional[float] = None
+    ) -> Dict[str, str]:
+        """Async variant of translate(); the event loop never blocks on the upstream."""
+        remaining = self._remaining(deadline)
+        if not texts or remaining <= 0 or not self.breaker.allow():
+            return {}
+
+        start = time.monotonic()
+        fut = asyncio.wrap_future(self._submit(texts, lang))
+        try:
+            result = await asyncio.wait_for(fut, timeout=remaining)
+        except asyncio.CancelledError:
+            # Not an upstream outcome, but a half-open probe must not stay
+            # claimed or the breaker would short-circuit forever
+            self.breaker.release_probe()
+            raise
+        except asyncio.TimeoutError:
+            self._record_timeout()
+            return {}
+        except Exception as e:
+            self._record_error(e)
+            return {}
+        self._record_done(time.monotonic() - start)
+        return result
+
+    def _remaining(self, deadline: Optional[float]) -> float:
+        if deadline is None:
+            deadline = self.deadline()
+        return deadline - time.monotonic()
+
+    def _submit(self, texts: List[str], lang: str):
+        with self._lock:
+            self.calls += 1
+
+        def run():
+            with self._lock:
+                self.in_flight += 1
+            try:
+                return self.upstream(texts, lang)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+
+        return self._executor.submit(run)
+
+    # ---------------- outcomes ----------------
+
+    def _record_done(self, elapsed: float):
+        if elapsed > self.slow:
+            with self._lock:
+                self.slow_calls += 1
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+        self.breaker.record_failure()
+
+    def _record_error(self, e: Exception):
+        print("[Translate] Upstream error:", e)
+        with self._lock:
+            self.errors += 1
+        self.breaker.record_failure()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {
+                "budgetMs": self.budget * 1000.0,
+                "maxConcurrency": self.max_concurrency,
+                "inFlight": self.in_flight,
+                "calls": self.calls,
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+                "slowCalls": self.slow_calls,
+            }
+        stats["breaker"] = self.breaker.stats()
+        return stats
@@ -0,0 +1,395 @@
+# user_profile.py
+"""
+Field-projected reads of a user's farm profile from Firebase.
+
+`Users/{id}` also holds every activity log the user ever saved, so reading
+the whole node gets slower with account age. The pest endpoints only need
+farmDetails/cropName, farmDetails/district and the keys of secondaryCrops;
+fetch_user_profile reads exactly those paths (secondaryCrops as a shallow
+read, so only its keys come back) in parallel.
+
+UserProfileCache keeps recently used profiles in memory with a TTL and a
+size bound. Entries are dropped early when an event source reports a
+change under Users/{id}/farmDetails or Users/{id}/secondaryCrops; the
+cache tells the source which users it holds, so only those are watched.
+
+fetch_user_profile_async does the same reads through an async store
+(see user_store.py) so handlers don't hold a threadpool slot while waiting.
+
+User ids come from requests and become part of the database path, so both
+fetchers reject ids that could leave Users/{id} (check_user_id).
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Shared pool for the parallel child reads; firebase_admin calls are blocking
+_FETCH_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="user-profile")
+
+
+# Characters the Realtime Database does not allow in a key
+_INVALID_KEY_CHARS = frozenset(".$#[]/")
+
+
+class InvalidUserId(ValueError):
+    """A user id that is not a single database key; served as 400."""
+
+
+def check_user_id(user_id: str) -> str:
+    """`user_id` if it is a valid key under Users/, else InvalidUserId."""
+    if (
+        not isinstance(user_id, str)
+        or not user_id
+        or any(c in _INVALID_KEY_CHARS or ord(c) < 32 or ord(c) == 127 for c in user_id)
+    ):
+        raise InvalidUserId(f"Invalid userId: {user_id!r}")
+    return user_id
+
+
+@dataclass(frozen=True, slots=True)
+class UserProfile:
+    user_id: str
+    crop_name: Optional[str]
+    district: Optional[str]
+    secondary_crops: Tuple[str, ...] = ()
+
+    @property
+    def exists(self) -> bool:
+        return bool(self.crop_name or self.district or self.secondary_crops)
+
+    def crops(self) -> List[str]:
+        """Primary crop (if set) followed by the secondary crops."""
+        crops = [self.crop_name] if self.crop_name else []
+        crops.extend(self.secondary_crops)
+        return crops
+
+
+def fetch_user_profile(db, user_id: str) -> UserProfile:
+    """Read only the profile fields of Users/{user_id} via the firebase_admin db module."""
+    base = f"Users/{check_user_id(user_id)}"
+
+    crop_f = _FETCH_POOL.submit(db.reference(f"{base}/farmDetails/cropName").get)
+    district_f = _FETCH_POOL.submit(db.reference(f"{base}/farmDetails/district").get)
+    secondary_f = _FETCH_POOL.submit(db.reference(f"{base}/secondaryCrops").get, shallow=True)
+
+    secondary = secondary_f.result() or {}
+    return UserProfile(
+        user_id=user_id,
+        crop_name=crop_f.result() or None,
+        district=district_f.result() or None,
+        secondary_crops=tuple(secondary.keys()) if isinstance(secondary, dict) else (),
+    )
+
+
+async def fetch_user_profile_async(store, user_id: str) -> UserProfile:
+    """fetch_user_profile() over an async store; the three reads run concurrently."""
+    base = f"Users/{check_user_id(user_id)}"
+
+    crop, district, secondary = await asyncio.gather(
+        store.get(f"{base}/farmDetails/cropName"),
+        store.get(f"{base}/farmDetails/district"),
+        store.get(f"{base}/secondaryCrops", shallow=True),
+    )
+
+    secondary = secondary or {}
+    return UserProfile(
+        user_id=user_id,
+        crop_name=crop or None,
+        district=district or None,
+        secondary_crops=tuple(secondary.keys()) if isinstance(secondary, dict) else (),
+    )
+
+
+def profile_from_user(user_id: str, user: dict) -> UserProfile:
+    """The profile fields of an already read Users/{user_id} node (e.g. a query result)."""
+    farm = user.get("farmDetails") if isinstance(user, dict) else None
+    farm = farm if isinstance(farm, dict) else {}
+    secondary = user.get("secondaryCrops") if isinstance(user, dict) else None
+    return UserProfile(
+        user_id=user_id,
+        crop_name=farm.get("cropName") or None,
+        district=farm.get("district") or None,
+        secondary_crops=tuple(secondary.keys()) if isinstance(secondary, dict) else (),
+    )
+
+
+# ---------------- cache ----------------
+
+# Children of Users/{id} whose changes affect a cached profile
+PROFILE_FIELDS = ("farmDetails", "secondaryCrops")
+
+
+class UserProfileCache:
+
+    def __init__(
+        self,
+        loader: Optional[Callable[[str], UserProfile]] = None,
+        ttl_seconds: float = 300.0,
+        max_entries: int = 10000,
+        async_loader: Optional[Callable[[str], Awaitable[UserProfile]]] = None,
+    ):
+        self.loader = loader
+        self.async_loader = async_loader
+        self.ttl = float(ttl_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._source = None
+
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._served_age_total = 0.0
+        self._served_age_max = 0.0
+
+    def get(self, user_id: str) -> UserProfile:
+        profile = self._lookup(user_id)
+        if profile is None:
+            profile = self.loader(user_id)
+            self._store(user_id, profile)
+        return profile
+
+    async def get_async(self, user_id: str, store: bool = True) -> UserProfile:
+        """
+        get() with an async loader (e.g. fetch_user_profile_async over a store).
+        With store=False a miss is loaded but not cached, so bulk reads don't
+        evict interactive entries or make the event source watch every user.
+        """
+        profile = self._lookup(user_id)
+        if profile is None:
+            profile = await self.async_loader(user_id)
+            if store:
+                self._store(user_id, profile)
+        return profile
+
+    def _lookup(self, user_id: str) -> Optional[UserProfile]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                profile, loaded_at = entry
+                age = now - loaded_at
+                if age <= self.ttl:
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    self._served_age_total += age
+                    self._served_age_max = max(self._served_age_max, age)
+                    return profile
+                del self._entries[user_id]
+                self._unwatch(user_id)
+                self.expirations += 1
+            self.misses += 1
+        return None
+
+    def _store(self, user_id: str, profile: UserProfile):
+        with self._lock:
+            if user_id not in self._entries and self._source is not None:
+                self._source.watch(user_id)
+            self._entries[user_id] = (profile, time.monotonic())
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._unwatch(evicted)
+                self.evictions += 1
+
+    def _unwatch(self, user_id: str):
+        # Caller holds self._lock, so watch / unwatch reach the source in entry order
+        if self._source is not None:
+            self._source.unwatch(user_id)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self._unwatch(user_id)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            for user_id in self._entries:
+                self._unwatch(user_id)
+            self._entries.clear()
+
+    def handle_change(self, path: str):
+        """
+        React to a change at `path`, relative to Users (e.g. "/u1/farmDetails/district").
+        Writes to other children of a user (activity logs) are ignored.
+        """
+        parts = [p for p in path.split("/") if p]
+        if not parts:
+            self.clear()
+        elif len(parts) == 1 or parts[1] in PROFILE_FIELDS:
+            self.invalidate(parts[0])
+
+    def attach(self, source):
+        """
+        Subscribe to an event source (FirebaseProfileEventSource /
+        LocalProfileEventSource). The source is told to watch each user
+        while the user has an entry and to stop when the entry is evicted,
+        expires or is invalidated.
+        """
+        source.subscribe(self.handle_change)
+        with self._lock:
+            self._source = source
+            for user_id in self._entries:
+                source.watch(user_id)
+        return source
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "ttlSeconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "avgServedAgeSeconds": round(self._served_age_total / self.hits, 3) if self.hits else 0.0,
+                "maxServedAgeSeconds": round(self._served_age_max, 3),
+                "changeSource": self._source.stats() if self._source is not None else None,
+            }
+
+
+# ---------------- change event sources ----------------
+
+class LocalProfileEventSource:
+    """In-process stand-in for the Firebase listener (tests, local runs)."""
+
+    def __init__(self):
+        self._callbacks: List[Callable[[str], None]] = []
+        self.watched = set()
+
+    def subscribe(self, callback: Callable[[str], None]):
+        self._callbacks.append(callback)
+
+    def watch(self, user_id: str):
+        self.watched.add(user_id)
+
+    def unwatch(self, user_id: str):
+        self.watched.discard(user_id)
+
+    def emit(self, path: str):
+        for callback in self._callbacks:
+            callback(path)
+
+    def close(self):
+        self._callbacks.clear()
+        self.watched.clear()
+
+    def stats(self) -> dict:
+        return {"backend": "local", "watchedUsers": len(self.watched)}
+
+
+class FirebaseProfileEventSource:
+    """
+    Streams changes to cached users' profile fields from the Realtime Database.
+
+    Firebase cannot listen on a wildcard like Users/*/farmDetails, and a
+    listener on Users/ would download every profile and activity log. So
+    the cache tells this source which users it holds (watch / unwatch) and
+    it keeps one listener per PROFILE_FIELDS child of Users/{id}, for at
+    most `max_users` users at a time; the others are only refreshed by the
+    cache TTL. Each listener's initial snapshot event is skipped.
+
+    Registering or closing a listener opens or closes a connection, so it
+    is done on one background thread; watch() and unwatch() return at once.
+    """
+
+    def __init__(self, db, root: str = "Users", max_users: int = 100):
+        self.db = db
+        self.root = root
+        self.max_users = max(0, int(max_users))
+        self._callbacks: List[Callable[[str], None]] = []
+        self._watched = set()
+        self._lock = threading.Lock()
+        # Only touched on the listener thread
+        self._registrations: Dict[str, list] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profile-listen")
+        self.skipped = 0
+        self.errors = 0
+
+    def subscribe(self, callback: Callable[[str], None]):
+        self._callbacks.append(callback)
+
+    def watch(self, user_id: str):
+        with self._lock:
+            if user_id in self._watched:
+                return
+            if len(self._watched) >= self.max_users:
+                self.skipped += 1
+                return
+            self._watched.add(user_id)
+        self._executor.submit(self._listen, user_id)
+
+    def unwatch(self, user_id: str):
+        with self._lock:
+            if user_id not in self._watched:
+                return
+            self._watched.discard(user_id)
+        self._executor.submit(self._release, user_id)
+
+    def _listen(self, user_id: str):
+        registrations = self._registrations.setdefault(user_id, [])
+        try:
+            for field in PROFILE_FIELDS:
+                reference = self.db.reference(f"{self.root}/{user_id}/{field}")
+                registrations.append(reference.listen(self._handler(f"/{user_id}/{field}")))
+        except Exception as e:
+            self.errors += 1
+            print(f"[Profiles] Could not listen on {self.root}/{user_id}: {e}")
+
+    def _release(self, user_id: str):
+        for registration in self._registrations.pop(user_id, []):
+            registration.close()
+
+    def _handler(self, base: str):
+        """Listener callback for the node at `base` (relative to root)."""
+        seen_initial = False
+
+        def on_event(event):
+            nonlocal seen_initial
+            if not seen_initial and event.path == "/":
+                seen_initial = True
+                return
+
+            path = base + event.path.rstrip("/")
+            if event.event_type == "patch" and isinstance(event.data, dict):
+                # Multi-path update: data keys are paths relative to event.path
+                paths = [f"{path}/{key}" for key in event.data]
+            else:
+                paths = [path]
+
+            for changed in paths:
+                for callback in self._callbacks:
+                    callback(changed)
+
+        return on_event
+
+    def close(self):
+        with self._lock:
+            user_ids = list(self._watched)
+            self._watched.clear()
+        for user_id in user_ids:
+            self._executor.submit(self._release, user_id)
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "firebase",
+                "watchedUsers": len(self._watched),
+                "maxUsers": self.max_users,
+                "skipped": self.skipped,
+                "errors": self.errors,
+            }
@@ -0,0 +1,212 @@
+# user_store.py
+"""
+Async data access for the Users/{id} tree.
+
+firebase_admin.db is a blocking client, so every read in a sync handler
+holds one of Starlette's threadpool slots for a full network round trip.
+FirebaseRestStore talks to the Realtime Database REST API with an async
+httpx client instead: a pooled keep-alive connection set, a timeout per
+call and a cap on concurrent requests. InMemoryUserStore has the same
+interface over a local dict (with optional simulated latency) for tests
+and offline benchmarks.
+
+query() selects the children of a node by the value at a child path, e.g.
+every user with farmDetails/district == "Mandya". Firebase answers it from
+an index, which the database rules must declare:
+
+    {"rules": {"Users": {".indexOn": ["farmDetails/district"]}}}
+
+Configured from the environment:
+    USER_STORE                 "firebase" (default) or "memory"
+    USER_STORE_FILE            JSON file with the Users tree for the memory store
+    FIREBASE_POOL_SIZE         max pooled connections (default 50)
+    FIREBASE_KEEPALIVE         max idle keep-alive connections (default 20)
+    FIREBASE_TIMEOUT_S         per-call timeout in seconds (default 5)
+    FIREBASE_MAX_CONCURRENCY   concurrent in-flight reads (default 100)
+"""
+
+import asyncio
+import copy
+import json
+import os
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+
+FIREBASE_SCOPES = [
+    "https://www.googleapis.com/auth/firebase.database",
+    "https://www.googleapis.com/auth/userinfo.email",
+]
+
+
+class FirebaseRestStore:
+
+    def __init__(
+        self,
+        db_url: str,
+        credentials_info: Dict[str, Any],
+        pool_size: int = 50,
+        keepalive: int = 20,
+        timeout_s: float = 5.0,
+        max_concurrency: int = 100,
+    ):
+        import httpx
+        from google.oauth2 import service_account
+
+        self.db_url = db_url.rstrip("/")
+        self.timeout_s = float(timeout_s)
+        self._credentials = service_account.Credentials.from_service_account_info(
+            credentials_info, scopes=FIREBASE_SCOPES
+        )
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=keepalive,
+                keepalive_expiry=30.0,
+            ),
+            timeout=httpx.Timeout(self.timeout_s),
+        )
+        self._max_concurrency = max(1, int(max_concurrency))
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._token_lock: Optional[asyncio.Lock] = None
+
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.in_flight = 0
+
+    @classmethod
+    def from_env(cls, db_url: str, credentials_info: Dict[str, Any]) -> "FirebaseRestStore":
+        return cls(
+            db_url,
+            credentials_info,
+            pool_size=int(os.environ.get("FIREBASE_POOL_SIZE", 50)),
+            keepalive=int(os.environ.get("FIREBASE_KEEPALIVE", 20)),
+            timeout_s=float(os.environ.get("FIREBASE_TIMEOUT_S", 5)),
+            max_concurrency=int(os.environ.get("FIREBASE_MAX_CONCURRENCY", 100)),
+        )
+
+    async def _access_token(self) -> str:
+        # asyncio primitives are created lazily so they bind to the serving loop
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        async with self._token_lock:
+            if not self._credentials.valid:
+                from google.auth.transport.requests import Request
+                await asyncio.to_thread(self._credentials.refresh, Request())
+        return self._credentials.token
+
+    async def get(self, path: str, shallow: bool = False) -> Any:
+        """Value at `path` (e.g. "Users/u1/farmDetails/district"); None if absent."""
+        return await self._request(path, {"shallow": "true"} if shallow else None)
+
+    async def query(self, path: str, order_by: str, equal_to: Any) -> Dict[str, Any]:
+        """Children of `path` whose value at child path `order_by` equals `equal_to` (needs .indexOn)."""
+        result = await self._request(path, {
+            "orderBy": json.dumps(order_by),
+            "equalTo": json.dumps(equal_to),
+        })
+        return result or {}
+
+    async def _request(self, path: str, params: Optional[Dict[str, str]]) -> Any:
+        import httpx
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        # Each segment is quoted whole, so "?", "#" or ".." in a key can't change the request
+        segments = [quote(p, safe="") for p in path.split("/") if p]
+        url = f"{self.db_url}/{'/'.join(segments)}.json"
+
+        async with self._semaphore:
+            self.requests += 1
+            self.in_flight += 1
+            try:
+                token = await self._access_token()
+                resp = await self._client.get(
+                    url, params=params, headers={"Authorization": f"Bearer {token}"}
+                )
+                resp.raise_for_status()
+                return resp.json()
+            except httpx.TimeoutException:
+                self.timeouts += 1
+                raise
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self.in_flight -= 1
+
+    async def close(self):
+        await self._client.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "backend": "firebase",
+            "requests": self.requests,
+            "inFlight": self.in_flight,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "maxConcurrency": self._max_concurrency,
+            "timeoutSeconds": self.timeout_s,
+        }
+
+
+class InMemoryUserStore:
+    """Same interface as FirebaseRestStore over a local dict shaped like the database root."""
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, latency_ms: float = 0.0):
+        self.data = data if data is not None else {"Users": {}}
+        self.latency = float(latency_ms) / 1000.0
+        self.requests = 0
+
+    @classmethod
+    def from_file(cls, path: str, latency_ms: float = 0.0) -> "InMemoryUserStore":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if "Users" not in data:
+            data = {"Users": data}
+        return cls(data, latency_ms=latency_ms)
+
+    async def get(self, path: str, shallow: bool = False) -> Any:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        node = _child(self.data, path)
+        if shallow and isinstance(node, dict):
+            return {key: True for key in node}
+        return copy.deepcopy(node)
+
+    async def query(self, path: str, order_by: str, equal_to: Any) -> Dict[str, Any]:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        node = _child(self.data, path)
+        if not isinstance(node, dict):
+            return {}
+        return {
+            key: copy.deepcopy(child) for key, child in node.items()
+            if _child(child, order_by) == equal_to
+        }
+
+    async def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "requests": self.requests, "latencyMs": self.latency * 1000.0}
+
+
+def _child(node: Any, path: str) -> Any:
+    for part in [p for p in path.split("/") if p]:
+        if not isinstance(node, dict) or part not in node:
+            return None
+        node = node[part]
+    return node
+
+
+def store_from_env(db_url: Optional[str], credentials_info: Optional[Dict[str, Any]]):
+    if os.environ.get("USER_STORE", "firebase") == "memory":
+        path = os.environ.get("USER_STORE_FILE")
+        return InMemoryUserStore.from_file(path) if path else InMemoryUserStore()
+    return FirebaseRestStore.from_env(db_url, credentials_info)
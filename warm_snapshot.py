@@ -0,0 +1,181 @@
+# warm_snapshot.py
+"""
+Warm-state snapshot: the read-only state a worker builds at startup, saved
+to one memory-mapped file so the next start maps it instead of rebuilding.
+
+    forest              the compiled new-crop forest (CompiledForest arrays)
+    pestEngine          PestEngine's full alert table and pest index
+    translationCatalog  the loaded translation catalog
+
+Each section is tagged with the version of the input it was built from:
+the sha256 of new_crop_model.pkl, the pest knowledge base version and the
+sha256 of translation_catalog.json. A section is only used while its tag
+still matches; otherwise that subsystem is built in full and the snapshot
+is rewritten (see main.py, WARM_SNAPSHOT).
+
+Layout, like pest_knowledge.jsonl: one JSON header line, padded so the body
+starts on a 64-byte boundary, then the body.
+
+    {"formatVersion": 1, "createdAt": "...",
+     "sections": {"forest": {"version": "<input version>", "json": [offset, length],
+                             "arrays": {"feature": {"dtype": "<i8", "shape": [n], "offset": o}, ...}},
+                  ...}}
+
+Offsets are bytes from the start of the body. Arrays are 64-byte aligned and
+read with np.frombuffer straight from the mapping, so the forest is never
+copied onto the heap and its pages are shared page cache across workers.
+
+    python warm_snapshot.py build      # full build in this process, then write
+    python warm_snapshot.py info       # print the header
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+SNAPSHOT_FORMAT_VERSION = 1
+DEFAULT_SNAPSHOT_PATH = "warm_state.snapshot"
+ALIGN = 64
+
+
+def file_version(path: str) -> Optional[str]:
+    """sha256[:16] of a file's bytes; None if it doesn't exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()[:16]
+
+
+def _pad(n: int) -> int:
+    return -n % ALIGN
+
+
+def write_snapshot(path: str, sections: Dict[str, Tuple[Optional[str], Any, Dict[str, np.ndarray]]]) -> dict:
+    """
+    `sections` maps name -> (input version, JSON-serialisable data, arrays).
+    Written to a temp file, then renamed over `path`.
+    """
+    body = bytearray()
+    index = {}
+    for name, (version, data, arrays) in sections.items():
+        entry = {"version": version, "arrays": {}}
+        for key, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            body += b"\0" * _pad(len(body))
+            entry["arrays"][key] = {
+                "dtype": array.dtype.str, "shape": list(array.shape), "offset": len(body),
+            }
+            body += array.tobytes()
+        blob = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        entry["json"] = [len(body), len(blob)]
+        body += blob
+        index[name] = entry
+
+    header = {
+        "formatVersion": SNAPSHOT_FORMAT_VERSION,
+        "createdAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "sections": index,
+    }
+    line = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    line += b" " * _pad(len(line) + 1) + b"\n"
+
+    # Per-process temp name: several workers may rewrite a stale snapshot at once
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(line)
+        f.write(body)
+    os.replace(tmp_path, path)
+    return header
+
+
+class WarmSnapshot:
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header_end = self._map.find(b"\n")
+        header = json.loads(self._map[:header_end])
+        if header.get("formatVersion") != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format {header.get('formatVersion')} in {path}")
+        self.created_at: Optional[str] = header.get("createdAt")
+        self._body = header_end + 1
+        self._sections: Dict[str, dict] = header["sections"]
+        self.hits = []
+        self.misses = []
+
+    def get(self, name: str, version: Optional[str]) -> Optional[Tuple[Any, Dict[str, np.ndarray]]]:
+        """(data, arrays) of a section built from input `version`; None if absent or stale."""
+        entry = self._sections.get(name)
+        if entry is None or entry["version"] != version:
+            self.misses.append(name)
+            return None
+
+        try:
+            offset, length = entry["json"]
+            start = self._body + offset
+            data = json.loads(self._map[start:start + length])
+            arrays = {}
+            for key, spec in entry["arrays"].items():
+                dtype = np.dtype(spec["dtype"])
+                count = int(np.prod(spec["shape"], dtype=np.int64))
+                arrays[key] = np.frombuffer(
+                    self._map, dtype=dtype, count=count, offset=self._body + spec["offset"]
+                ).reshape(spec["shape"])
+        except ValueError as e:
+            # Truncated or partially written file: rebuild this section
+            print(f"[Snapshot] Section {name} of {self.path} is unreadable: {e}")
+            self.misses.append(name)
+            return None
+        self.hits.append(name)
+        return data, arrays
+
+    def versions(self) -> Dict[str, Optional[str]]:
+        return {name: entry["version"] for name, entry in self._sections.items()}
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "createdAt": self.created_at,
+            "sizeBytes": len(self._map),
+            "sections": self.versions(),
+            "used": self.hits,
+            "stale": self.misses,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the warm-state snapshot.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="build every section from its inputs and write the snapshot")
+    info = sub.add_parser("info", help="print the snapshot header")
+    info.add_argument("--path", default=os.environ.get("WARM_SNAPSHOT_PATH", DEFAULT_SNAPSHOT_PATH))
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        # Ignore any existing snapshot; the preload writes a fresh one
+        os.environ["WARM_SNAPSHOT"] = "rebuild"
+        import main as app_main
+
+        app_main.warm_up(app_main.PRELOAD_STEPS)
+        print(json.dumps(app_main.get_warm_snapshot_stats(), indent=2))
+    else:
+        snapshot = WarmSnapshot(args.path)
+        json.dump(snapshot.stats(), sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
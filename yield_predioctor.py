@@ -1,65 +1,31 @@
 # yield_predictor.py
 
-from typing import Dict
+from crop_registry import CROP_REGISTRY, CropRegistry
+
+DEFAULT_YIELD_PER_ACRE = 12.0
+
 
 class YieldPredictor:
     """
     Knowledge-based yield prediction for Karnataka crops.
     Uses average yield + weather adjustments.
-    """
-
-    # 🌾 Average Yield (Quintals per Acre) — Karnataka
-    CROP_YIELD_BASE: Dict[str, float] = {
-        # Cereals
-        "rice": 22,
-        "paddy": 22,
-        "maize": 18,
-        "ragi": 10,
-        "wheat": 16,
-        "jowar": 12,
-
-        # Pulses
-        "green gram": 5,
-        "black gram": 5,
-        "pigeon pea": 6,
-        "chickpea": 7,
 
-        # Oilseeds
-        "groundnut": 9,
-        "soybean": 7,
-        "sunflower": 6,
-
-        # Commercial crops
-        "cotton": 5,
-        "sugarcane": 40,
-
-        # Plantation & spices
-        "areca nut": 10,
-        "coffee": 7,
-        "pepper": 3,
-        "turmeric": 55,
-        "ginger": 65,
+    Average yields (quintals per acre) come from the crop registry
+    (see crop_registry.py).
+    """
 
-        # Horticulture
-        "banana": 35,
-        "mango": 55,
-        "grapes": 60,
-        "pomegranate": 30,
-        "tomato": 100,
-        "potato": 75,
-        "onion": 80,
-        "chilli": 30,
-    }
+    def __init__(self, registry: CropRegistry = CROP_REGISTRY):
+        self.registry = registry
 
     def predict(self, crop: str, rainfall: float, temp: float, farm_size: float):
 
-        crop_key = crop.lower().strip()
-
         # 🌱 Base yield from KB
-        base_yield = self.CROP_YIELD_BASE.get(crop_key, 12.0)
+        base_yield = self.registry.lookup(crop).yield_per_acre
+        if base_yield is None:
+            base_yield = DEFAULT_YIELD_PER_ACRE
 
         explanation = [
-            f"Average yield for {crop} in Karnataka is about {base_yield} quintals per acre."
+            f"Average yield for {crop} in Karnataka is about {base_yield:g} quintals per acre."
         ]
 
         # 🌧 Rainfall adjustment